@@ -0,0 +1,25 @@
+"""Composite (user_id, prompt_id) index on prompt_shares for access checks.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_prompt_shares_user_prompt", "prompt_shares", ["user_id", "prompt_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_prompt_shares_user_prompt", table_name="prompt_shares")
@@ -0,0 +1,60 @@
+"""Add prompts.search_document with full-text and trigram indexes.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("prompts", sa.Column("search_document", sa.Text(), nullable=True))
+
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # Backfill: name + description + tags of the newest version
+    op.execute(
+        """
+        UPDATE prompts p SET search_document = concat_ws(
+            ' ',
+            p.name,
+            p.description,
+            (
+                SELECT string_agg(tag, ' ')
+                FROM json_array_elements_text((
+                    SELECT v.tags FROM prompt_versions v
+                    WHERE v.prompt_id = p.id
+                    ORDER BY v.created_at DESC
+                    LIMIT 1
+                )) AS tag
+            )
+        )
+        """
+    )
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX idx_prompts_search_fts ON prompts USING gin "
+        "(to_tsvector('simple'::regconfig, coalesce(search_document, '')))"
+    )
+    op.execute(
+        "CREATE INDEX idx_prompts_search_trgm ON prompts USING gin "
+        "(coalesce(search_document, '') gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS idx_prompts_search_trgm")
+        op.execute("DROP INDEX IF EXISTS idx_prompts_search_fts")
+    op.drop_column("prompts", "search_document")
@@ -0,0 +1,31 @@
+"""Add registry_state, the single-row registry revision counter.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "registry_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("revision", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO registry_state (id, revision) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("registry_state")
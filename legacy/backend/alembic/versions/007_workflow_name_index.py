@@ -0,0 +1,31 @@
+"""Indexes for case-insensitive workflow lookup by name.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_workflows_lower_name_user", "workflows", [sa.text("lower(name)"), "user_id"]
+    )
+    op.create_index(
+        "idx_workflow_shares_user_workflow", "workflow_shares", ["user_id", "workflow_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_workflow_shares_user_workflow", table_name="workflow_shares")
+    op.drop_index("idx_workflows_lower_name_user", table_name="workflows")
@@ -0,0 +1,26 @@
+"""Add workflows.plan, the compiled execution plan.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows start without a plan; run_workflow compiles one on first run.
+    op.add_column("workflows", sa.Column("plan", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("workflows", "plan")
@@ -0,0 +1,25 @@
+"""Add workflow_step_runs.items for the per-element results of map steps.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("workflow_step_runs", sa.Column("items", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("workflow_step_runs", "items")
@@ -0,0 +1,76 @@
+"""Add hourly and daily usage rollups, backfilled from prompt_usage.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = {"usage_rollups_hourly": "hour", "usage_rollups_daily": "day"}
+
+# Same buckets as usage_service.latency_bucket: min 0.01 ms, gamma 1.1, capped at 250
+_BUCKET = (
+    "CASE WHEN latency_ms <= 0.01 THEN 0 "
+    "ELSE LEAST(CEIL(LN(latency_ms / 0.01) / LN(1.1)), 250)::int END"
+)
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        op.create_table(
+            table,
+            sa.Column("bucket_start", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("prompt_name", sa.String(255), primary_key=True),
+            sa.Column("prompt_version", sa.String(50), primary_key=True),
+            sa.Column("status_class", sa.String(3), primary_key=True),
+            sa.Column("count", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("latency_sum", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("latency_min", sa.Float(), nullable=True),
+            sa.Column("latency_max", sa.Float(), nullable=True),
+            sa.Column("histogram", sa.JSON(), nullable=False),
+        )
+
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table, unit in _TABLES.items():
+        op.execute(
+            f"""
+            INSERT INTO {table} (
+                bucket_start, prompt_name, prompt_version, status_class,
+                count, latency_sum, latency_min, latency_max, histogram
+            )
+            SELECT bucket_start, prompt_name, prompt_version, status_class,
+                   sum(n), sum(total), min(low), max(high), json_object_agg(bucket, n)
+            FROM (
+                SELECT date_trunc('{unit}', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                           AS bucket_start,
+                       prompt_name,
+                       prompt_version,
+                       (status_code / 100)::text || 'xx' AS status_class,
+                       {_BUCKET} AS bucket,
+                       count(*) AS n,
+                       sum(latency_ms) AS total,
+                       min(latency_ms) AS low,
+                       max(latency_ms) AS high
+                FROM prompt_usage
+                GROUP BY 1, 2, 3, 4, 5
+            ) AS buckets
+            GROUP BY 1, 2, 3, 4
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.drop_table(table)
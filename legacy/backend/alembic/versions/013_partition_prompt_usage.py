@@ -0,0 +1,93 @@
+"""Range-partition prompt_usage by month on Postgres, with a BRIN index on created_at.
+
+The existing table is renamed, a partitioned table takes its name with one
+partition per month from the oldest row through two months ahead (plus a
+default partition so inserts never fail if maintenance falls behind), the rows
+are copied over and the old table dropped. Later partitions are created, and
+expired ones dropped, by usage_service.maintain_partitions.
+
+Other databases keep the single table.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = """
+    id uuid NOT NULL,
+    prompt_name varchar(255) NOT NULL,
+    prompt_version varchar(50) NOT NULL,
+    status_code integer NOT NULL,
+    latency_ms double precision NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now()
+"""
+
+
+def _month(year: int, month: int) -> datetime:
+    return datetime(year + (month - 1) // 12, (month - 1) % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE prompt_usage RENAME TO prompt_usage_unpartitioned")
+    op.execute(
+        "ALTER TABLE prompt_usage_unpartitioned "
+        "RENAME CONSTRAINT prompt_usage_pkey TO prompt_usage_unpartitioned_pkey"
+    )
+    op.execute("DROP INDEX IF EXISTS idx_prompt_usage_prompt_name")
+    op.execute("DROP INDEX IF EXISTS idx_prompt_usage_created_at")
+    op.execute(
+        f"CREATE TABLE prompt_usage ({_COLUMNS}, PRIMARY KEY (id, created_at)) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("CREATE TABLE prompt_usage_default PARTITION OF prompt_usage DEFAULT")
+    op.execute(
+        "CREATE INDEX idx_prompt_usage_created_at_brin ON prompt_usage USING brin (created_at)"
+    )
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM prompt_usage_unpartitioned"))
+    now = datetime.now(timezone.utc)
+    first = oldest.scalar() or now
+    start = _month(first.year, first.month)
+    last = _month(now.year, now.month + 2)
+    while start <= last:
+        end = _month(start.year, start.month + 1)
+        op.execute(
+            f"CREATE TABLE prompt_usage_p{start:%Y%m} PARTITION OF prompt_usage "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    op.execute("INSERT INTO prompt_usage SELECT * FROM prompt_usage_unpartitioned")
+    op.execute("DROP TABLE prompt_usage_unpartitioned")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE prompt_usage RENAME TO prompt_usage_partitioned")
+    op.execute(
+        "ALTER TABLE prompt_usage_partitioned "
+        "RENAME CONSTRAINT prompt_usage_pkey TO prompt_usage_partitioned_pkey"
+    )
+    op.execute(f"CREATE TABLE prompt_usage ({_COLUMNS}, PRIMARY KEY (id))")
+    op.execute("INSERT INTO prompt_usage SELECT * FROM prompt_usage_partitioned")
+    op.execute("DROP TABLE prompt_usage_partitioned CASCADE")
+    op.create_index("idx_prompt_usage_prompt_name", "prompt_usage", ["prompt_name"])
+    op.create_index("idx_prompt_usage_created_at", "prompt_usage", ["created_at"])
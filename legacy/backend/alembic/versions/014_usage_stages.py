@@ -0,0 +1,34 @@
+"""Record per-stage expansion timings on usage rows and in the rollups.
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ROLLUPS = ("usage_rollups_hourly", "usage_rollups_daily")
+
+
+def upgrade() -> None:
+    # On Postgres prompt_usage is partitioned; the column is added to every partition
+    op.add_column("prompt_usage", sa.Column("stages", sa.JSON(), nullable=True))
+    for table in _ROLLUPS:
+        op.add_column(
+            table, sa.Column("stages", sa.JSON(), nullable=False, server_default="{}")
+        )
+
+
+def downgrade() -> None:
+    for table in _ROLLUPS:
+        op.drop_column(table, "stages")
+    op.drop_column("prompt_usage", "stages")
@@ -0,0 +1,116 @@
+"""Normalize prompt_usage: reference the version and caller, compact keys.
+
+Usage rows gain prompt_version_id, user_id, project_id and api_key_id (each
+nullable, cleared when the referenced row is deleted, and indexed together
+with created_at for per-version/user/project/key queries). The free-form
+prompt_version string is replaced by prompt_version_id, backfilled by matching
+(prompt_name, prompt_version) against prompt_versions; rows whose version no
+longer exists keep a null id. Existing rows have no caller recorded, so their
+user, project and key stay null. The UUID primary key becomes a bigint from a
+sequence and status_code a smallint.
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "015"
+down_revision: Union[str, None] = "014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_REFERENCES = {
+    "prompt_version_id": ("prompt_versions", "idx_prompt_usage_version_created"),
+    "user_id": ("users", "idx_prompt_usage_user_created"),
+    "project_id": ("projects", "idx_prompt_usage_project_created"),
+    "api_key_id": ("api_keys", "idx_prompt_usage_api_key_created"),
+}
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    for column, (target, _) in _REFERENCES.items():
+        op.add_column("prompt_usage", sa.Column(column, sa.Uuid(), nullable=True))
+        if postgres:
+            op.create_foreign_key(
+                f"fk_prompt_usage_{column}",
+                "prompt_usage",
+                target,
+                [column],
+                ["id"],
+                ondelete="SET NULL",
+            )
+
+    op.execute(
+        """
+        UPDATE prompt_usage SET prompt_version_id = (
+            SELECT v.id
+            FROM prompt_versions v JOIN prompts p ON p.id = v.prompt_id
+            WHERE p.name = prompt_usage.prompt_name AND v.version = prompt_usage.prompt_version
+        )
+        """
+    )
+
+    if postgres:
+        # prompt_usage is partitioned (migration 013); each statement applies to
+        # every partition. The key stays (id, created_at) as partitioning requires.
+        op.execute("ALTER TABLE prompt_usage DROP CONSTRAINT prompt_usage_pkey")
+        op.execute("ALTER TABLE prompt_usage DROP COLUMN id")
+        op.execute("ALTER TABLE prompt_usage ADD COLUMN id bigserial")
+        op.execute("ALTER TABLE prompt_usage ADD PRIMARY KEY (id, created_at)")
+        op.execute("ALTER TABLE prompt_usage ALTER COLUMN status_code TYPE smallint")
+        op.execute("ALTER TABLE prompt_usage DROP COLUMN prompt_version")
+    else:
+        with op.batch_alter_table("prompt_usage", recreate="always") as batch:
+            batch.drop_column("prompt_version")
+            batch.drop_column("id")
+            batch.add_column(
+                sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True)
+            )
+            batch.alter_column("status_code", type_=sa.SmallInteger())
+
+    for column, (_, index) in _REFERENCES.items():
+        op.create_index(index, "prompt_usage", [column, "created_at"])
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    for column, (_, index) in _REFERENCES.items():
+        op.drop_index(index, table_name="prompt_usage")
+
+    op.add_column("prompt_usage", sa.Column("prompt_version", sa.String(50), nullable=True))
+    op.execute(
+        """
+        UPDATE prompt_usage SET prompt_version = coalesce((
+            SELECT v.version FROM prompt_versions v WHERE v.id = prompt_usage.prompt_version_id
+        ), '')
+        """
+    )
+
+    if postgres:
+        op.execute("ALTER TABLE prompt_usage ALTER COLUMN prompt_version SET NOT NULL")
+        op.execute("ALTER TABLE prompt_usage ALTER COLUMN status_code TYPE integer")
+        op.execute("ALTER TABLE prompt_usage DROP CONSTRAINT prompt_usage_pkey")
+        op.execute("ALTER TABLE prompt_usage DROP COLUMN id")
+        op.execute(
+            "ALTER TABLE prompt_usage ADD COLUMN id uuid NOT NULL DEFAULT gen_random_uuid()"
+        )
+        op.execute("ALTER TABLE prompt_usage ALTER COLUMN id DROP DEFAULT")
+        op.execute("ALTER TABLE prompt_usage ADD PRIMARY KEY (id, created_at)")
+        for column in _REFERENCES:
+            op.drop_constraint(f"fk_prompt_usage_{column}", "prompt_usage", type_="foreignkey")
+            op.drop_column("prompt_usage", column)
+    else:
+        with op.batch_alter_table("prompt_usage", recreate="always") as batch:
+            batch.alter_column("prompt_version", nullable=False)
+            batch.alter_column("status_code", type_=sa.Integer())
+            for column in _REFERENCES:
+                batch.drop_column(column)
@@ -0,0 +1,45 @@
+"""Restore the prompt_name index on partitioned prompt_usage.
+
+Migration 013 dropped idx_prompt_usage_prompt_name with the unpartitioned
+table and never recreated it, leaving name lookups on Postgres to scan every
+partition. It is recreated on the partitioned table (which builds it on each
+partition), and the BRIN index on created_at takes the name the model and the
+other databases use.
+
+Other databases keep the single table and both indexes from migration 001.
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "016"
+down_revision: Union[str, None] = "015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_prompt_usage_prompt_name ON prompt_usage (prompt_name)"
+    )
+    op.execute(
+        "ALTER INDEX idx_prompt_usage_created_at_brin RENAME TO idx_prompt_usage_created_at"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(
+        "ALTER INDEX idx_prompt_usage_created_at RENAME TO idx_prompt_usage_created_at_brin"
+    )
+    op.execute("DROP INDEX IF EXISTS idx_prompt_usage_prompt_name")
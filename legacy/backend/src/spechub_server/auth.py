@@ -19,7 +19,8 @@ async def get_current_user(
     Supports two auth modes:
       1. JWT: Authorization: Bearer <jwt_token>
       2. API Key: Authorization: Bearer sh_<key>
-    Returns the User or raises 401.
+    Returns the User or raises 401. With an API key, its id is left in
+    ``request.state.api_key_id``.
     """
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -35,6 +36,7 @@ async def get_current_user(
         user = await auth_service.get_user_by_id(db, api_key.user_id)
         if not user or not user.is_active:
             raise HTTPException(status_code=401, detail="User not found or inactive")
+        request.state.api_key_id = api_key.id
         return user
 
     # JWT path
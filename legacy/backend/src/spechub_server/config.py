@@ -21,7 +21,32 @@ class Settings(BaseSettings):
     jwt_expiry_hours: int = 24
     invitation_expiry_hours: int = 72
     log_level: str = "info"
+    api_key_touch_seconds: float = 60.0  # an API key's last_used_at is rewritten at most this often
     allowed_hosts: str = ""  # comma-separated list of allowed MCP Host headers (empty = local only)
+    mcp_registry_poll_seconds: float = 5.0  # how often MCP list_changed checks the registry
+    workflow_max_parallel: int = 4  # steps of one workflow run expanded concurrently
+    workflow_step_cache_size: int = 1024  # memoized step results kept per process (0 disables)
+    workflow_step_cache_chars: int = 16_000_000  # total rendered text those results may hold
+    workflow_map_max_items: int = 1000  # elements one map step may fan out over
+    workflow_map_batch_size: int = 100  # map elements rendered per worker-thread call
+    workflow_run_workers: int = 2  # in-process workers executing asynchronous workflow runs
+    workflow_run_lease_seconds: float = 60.0  # a run whose lease lapses is claimed again
+    workflow_run_poll_seconds: float = 2.0  # idle workers re-check the queue this often
+    usage_buffer_size: int = 10000  # usage rows buffered in memory before overflow applies
+    usage_flush_rows: int = 500  # buffered usage rows that trigger a bulk write
+    usage_flush_ms: float = 1000.0  # buffered usage rows are written at least this often
+    usage_overflow: str = "drop_newest"  # when the buffer is full: drop_newest|drop_oldest|block
+    usage_retention_days: int = 0  # raw usage rows older than this are dropped (0 keeps all)
+    usage_partitions_ahead: int = 2  # monthly prompt_usage partitions created in advance (Postgres)
+    usage_maintenance_seconds: float = 3600.0  # how often partitions and retention are maintained
+    usage_export_batch_rows: int = 1000  # rows fetched per server-side cursor round trip on export
+    usage_export_lag_seconds: float = 60.0  # exports end this long before now (rows still buffered)
+    metrics_multiproc_dir: str = ""  # shared dir for per-worker /metrics snapshots (multi-worker)
+    metrics_flush_seconds: float = 5.0  # how often each worker writes its /metrics snapshot
+    metrics_snapshot_ttl_seconds: float = 3600.0  # snapshots not rewritten this long are deleted
+    metrics_dashboard_cache_seconds: float = 5.0  # how long dashboard stats are reused
+    db_query_budget: int = 50  # requests running more SQL statements are logged (0 disables)
+    db_repeat_threshold: int = 10  # a statement repeated this often in a request is logged as N+1
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
@@ -2,10 +2,32 @@ from collections.abc import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from src.skillcanon_server import telemetry
 from src.skillcanon_server.config import settings
 
 engine = create_async_engine(settings.database_url, echo=False)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+telemetry.instrument_engine(engine)
+
+
+def _pool_state() -> dict:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "size": pool.size(),
+    }
+
+
+telemetry.Gauge(
+    "skillcanon_db_pool_connections",
+    "Connections in the database pool by state",
+    ("state",),
+    callback=_pool_state,
+)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -1,11 +1,15 @@
+import asyncio
 import contextlib
 import logging
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 import src.skillcanon_server.mcp.tools as _mcp_tools  # noqa: F401 — registers @mcp.tool() decorators
+from src.skillcanon_server import telemetry
 from src.skillcanon_server.config import settings
+from src.skillcanon_server.database import async_session
+from src.skillcanon_server.mcp.prompts import watch_registry
 from src.skillcanon_server.mcp.server import mcp
 from src.skillcanon_server.mcp.session import ApiKeyMiddleware
 from src.skillcanon_server.routers.apikeys import router as apikeys_router
@@ -18,6 +22,8 @@ from src.skillcanon_server.routers.prompts import router as prompts_router
 from src.skillcanon_server.routers.teams import router as teams_router
 from src.skillcanon_server.routers.users import router as users_router
 from src.skillcanon_server.routers.workflows import router as workflows_router
+from src.skillcanon_server.services.run_service import worker_pool
+from src.skillcanon_server.services.usage_service import run_maintenance, usage_recorder
 
 logging.basicConfig(level=getattr(logging, settings.log_level.upper(), logging.INFO))
 logger = logging.getLogger("skillcanon")
@@ -33,7 +39,28 @@ async def lifespan(app: FastAPI):
             "anyone with this public default can forge valid auth tokens."
         )
     async with mcp.session_manager.run():
-        yield
+        watcher = asyncio.create_task(watch_registry(settings.mcp_registry_poll_seconds))
+        worker_pool.start(async_session)
+        usage_recorder.start(async_session)
+        maintenance = asyncio.create_task(
+            run_maintenance(async_session, settings.usage_maintenance_seconds)
+        )
+        snapshots = None
+        if settings.metrics_multiproc_dir:
+            snapshots = asyncio.create_task(
+                telemetry.flush_snapshots(
+                    settings.metrics_multiproc_dir, settings.metrics_flush_seconds
+                )
+            )
+        try:
+            yield
+        finally:
+            watcher.cancel()
+            maintenance.cancel()
+            if snapshots:
+                snapshots.cancel()
+            await worker_pool.stop()
+            await usage_recorder.stop()
     logger.info("SkillCanon server shutting down")
 
 
@@ -44,6 +71,7 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(telemetry.MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -68,3 +96,8 @@ app.mount("/mcp", ApiKeyMiddleware(mcp.streamable_http_app()))
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(telemetry.render_metrics(), media_type=telemetry.CONTENT_TYPE)
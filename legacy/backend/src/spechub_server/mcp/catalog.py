@@ -0,0 +1,149 @@
+"""
+Per-session prompt and workflow catalog for MCP discovery tools.
+
+A ``CatalogSnapshot`` is an immutable, ACL-filtered view of the registry taken
+at one registry revision (see ``services/registry_service.py``). ``sh-list``,
+``sh-run``, ``sh-workflow-list`` and the native MCP prompt and resource
+listings (prompts.py) serve from it instead of re-querying; the
+snapshot is only ever an optimization and is rebuilt from the database whenever
+the revision moves.
+"""
+
+import uuid
+from typing import NamedTuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.skillcanon_server.models import Prompt, PromptVersion, Workflow, WorkflowShare
+from src.skillcanon_server.services import prompt_service
+
+
+class PromptEntry(NamedTuple):
+    prompt_id: uuid.UUID
+    name: str
+    description: str | None
+    tags: tuple[str, ...]
+    # Version sh-run expands: the pinned version, else the newest one.
+    version_id: uuid.UUID | None
+    # (name, description, required) per input_schema property of that version.
+    arguments: tuple[tuple[str, str | None, bool], ...] = ()
+
+
+class WorkflowEntry(NamedTuple):
+    workflow_id: uuid.UUID
+    name: str
+    description: str | None
+    step_count: int
+
+
+class CatalogSnapshot:
+    """Prompts and workflows visible to one user at one registry revision."""
+
+    __slots__ = ("revision", "prompts", "workflows", "_by_name", "accessible")
+
+    def __init__(
+        self,
+        revision: int,
+        prompts: tuple[PromptEntry, ...],
+        workflows: tuple[WorkflowEntry, ...],
+        accessible: frozenset[str],
+    ) -> None:
+        self.revision = revision
+        self.prompts = prompts
+        self.workflows = workflows
+        # Every accessible prompt name, deprecated ones included, for sh-run's ACL check.
+        self.accessible = accessible
+        self._by_name = {entry.name: entry for entry in prompts}
+
+    def prompt(self, name: str) -> PromptEntry | None:
+        return self._by_name.get(name)
+
+
+def _schema_arguments(schema: dict | None) -> tuple[tuple[str, str | None, bool], ...]:
+    properties = (schema or {}).get("properties") or {}
+    required = set((schema or {}).get("required") or ())
+    return tuple(
+        (name, (spec or {}).get("description"), name in required)
+        for name, spec in properties.items()
+    )
+
+
+async def build_catalog(
+    db: AsyncSession, user_id: uuid.UUID | None, revision: int
+) -> CatalogSnapshot:
+    """Load the catalog visible to ``user_id`` (everything when anonymous)."""
+    newest = (
+        select(
+            PromptVersion.prompt_id,
+            PromptVersion.id,
+            PromptVersion.tags,
+            PromptVersion.input_schema,
+            func.row_number()
+            .over(partition_by=PromptVersion.prompt_id, order_by=PromptVersion.created_at.desc())
+            .label("rank"),
+        )
+        .subquery()
+    )
+    pinned = aliased(PromptVersion)
+    prompt_query = (
+        select(
+            Prompt.id,
+            Prompt.name,
+            Prompt.description,
+            Prompt.is_deprecated,
+            Prompt.active_version_id,
+            newest.c.id.label("newest_id"),
+            newest.c.tags,
+            newest.c.input_schema,
+            pinned.input_schema.label("pinned_schema"),
+        )
+        .outerjoin(newest, and_(newest.c.prompt_id == Prompt.id, newest.c.rank == 1))
+        .outerjoin(pinned, pinned.id == Prompt.active_version_id)
+        .order_by(Prompt.name)
+    )
+    workflow_query = select(
+        Workflow.id, Workflow.name, Workflow.description, Workflow.steps
+    ).order_by(Workflow.updated_at.desc())
+    if user_id:
+        prompt_query = prompt_query.where(prompt_service.accessible_filter(user_id))
+        shared_ids = select(WorkflowShare.workflow_id).where(WorkflowShare.user_id == user_id)
+        workflow_query = workflow_query.where(
+            or_(Workflow.user_id == user_id, Workflow.id.in_(shared_ids))
+        )
+
+    prompts = []
+    accessible = set()
+    for row in (await db.execute(prompt_query)).all():
+        accessible.add(row.name)
+        if row.is_deprecated or row.newest_id is None:
+            continue
+        tags = tuple(row.tags or ())
+        prompts.append(
+            PromptEntry(
+                prompt_id=row.id,
+                name=row.name,
+                description=row.description,
+                tags=tags,
+                version_id=row.active_version_id or row.newest_id,
+                arguments=_schema_arguments(
+                    row.pinned_schema if row.active_version_id else row.input_schema
+                ),
+            )
+        )
+    workflows = tuple(
+        WorkflowEntry(
+            workflow_id=row.id,
+            name=row.name,
+            description=row.description,
+            step_count=len(row.steps or ()),
+        )
+        for row in (await db.execute(workflow_query)).all()
+    )
+    return CatalogSnapshot(
+        revision=revision,
+        prompts=tuple(prompts),
+        workflows=workflows,
+        accessible=frozenset(accessible),
+    )
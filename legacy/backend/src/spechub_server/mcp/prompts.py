@@ -0,0 +1,204 @@
+"""
+Native MCP prompts and resources for SkillCanon registry prompts.
+
+  - `prompts/list`, `resources/list` — paginated, served from the session catalog
+  - `prompts/get`                    — renders through the same governance path as `sh-run`
+  - `resources/read`                 — a prompt's active version as JSON
+
+``SkillCanonMCP`` in server.py routes those requests here.
+
+``watch_registry`` polls the registry revision and sends
+``notifications/prompts/list_changed`` and ``notifications/resources/list_changed``
+to every live session on this worker when it moves, so clients can cache the
+lists and refetch only when told to.
+"""
+
+import asyncio
+import json
+import logging
+
+from mcp import types
+from mcp.server.fastmcp import Context
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.shared.exceptions import McpError
+from pydantic import AnyUrl
+
+from src.skillcanon_server.database import async_session
+from src.skillcanon_server.mcp.catalog import PromptEntry
+from src.skillcanon_server.mcp.session import session_manager
+from src.skillcanon_server.mcp.tools import _expand, _tool_call
+from src.skillcanon_server.schemas import ExpandRequest
+from src.skillcanon_server.services import prompt_service, registry_service
+
+logger = logging.getLogger("skillcanon.mcp.prompts")
+
+PAGE_SIZE = 200
+RESOURCE_PREFIX = "skillcanon://prompts/"
+
+
+def _invalid(message: str) -> McpError:
+    return McpError(types.ErrorData(code=types.INVALID_PARAMS, message=message))
+
+
+def _page(entries: tuple[PromptEntry, ...], cursor: str | None) -> tuple[tuple, str | None]:
+    """Slice one page of entries; the cursor is the offset of the next page."""
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise _invalid(f"Invalid cursor: {cursor}") from None
+    if offset < 0:
+        raise _invalid(f"Invalid cursor: {cursor}")
+    end = offset + PAGE_SIZE
+    return entries[offset:end], (str(end) if end < len(entries) else None)
+
+
+def _prompt(entry: PromptEntry) -> types.Prompt:
+    return types.Prompt(
+        name=entry.name,
+        description=entry.description,
+        arguments=[
+            types.PromptArgument(name=name, description=description, required=required)
+            for name, description, required in entry.arguments
+        ],
+    )
+
+
+def _resource(entry: PromptEntry) -> types.Resource:
+    return types.Resource(
+        uri=AnyUrl(RESOURCE_PREFIX + entry.name),
+        name=entry.name,
+        description=entry.description,
+        mimeType="application/json",
+    )
+
+
+async def list_registry_prompts(ctx: Context, cursor: str | None = None) -> types.ListPromptsResult:
+    async with _tool_call(ctx, inject_context=False) as call:
+        snapshot = await call.fresh_catalog()
+    entries, next_cursor = _page(snapshot.prompts, cursor)
+    return types.ListPromptsResult(prompts=[_prompt(e) for e in entries], nextCursor=next_cursor)
+
+
+async def get_registry_prompt(
+    ctx: Context, name: str, arguments: dict[str, str] | None = None
+) -> types.GetPromptResult:
+    async with _tool_call(ctx, inject_context=False) as call:
+        if not await call.can_access(name):
+            raise _invalid(f"Unknown prompt: {name}")
+        result = await _expand(call, name, ExpandRequest(input=dict(arguments or {})))
+        snapshot = await call.current_catalog()
+    if not result:
+        raise _invalid(f"Unknown prompt: {name}")
+
+    entry = snapshot.prompt(name) if snapshot else None
+    messages = []
+    if result.system_message:
+        messages.append(
+            types.PromptMessage(
+                role="user", content=types.TextContent(type="text", text=result.system_message)
+            )
+        )
+    messages.append(
+        types.PromptMessage(
+            role="user", content=types.TextContent(type="text", text=result.user_message)
+        )
+    )
+    return types.GetPromptResult(
+        description=entry.description if entry else None, messages=messages
+    )
+
+
+async def list_registry_resources(
+    ctx: Context, cursor: str | None = None
+) -> types.ListResourcesResult:
+    async with _tool_call(ctx, inject_context=False) as call:
+        snapshot = await call.fresh_catalog()
+    entries, next_cursor = _page(snapshot.prompts, cursor)
+    return types.ListResourcesResult(
+        resources=[_resource(e) for e in entries], nextCursor=next_cursor
+    )
+
+
+async def read_registry_resource(ctx: Context, uri: str) -> list[ReadResourceContents]:
+    if not uri.startswith(RESOURCE_PREFIX):
+        raise _invalid(f"Unknown resource: {uri}")
+    name = uri[len(RESOURCE_PREFIX):]
+    async with _tool_call(ctx, inject_context=False) as call:
+        if not await call.can_access(name):
+            raise _invalid(f"Unknown resource: {uri}")
+        snapshot = await call.current_catalog()
+        entry = snapshot.prompt(name) if snapshot else None
+        version = await prompt_service.resolve_version(
+            call.db, name, version_id=entry.version_id if entry else None
+        )
+        if not version:
+            raise _invalid(f"Unknown resource: {uri}")
+        document = {
+            "name": name,
+            "description": entry.description if entry else None,
+            "version": version.version,
+            "tags": version.tags or [],
+            "input_schema": version.input_schema,
+            "system_template": version.system_template,
+            "user_template": version.user_template,
+        }
+    return [ReadResourceContents(content=json.dumps(document), mime_type="application/json")]
+
+
+def resource_templates() -> list[types.ResourceTemplate]:
+    return [
+        types.ResourceTemplate(
+            uriTemplate=RESOURCE_PREFIX + "{name}",
+            name="prompt",
+            description="A registry prompt's active version",
+            mimeType="application/json",
+        )
+    ]
+
+
+# ---------------------------------------------------------------------------
+# list_changed notifications
+# ---------------------------------------------------------------------------
+
+async def notify_list_changed() -> int:
+    """Tell every live session on this worker that prompts and resources changed.
+
+    Sessions that have gone away (or whose transport is closed) are dropped.
+    Returns the number of sessions notified.
+    """
+    notified = 0
+    for key, state in session_manager.items():
+        session = state.session
+        if session is None:
+            session_manager.remove(key)
+            continue
+        try:
+            await session.send_prompt_list_changed()
+            await session.send_resource_list_changed()
+        except Exception:
+            logger.debug("Dropping MCP session %s: notification failed", key, exc_info=True)
+            session_manager.remove(key)
+            continue
+        notified += 1
+    return notified
+
+
+async def watch_registry(interval: float) -> None:
+    """Poll the registry revision for the app's lifetime and notify sessions when it moves.
+
+    The revision lives in the database, so changes made through any worker are
+    picked up; each worker notifies the sessions it holds.
+    """
+    last: int | None = None
+    while True:
+        try:
+            async with async_session() as db:
+                revision = await registry_service.current(db)
+        except Exception:
+            logger.warning("Registry revision poll failed", exc_info=True)
+        else:
+            if last is not None and revision != last:
+                notified = await notify_list_changed()
+                logger.debug("Registry revision %s: notified %d session(s)", revision, notified)
+            last = revision
+        await asyncio.sleep(interval)
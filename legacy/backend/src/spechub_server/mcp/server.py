@@ -1,6 +1,11 @@
+import time
+
+from mcp import types
 from mcp.server.fastmcp import FastMCP
+from mcp.server.lowlevel import NotificationOptions, Server
 from mcp.server.transport_security import TransportSecuritySettings
 
+from src.skillcanon_server import telemetry
 from src.skillcanon_server.config import settings
 
 _allowed = [h.strip() for h in settings.allowed_hosts.split(",") if h.strip()]
@@ -14,7 +19,86 @@ else:
         enable_dns_rebinding_protection=False,
     )
 
-mcp = FastMCP(
+class _RegistryServer(Server):
+    """Low-level server advertising the list_changed notifications we send.
+
+    FastMCP's transports build initialization options with default notification
+    options, which advertise listChanged=False. The registry watcher in
+    prompts.py does send prompts/resources list_changed.
+    """
+
+    def create_initialization_options(
+        self,
+        notification_options: NotificationOptions | None = None,
+        experimental_capabilities: dict | None = None,
+    ):
+        if notification_options is None:
+            notification_options = NotificationOptions(prompts_changed=True, resources_changed=True)
+        return super().create_initialization_options(
+            notification_options, experimental_capabilities
+        )
+
+
+class SkillCanonMCP(FastMCP):
+    """FastMCP serving registry prompts and resources, with timed tool calls.
+
+    FastMCP registers its public ``call_tool``/``list_prompts``/... methods as
+    the protocol handlers, so overriding them here replaces its (empty) prompt
+    and resource managers with the registry handlers in prompts.py.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # FastMCP has no option for the low-level server's notification
+        # options; _RegistryServer only overrides a method, so retype it.
+        self._mcp_server.__class__ = _RegistryServer
+
+    async def call_tool(self, name: str, arguments: dict):
+        """Time every tool call by tool name."""
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await super().call_tool(name, arguments)
+            status = "ok"
+            return result
+        finally:
+            telemetry.mcp_tool_duration.observe(
+                time.perf_counter() - started, tool=name, status=status
+            )
+
+    async def list_prompts(self, request: types.ListPromptsRequest) -> types.ListPromptsResult:
+        from src.skillcanon_server.mcp import prompts
+
+        cursor = request.params.cursor if request.params else None
+        return await prompts.list_registry_prompts(self.get_context(), cursor)
+
+    async def get_prompt(
+        self, name: str, arguments: dict[str, str] | None = None
+    ) -> types.GetPromptResult:
+        from src.skillcanon_server.mcp import prompts
+
+        return await prompts.get_registry_prompt(self.get_context(), name, arguments)
+
+    async def list_resources(
+        self, request: types.ListResourcesRequest
+    ) -> types.ListResourcesResult:
+        from src.skillcanon_server.mcp import prompts
+
+        cursor = request.params.cursor if request.params else None
+        return await prompts.list_registry_resources(self.get_context(), cursor)
+
+    async def list_resource_templates(self) -> list[types.ResourceTemplate]:
+        from src.skillcanon_server.mcp import prompts
+
+        return prompts.resource_templates()
+
+    async def read_resource(self, uri):
+        from src.skillcanon_server.mcp import prompts
+
+        return await prompts.read_registry_resource(self.get_context(), str(uri))
+
+
+mcp = SkillCanonMCP(
     "SkillCanon",
     instructions=(
         "SkillCanon is a prompt registry. Use sh-list to see available prompts, "
@@ -22,6 +106,8 @@ mcp = FastMCP(
         "a specific prompt with your input (e.g. sh-run name='commit' input='...'). "
         "Use sh-workflow-list to see available workflows and sh-workflow-run to "
         "execute a multi-step prompt pipeline by name. "
+        "Registry prompts are also exposed as native MCP prompts and resources; "
+        "the server sends list_changed notifications when they change. "
         "When you authenticate with an API key, your team's policies and "
         "objectives are automatically injected into the first tool response "
         "of each session — no need to fetch them separately."
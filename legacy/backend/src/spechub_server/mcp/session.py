@@ -6,14 +6,22 @@ first tool response per session. Uses a contextvars-based approach to
 pass the API key from the HTTP layer into MCP tool functions.
 """
 
+import asyncio
 import contextvars
 import logging
 import uuid
+import weakref
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
 from starlette.types import ASGIApp, Receive, Scope, Send
 
+from src.skillcanon_server import telemetry
+
+if TYPE_CHECKING:
+    from src.skillcanon_server.mcp.catalog import CatalogSnapshot
+
 logger = logging.getLogger("skillcanon.mcp.session")
 
 # ContextVar set by the ASGI middleware, read by tool functions.
@@ -34,6 +42,39 @@ class SessionState:
     user_id: uuid.UUID | None = None
     context_delivered: bool = False
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # Prompt name -> allowed, valid only while acl_revision matches the registry's.
+    acl: dict[str, bool] = field(default_factory=dict)
+    acl_revision: int = -1
+    # Discovery catalog (see catalog.py) and its in-flight background rebuild, if any.
+    catalog: "CatalogSnapshot | None" = None
+    catalog_refresh: "asyncio.Task | None" = None
+    # The MCP ServerSession, for server-initiated notifications (see prompts.py).
+    session_ref: "weakref.ref | None" = None
+
+    def attach(self, session: object) -> None:
+        if self.session_ref is None or self.session_ref() is not session:
+            self.session_ref = weakref.ref(session)
+
+    @property
+    def session(self) -> object | None:
+        return self.session_ref() if self.session_ref is not None else None
+
+    def cached_access(self, name: str, revision: int) -> bool | None:
+        """Return the cached access decision for a prompt, or None on a miss."""
+        if self.acl_revision != revision:
+            self.acl.clear()
+            self.acl_revision = revision
+            telemetry.cache_lookup("mcp_acl", False)
+            return None
+        allowed = self.acl.get(name)
+        telemetry.cache_lookup("mcp_acl", allowed is not None)
+        return allowed
+
+    def remember_access(self, name: str, allowed: bool, revision: int) -> None:
+        if self.acl_revision != revision:
+            self.acl.clear()
+            self.acl_revision = revision
+        self.acl[name] = allowed
 
 
 class SessionManager:
@@ -50,6 +91,9 @@ class SessionManager:
     def remove(self, session_key: int) -> None:
         self._sessions.pop(session_key, None)
 
+    def items(self) -> list[tuple[int, SessionState]]:
+        return list(self._sessions.items())
+
     def cleanup_stale(self, max_age_hours: int = 24) -> int:
         """Remove sessions older than max_age_hours. Returns count removed."""
         now = datetime.now(timezone.utc)
@@ -70,6 +114,12 @@ class SessionManager:
 # Singleton used by tools.py
 session_manager = SessionManager()
 
+telemetry.Gauge(
+    "skillcanon_mcp_active_sessions",
+    "MCP sessions with live state on this worker",
+    callback=lambda: session_manager.active_count,
+)
+
 
 class ApiKeyMiddleware:
     """ASGI middleware that extracts the Authorization header and stores
@@ -6,33 +6,209 @@ All tools are statically registered:
   - `sh-search`  — search prompts by name/tag
   - `sh-context` — show effective policies & objectives
   - `sh-run`     — expand any prompt by name
+  - `sh-run-many` — expand several prompts in one call
+  - `sh-workflow-list`, `sh-workflow-run`, `sh-workflow-status` — run workflows,
+    inline or queued for the run workers (see services/run_service.py)
+
+Every tool runs inside ``_tool_call``: one DB session per invocation, the API
+key validated at most once per MCP session, and governance resolved once and
+reused by whatever the tool renders. Listing is served from the session's
+catalog snapshot (see catalog.py), revalidated against the registry revision
+on every call and rebuilt in the background when it moves; ``sh-search`` goes
+through ``search_service`` like the prompts API, so both rank and filter alike.
 """
 
+import asyncio
+import contextlib
 import json
 import logging
 import uuid as uuid_mod
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 
+from jinja2 import TemplateError
 from mcp.server.fastmcp import Context
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.skillcanon_server import telemetry
 from src.skillcanon_server.database import async_session
+from src.skillcanon_server.mcp.catalog import CatalogSnapshot, build_catalog
 from src.skillcanon_server.mcp.server import mcp
-from src.skillcanon_server.mcp.session import get_current_api_key, session_manager
-from src.skillcanon_server.schemas import ExpandRequest
+from src.skillcanon_server.mcp.session import (
+    SessionState,
+    get_current_api_key,
+    session_manager,
+)
+from src.skillcanon_server.models import Prompt
+from src.skillcanon_server.schemas import (
+    EffectiveObjectivesResponse,
+    EffectivePoliciesResponse,
+    ExpandRequest,
+    ExpandResponse,
+    PolicyResponse,
+    PromptRunItem,
+    WorkflowRunRequest,
+    WorkflowStepResult,
+)
 from src.skillcanon_server.services import (
     apikey_service,
     objective_service,
     policy_service,
     prompt_service,
+    registry_service,
+    run_service,
+    search_service,
     workflow_service,
 )
 
 logger = logging.getLogger("skillcanon.mcp.tools")
 
+_SEARCH_LIMIT = 25
+_RUN_MANY_LIMIT = 20
+
+
+@dataclass
+class _Governance:
+    """Effective policies and objectives for one (user, project) pair."""
+
+    policies: EffectivePoliciesResponse
+    objectives: EffectiveObjectivesResponse
+
+    @property
+    def all_policies(self) -> list[PolicyResponse]:
+        return policy_service.flatten_policies(self.policies)
+
+    @property
+    def objective_titles(self) -> list[str]:
+        return objective_service.flatten_objectives(self.objectives)
+
+
+@dataclass
+class _ToolCall:
+    """Per-invocation state shared by every ``sh-*`` tool.
+
+    Holds the single DB session used for the whole call, the authenticated
+    user, and any governance resolved so far, so a tool never has to open a
+    second session or re-validate the API key.
+    """
+
+    db: AsyncSession
+    state: SessionState
+    user_id: uuid_mod.UUID | None = None
+    context_block: str | None = None
+    needs_commit: bool = False
+    _governance: dict[tuple, _Governance] = field(default_factory=dict)
+    _revision: int | None = None
+
+    async def governance(
+        self, user_id: uuid_mod.UUID, project_id: uuid_mod.UUID | None = None
+    ) -> _Governance:
+        """Resolve effective governance once per (user, project) for this call."""
+        key = (user_id, project_id)
+        if key not in self._governance:
+            self._governance[key] = _Governance(
+                policies=await policy_service.resolve_effective(self.db, user_id, project_id),
+                objectives=await objective_service.resolve_effective(
+                    self.db, user_id, project_id
+                ),
+            )
+        return self._governance[key]
+
+    async def owner_governance(
+        self, prompt_id: uuid_mod.UUID, project_id: uuid_mod.UUID | None = None
+    ) -> _Governance | None:
+        """Governance of the prompt's owner, which is what a prompt renders under.
+
+        None for prompts without an owner (rendered without governance).
+        """
+        prompt = await self.db.get(Prompt, prompt_id)
+        if not prompt or not prompt.user_id:
+            return None
+        return await self.governance(prompt.user_id, project_id)
+
+    async def revision(self) -> int:
+        """Registry revision, read once per call."""
+        if self._revision is None:
+            self._revision = await registry_service.current(self.db)
+        return self._revision
+
+    async def catalog(self) -> CatalogSnapshot:
+        """The session's catalog snapshot.
+
+        Built synchronously on first use. When the registry has moved on, the
+        stale snapshot is still served for listing and a rebuild is scheduled
+        in the background; callers that need an up-to-date answer use
+        ``current_catalog`` instead.
+        """
+        snapshot = self.state.catalog
+        telemetry.cache_lookup("mcp_catalog", snapshot is not None)
+        if snapshot is None:
+            snapshot = await build_catalog(self.db, self.user_id, await self.revision())
+            self.state.catalog = snapshot
+        elif snapshot.revision != await self.revision():
+            _schedule_catalog_refresh(self.state, self.user_id)
+        return snapshot
+
+    async def fresh_catalog(self) -> CatalogSnapshot:
+        """A snapshot at the current registry revision, rebuilt inline if stale."""
+        revision = await self.revision()
+        snapshot = self.state.catalog
+        if snapshot is None or snapshot.revision != revision:
+            snapshot = await build_catalog(self.db, self.user_id, revision)
+            self.state.catalog = snapshot
+        return snapshot
+
+    async def current_catalog(self) -> CatalogSnapshot | None:
+        """The snapshot if it matches the registry revision, else None."""
+        snapshot = await self.catalog()
+        if snapshot.revision != await self.revision():
+            return None
+        return snapshot
+
+    async def can_access(self, name: str) -> bool:
+        """Owner-or-shared check for the caller.
+
+        Answered from a current catalog snapshot when there is one, otherwise
+        from the session ACL cache, falling back to the database.
+        """
+        if not self.user_id:
+            return True
+        snapshot = await self.current_catalog()
+        if snapshot is not None:
+            return name in snapshot.accessible
+        revision = await self.revision()
+        allowed = self.state.cached_access(name, revision)
+        if allowed is None:
+            allowed = await prompt_service.can_access_prompt(self.db, self.user_id, name)
+            self.state.remember_access(name, allowed, revision)
+        return allowed
+
+    async def accessible(self, names: set[str]) -> set[str]:
+        """Bulk ``can_access``: the subset of ``names`` the caller may run."""
+        if not self.user_id:
+            return set(names)
+        snapshot = await self.current_catalog()
+        if snapshot is not None:
+            return names & snapshot.accessible
+        revision = await self.revision()
+        decisions = {name: self.state.cached_access(name, revision) for name in names}
+        unknown = {name for name, allowed in decisions.items() if allowed is None}
+        if unknown:
+            allowed = await prompt_service.accessible_prompt_names(self.db, self.user_id, unknown)
+            for name in unknown:
+                decisions[name] = name in allowed
+                self.state.remember_access(name, name in allowed, revision)
+        return {name for name, allowed in decisions.items() if allowed}
+
+    def respond(self, result: str) -> str:
+        if self.context_block:
+            return self.context_block + "\n\n" + result
+        return result
 
-async def _resolve_session_user_id(ctx: Context) -> "uuid_mod.UUID | None":
+
+async def _authenticate(call: _ToolCall) -> "uuid_mod.UUID | None":
     """Return the user_id for the current MCP session, resolving from API key if needed."""
-    session_key = id(ctx.session)
-    state = session_manager.get_or_create(session_key)
+    state = call.state
     if state.user_id:
         logger.debug("Resolved user_id from session cache: %s", state.user_id)
         return state.user_id
@@ -43,46 +219,40 @@ async def _resolve_session_user_id(ctx: Context) -> "uuid_mod.UUID | None":
         return None
 
     logger.debug("Resolving user_id from API key prefix: %s", api_key_raw[:12])
-    async with async_session() as db:
-        api_key = await apikey_service.validate_key(db, api_key_raw)
-        if api_key:
-            state.user_id = api_key.user_id
-            logger.debug("Resolved user_id: %s", api_key.user_id)
-            return api_key.user_id
+    api_key = await apikey_service.validate_key(call.db, api_key_raw, commit=False)
+    if api_key:
+        call.needs_commit = True
+        state.user_id = api_key.user_id
+        logger.debug("Resolved user_id: %s", api_key.user_id)
+        return api_key.user_id
     logger.warning("API key validation failed for prefix: %s", api_key_raw[:12])
     return None
 
 
-async def _maybe_inject_session_context(ctx: Context) -> str | None:
-    """Resolve user from API key and return context block on first call per session.
+def _schedule_catalog_refresh(state: SessionState, user_id: uuid_mod.UUID | None) -> None:
+    """Rebuild ``state.catalog`` on its own DB session, at most one rebuild at a time."""
+    if state.catalog_refresh is not None and not state.catalog_refresh.done():
+        return
 
-    Returns the formatted context string to prepend, or None if context was
-    already delivered or no user could be resolved.
-    """
-    session_key = id(ctx.session)
-    state = session_manager.get_or_create(session_key)
+    async def refresh() -> None:
+        async with async_session() as db:
+            revision = await registry_service.current(db)
+            snapshot = await build_catalog(db, user_id, revision)
+            if state.catalog is None or state.catalog.revision <= revision:
+                state.catalog = snapshot
 
-    if state.context_delivered:
-        return None
+    def log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Catalog refresh failed: %s", task.exception())
 
-    # Resolve user from API key
-    api_key_raw = get_current_api_key()
-    if not api_key_raw:
-        logger.debug("No API key in request — skipping session context injection")
-        state.context_delivered = True
-        return None
+    state.catalog_refresh = asyncio.create_task(refresh())
+    state.catalog_refresh.add_done_callback(log_failure)
 
-    async with async_session() as db:
-        api_key = await apikey_service.validate_key(db, api_key_raw)
-        if not api_key:
-            logger.warning("Invalid API key — skipping session context injection")
-            state.context_delivered = True
-            return None
-
-        state.user_id = api_key.user_id
 
-        policies = await policy_service.resolve_effective(db, api_key.user_id)
-        objectives = await objective_service.resolve_effective(db, api_key.user_id)
+def _format_session_context(governance: _Governance) -> str:
+    """Render the context block prepended to the first tool response per session."""
+    policies = governance.policies
+    objectives = governance.objectives
 
     lines = ["═══ SESSION CONTEXT (auto-injected) ═══", ""]
 
@@ -110,28 +280,55 @@ async def _maybe_inject_session_context(ctx: Context) -> str | None:
 
     lines.append("")
     lines.append("═══════════════════════════════════════")
-
-    state.context_delivered = True
     return "\n".join(lines)
 
 
+@contextlib.asynccontextmanager
+async def _tool_call(ctx: Context, inject_context: bool = True) -> AsyncIterator[_ToolCall]:
+    """Open the one DB session a tool call uses, authenticate, and build session context.
+
+    The session context block is produced on the first call per MCP session and
+    only when the API key resolves to a user; handlers whose response has no
+    place for it (native prompt/resource requests) pass ``inject_context=False``
+    and leave it for the first tool call. Pending writes (the API key's
+    ``last_used_at`` bump) are committed once when the tool finishes.
+    """
+    state = session_manager.get_or_create(id(ctx.session))
+    state.attach(ctx.session)
+    async with async_session() as db:
+        call = _ToolCall(db=db, state=state)
+        call.user_id = await _authenticate(call)
+
+        if inject_context and not state.context_delivered:
+            if call.user_id:
+                call.context_block = _format_session_context(
+                    await call.governance(call.user_id)
+                )
+            elif get_current_api_key():
+                logger.warning("Invalid API key — skipping session context injection")
+            else:
+                logger.debug("No API key in request — skipping session context injection")
+            state.context_delivered = True
+
+        yield call
+
+        if call.needs_commit:
+            await db.commit()
+
+
 @mcp.tool(name="sh-list")
 async def sh_list(ctx: Context) -> str:
     """List all available prompts in the SkillCanon registry."""
-    context_block = await _maybe_inject_session_context(ctx)
-    user_id = await _resolve_session_user_id(ctx)
-    async with async_session() as db:
-        listing = await prompt_service.list_prompts(db, page=1, page_size=1000, user_id=user_id)
-    if not listing.items:
-        result = "No prompts registered yet."
-    else:
-        lines = ["Available prompts:"]
-        for p in listing.items:
-            lines.append(f"  - {p.name}")
-        result = "\n".join(lines)
-    if context_block:
-        return context_block + "\n\n" + result
-    return result
+    async with _tool_call(ctx) as call:
+        snapshot = await call.catalog()
+        if not snapshot.prompts:
+            result = "No prompts registered yet."
+        else:
+            lines = ["Available prompts:"]
+            for p in snapshot.prompts:
+                lines.append(f"  - {p.name}")
+            result = "\n".join(lines)
+        return call.respond(result)
 
 
 @mcp.tool(name="sh-search")
@@ -141,30 +338,25 @@ async def sh_search(query: str, ctx: Context) -> str:
     Args:
         query: Search term to match against prompt names, descriptions, and tags.
     """
-    context_block = await _maybe_inject_session_context(ctx)
-    user_id = await _resolve_session_user_id(ctx)
-    async with async_session() as db:
-        listing = await prompt_service.list_prompts(db, page=1, page_size=100, user_id=user_id)
-
-    matches = []
-    q = query.lower()
-    for p in listing.items:
-        name_match = q in p.name.lower()
-        desc_match = p.description and q in p.description.lower()
-        tag_match = p.latest_version and any(q in t.lower() for t in p.latest_version.tags)
-        if name_match or desc_match or tag_match:
-            desc = p.description or "No description"
-            has_tags = p.latest_version and p.latest_version.tags
-            tags = ", ".join(p.latest_version.tags) if has_tags else "none"
-            matches.append(f"  - sh-{p.name}: {desc} [tags: {tags}]")
-
-    if not matches:
-        result = f"No prompts matching '{query}'."
-    else:
-        result = f"Prompts matching '{query}':\n" + "\n".join(matches)
-    if context_block:
-        return context_block + "\n\n" + result
-    return result
+    async with _tool_call(ctx) as call:
+        found = await search_service.search_prompts(
+            call.db, query, page_size=_SEARCH_LIMIT, user_id=call.user_id
+        )
+
+        if not found.items:
+            result = f"No prompts matching '{query}'."
+        else:
+            matches = []
+            for p in found.items:
+                desc = p.description or "No description"
+                tags = ", ".join(p.tags) if p.tags else "none"
+                matches.append(f"  - sh-{p.name}: {desc} [tags: {tags}]")
+            if found.total > len(found.items):
+                matches.append(
+                    f"  ({found.total - len(found.items)} more — refine the query to narrow down)"
+                )
+            result = f"Prompts matching '{query}':\n" + "\n".join(matches)
+        return call.respond(result)
 
 
 @mcp.tool(name="sh-context")
@@ -176,50 +368,95 @@ async def sh_context(ctx: Context, project_id: str | None = None) -> str:
     Args:
         project_id: Optional UUID of the project to layer on top.
     """
-    context_block = await _maybe_inject_session_context(ctx)
-    uid = await _resolve_session_user_id(ctx)
-    if not uid:
-        return "Error: could not resolve user from API key. Ensure a valid Bearer token is set."
+    async with _tool_call(ctx) as call:
+        if not call.user_id:
+            return (
+                "Error: could not resolve user from API key. "
+                "Ensure a valid Bearer token is set."
+            )
 
-    pid = None
-    if project_id:
+        pid = None
+        if project_id:
+            try:
+                pid = uuid_mod.UUID(project_id)
+            except ValueError:
+                return "Error: invalid project_id UUID."
+
+        governance = await call.governance(call.user_id, pid)
+        policies = governance.policies
+        objectives = governance.objectives
+
+        lines = ["=== Effective Policies ==="]
+        if policies.inherited:
+            lines.append("Inherited (immutable):")
+            for p in policies.inherited:
+                lines.append(f"  - [{p.enforcement_type.value}] {p.name}: {p.content[:80]}")
+        if policies.local:
+            lines.append("Local (mutable):")
+            for p in policies.local:
+                lines.append(f"  - [{p.enforcement_type.value}] {p.name}: {p.content[:80]}")
+        if not policies.inherited and not policies.local:
+            lines.append("  (none)")
+
+        lines.append("\n=== Effective Objectives ===")
+        if objectives.inherited:
+            lines.append("Inherited (immutable):")
+            for o in objectives.inherited:
+                lines.append(f"  - {o.title}")
+        if objectives.local:
+            lines.append("Local (mutable):")
+            for o in objectives.local:
+                lines.append(f"  - {o.title}")
+        if not objectives.inherited and not objectives.local:
+            lines.append("  (none)")
+
+        return call.respond("\n".join(lines))
+
+
+def _parse_project(project: str | None) -> uuid_mod.UUID | None:
+    if project:
         try:
-            pid = uuid_mod.UUID(project_id)
+            return uuid_mod.UUID(project)
         except ValueError:
-            return "Error: invalid project_id UUID."
+            pass
+    return None
 
-    async with async_session() as db:
-        policies = await policy_service.resolve_effective(db, uid, pid)
-        objectives = await objective_service.resolve_effective(db, uid, pid)
-
-    lines = ["=== Effective Policies ==="]
-    if policies.inherited:
-        lines.append("Inherited (immutable):")
-        for p in policies.inherited:
-            lines.append(f"  - [{p.enforcement_type.value}] {p.name}: {p.content[:80]}")
-    if policies.local:
-        lines.append("Local (mutable):")
-        for p in policies.local:
-            lines.append(f"  - [{p.enforcement_type.value}] {p.name}: {p.content[:80]}")
-    if not policies.inherited and not policies.local:
-        lines.append("  (none)")
-
-    lines.append("\n=== Effective Objectives ===")
-    if objectives.inherited:
-        lines.append("Inherited (immutable):")
-        for o in objectives.inherited:
-            lines.append(f"  - {o.title}")
-    if objectives.local:
-        lines.append("Local (mutable):")
-        for o in objectives.local:
-            lines.append(f"  - {o.title}")
-    if not objectives.inherited and not objectives.local:
-        lines.append("  (none)")
-
-    result = "\n".join(lines)
-    if context_block:
-        return context_block + "\n\n" + result
-    return result
+
+def _format_expansion(result: ExpandResponse) -> str:
+    parts = []
+    if result.system_message:
+        parts.append(f"[System]\n{result.system_message}")
+    parts.append(f"[User]\n{result.user_message}")
+    if result.applied_policies:
+        parts.append(f"[Policies Applied]\n{', '.join(result.applied_policies)}")
+    return "\n\n".join(parts)
+
+
+def _parse_tool_input(input: str) -> dict:  # noqa: A002
+    try:
+        parsed = json.loads(input)
+        if not isinstance(parsed, dict):
+            parsed = {"input": input}
+    except (json.JSONDecodeError, TypeError):
+        parsed = {"input": input}
+    return parsed
+
+
+async def _expand(call: _ToolCall, name: str, data: ExpandRequest) -> ExpandResponse | None:
+    """Render ``name`` under its owner's governance, as ``POST /expand`` does."""
+    snapshot = await call.current_catalog()
+    entry = snapshot.prompt(name) if snapshot else None
+    governance = None
+    if entry:
+        governance = await call.owner_governance(entry.prompt_id, data.project_id)
+    return await prompt_service.expand_prompt(
+        call.db,
+        name,
+        data,
+        policies=governance.all_policies if governance else None,
+        objectives=governance.objective_titles if governance else None,
+        version_id=entry.version_id if entry else None,
+    )
 
 
 @mcp.tool(name="sh-run")
@@ -231,139 +468,201 @@ async def sh_run(name: str, input: str, ctx: Context, project: str | None = None
         input: The input text or JSON object to pass to the prompt template.
         project: Optional project UUID to scope policy/objective resolution.
     """
-    context_block = await _maybe_inject_session_context(ctx)
-
-    try:
-        parsed = json.loads(input)
-        if not isinstance(parsed, dict):
-            parsed = {"input": input}
-    except (json.JSONDecodeError, TypeError):
-        parsed = {"input": input}
-
-    project_id = None
-    if project:
-        try:
-            project_id = uuid_mod.UUID(project)
-        except ValueError:
-            pass
+    parsed = _parse_tool_input(input)
+    project_id = _parse_project(project)
 
-    # Check user access (owned or shared)
-    user_id = await _resolve_session_user_id(ctx)
-    if user_id:
-        async with async_session() as db:
-            user_prompts = await prompt_service.list_prompts(
-                db, page=1, page_size=1000, user_id=user_id,
-            )
-        accessible_names = {p.name for p in user_prompts.items}
-        if name not in accessible_names:
+    async with _tool_call(ctx) as call:
+        # Check user access (owned or shared)
+        if not await call.can_access(name):
             return f"Error: prompt '{name}' not found or not shared with you."
+        result = await _expand(call, name, ExpandRequest(input=parsed, project_id=project_id))
+        if not result:
+            return f"Error: prompt '{name}' not found."
+        return call.respond(_format_expansion(result))
 
-    async with async_session() as db:
-        result = await prompt_service.expand_prompt(
-            db,
-            name,
-            ExpandRequest(input=parsed, project_id=project_id),
-        )
-    if not result:
-        return f"Error: prompt '{name}' not found."
 
-    parts = []
-    if result.system_message:
-        parts.append(f"[System]\n{result.system_message}")
-    parts.append(f"[User]\n{result.user_message}")
-    if result.applied_policies:
-        parts.append(f"[Policies Applied]\n{', '.join(result.applied_policies)}")
-    tool_result = "\n\n".join(parts)
-    if context_block:
-        return context_block + "\n\n" + tool_result
-    return tool_result
+@mcp.tool(name="sh-run-many")
+async def sh_run_many(items: list[PromptRunItem], ctx: Context) -> str:
+    """Run several prompts in one call. Prefer this over repeated sh-run calls.
+
+    Args:
+        items: Up to 20 prompts to expand, each {"name": ..., "input": ..., "project": ...}
+            with the same meaning as sh-run's arguments. Results come back in order;
+            a failing item reports its error without affecting the others.
+    """
+    if not items:
+        return "Error: no items given."
+    if len(items) > _RUN_MANY_LIMIT:
+        return f"Error: at most {_RUN_MANY_LIMIT} items per call."
+
+    async with _tool_call(ctx) as call:
+        names = {item.name for item in items}
+        allowed = await call.accessible(names)
+        prompt_cache = await prompt_service.prefetch_versions(call.db, allowed)
+
+        sections = []
+        for index, item in enumerate(items, start=1):
+            header = f"=== [{index}] {item.name} ==="
+            if item.name not in allowed:
+                sections.append(
+                    f"{header}\nError: prompt '{item.name}' not found or not shared with you."
+                )
+                continue
+            project_id = _parse_project(item.project)
+            try:
+                governance = None
+                if item.name in prompt_cache:
+                    governance = await call.owner_governance(
+                        prompt_cache[item.name].prompt_id, project_id
+                    )
+                result = await prompt_service.expand_prompt(
+                    call.db,
+                    item.name,
+                    ExpandRequest(input=_parse_tool_input(item.input), project_id=project_id),
+                    policies=governance.all_policies if governance else None,
+                    objectives=governance.objective_titles if governance else None,
+                    prompt_cache=prompt_cache,
+                )
+            except TemplateError as exc:
+                sections.append(f"{header}\nError: {exc}")
+                continue
+            except Exception as exc:
+                # One bad item must not cost the caller the ones already rendered
+                logger.warning("sh-run-many item %r failed", item.name, exc_info=True)
+                sections.append(f"{header}\nError: {type(exc).__name__}: {exc}")
+                continue
+            if not result:
+                sections.append(f"{header}\nError: prompt '{item.name}' not found.")
+                continue
+            sections.append(
+                f"=== [{index}] {item.name} (v{result.prompt_version}) ===\n"
+                + _format_expansion(result)
+            )
+        return call.respond("\n\n".join(sections))
 
 
 @mcp.tool(name="sh-workflow-list")
 async def sh_workflow_list(ctx: Context) -> str:
     """List all workflows accessible to the authenticated user."""
-    context_block = await _maybe_inject_session_context(ctx)
-    user_id = await _resolve_session_user_id(ctx)
-    async with async_session() as db:
-        workflows = await workflow_service.list_workflows(db, user_id=user_id)
-    if not workflows:
-        result = "No workflows found."
-    else:
-        lines = ["Available workflows:"]
-        for wf in workflows:
-            step_count = len(wf.steps)
-            desc = f" — {wf.description}" if wf.description else ""
-            lines.append(f"  - {wf.name} ({step_count} step{'s' if step_count != 1 else ''}){desc}")
-        result = "\n".join(lines)
-    if context_block:
-        return context_block + "\n\n" + result
-    return result
+    async with _tool_call(ctx) as call:
+        workflows = (await call.catalog()).workflows
+        if not workflows:
+            result = "No workflows found."
+        else:
+            lines = ["Available workflows:"]
+            for wf in workflows:
+                step_count = wf.step_count
+                desc = f" — {wf.description}" if wf.description else ""
+                plural = "s" if step_count != 1 else ""
+                lines.append(f"  - {wf.name} ({step_count} step{plural}){desc}")
+            result = "\n".join(lines)
+        return call.respond(result)
+
+
+def _format_workflow_steps(steps: list[WorkflowStepResult], outputs: dict | None) -> list[str]:
+    parts = []
+    for sr in steps:
+        status_icon = "✓" if sr.status == "success" else "✗"
+        parts.append(
+            f"\n--- {status_icon} {sr.step_id} ({sr.prompt_name} v{sr.prompt_version}) ---"
+        )
+        if sr.error:
+            parts.append(f"Error: {sr.error}")
+        else:
+            if sr.system_message:
+                parts.append(f"[System]\n{sr.system_message}")
+            parts.append(f"[User]\n{sr.user_message}")
+    if outputs is not None:
+        parts.append("\n--- Final Outputs ---")
+        parts.append(json.dumps(outputs, indent=2))
+    return parts
 
 
 @mcp.tool(name="sh-workflow-run")
-async def sh_workflow_run(name: str, input: str, ctx: Context) -> str:  # noqa: A002
-    """Run a workflow by name. Each step's output is automatically passed to the next step.
+async def sh_workflow_run(
+    name: str, input: str, ctx: Context, background: bool = False  # noqa: A002
+) -> str:
+    """Run a workflow by name. Each step's output is passed to the steps that depend on it.
+
+    Independent steps run concurrently; a workflow with no declared dependencies
+    runs as a linear pipeline, each step fed by the one before. Clients that send
+    a progress token get a progress notification as each step finishes.
 
     Use sh-workflow-list to discover available workflows.
 
     Args:
         name: The workflow name (e.g. 'PRD Pipeline').
         input: The input text or JSON object to pass to the first step.
+        background: Queue the run and return its id immediately instead of waiting;
+            check on it with sh-workflow-status. Use for long pipelines.
     """
-    context_block = await _maybe_inject_session_context(ctx)
-    user_id = await _resolve_session_user_id(ctx)
+    async with _tool_call(ctx) as call:
+        match = await workflow_service.get_workflow_by_name(call.db, name, user_id=call.user_id)
+        if not match:
+            return call.respond(f"Error: workflow '{name}' not found.")
+
+        if background:
+            if not call.user_id:
+                # Nobody could read an anonymous run back (see sh-workflow-status)
+                return call.respond("Error: background runs need an authenticated API key.")
+            queued = await run_service.submit_run(
+                call.db,
+                match.id,
+                WorkflowRunRequest(input=_parse_tool_input(input)),
+                user_id=call.user_id,
+            )
+            run_service.worker_pool.wake()
+            return call.respond(
+                f"Workflow '{match.name}' queued as run {queued.id}.\n"
+                "Use sh-workflow-status with this run id to follow it."
+            )
 
-    # Find the workflow by name
-    async with async_session() as db:
-        workflows = await workflow_service.list_workflows(db, user_id=user_id)
-
-    match = None
-    for wf in workflows:
-        if wf.name.lower() == name.lower():
-            match = wf
-            break
-
-    if not match:
-        result = f"Error: workflow '{name}' not found."
-        if context_block:
-            return context_block + "\n\n" + result
-        return result
+        total = len(match.steps)
+        finished = 0
 
-    # Parse input
-    try:
-        parsed = json.loads(input)
-        if not isinstance(parsed, dict):
-            parsed = {"input": input}
-    except (json.JSONDecodeError, TypeError):
-        parsed = {"input": input}
+        async def report(position: int, result: WorkflowStepResult) -> None:
+            # MCP progress notifications; a no-op unless the client sent a progressToken
+            nonlocal finished
+            finished += 1
+            await ctx.report_progress(
+                finished, total, f"{result.step_id}: {result.status}"
+            )
 
-    async with async_session() as db:
-        run_result = await workflow_service.run_workflow(db, match.id, parsed)
+        run_result = await workflow_service.run_workflow(
+            call.db, match.id, _parse_tool_input(input), on_step=report
+        )
 
-    if not run_result:
-        result = f"Error: failed to run workflow '{name}'."
-        if context_block:
-            return context_block + "\n\n" + result
-        return result
+        if not run_result:
+            return call.respond(f"Error: failed to run workflow '{name}'.")
 
-    # Format output
-    parts = [f"Workflow: {run_result.workflow_name} ({len(run_result.steps)} steps)"]
-    for sr in run_result.steps:
-        status_icon = "✓" if sr.status == "success" else "✗"
-        parts.append(
-            f"\n--- {status_icon} {sr.step_id} ({sr.prompt_name} v{sr.prompt_version}) ---"
-        )
-        if sr.error:
-            parts.append(f"Error: {sr.error}")
-        else:
-            if sr.system_message:
-                parts.append(f"[System]\n{sr.system_message}")
-            parts.append(f"[User]\n{sr.user_message}")
+        parts = [f"Workflow: {run_result.workflow_name} ({len(run_result.steps)} steps)"]
+        parts += _format_workflow_steps(run_result.steps, run_result.outputs)
+        return call.respond("\n".join(parts))
 
-    parts.append("\n--- Final Outputs ---")
-    parts.append(json.dumps(run_result.outputs, indent=2))
 
-    tool_result = "\n".join(parts)
-    if context_block:
-        return context_block + "\n\n" + tool_result
-    return tool_result
+@mcp.tool(name="sh-workflow-status")
+async def sh_workflow_status(run_id: str, ctx: Context) -> str:
+    """Show the status of a workflow run queued with sh-workflow-run(background=true).
+
+    Steps are listed as they finish; outputs appear once the run is done.
+
+    Args:
+        run_id: The run id sh-workflow-run returned.
+    """
+    async with _tool_call(ctx) as call:
+        run = None
+        if call.user_id:
+            try:
+                run = await run_service.get_run(
+                    call.db, uuid_mod.UUID(run_id), viewer_id=call.user_id
+                )
+            except ValueError:
+                pass
+        if not run:
+            return call.respond(f"Error: workflow run '{run_id}' not found.")
+
+        parts = [f"Run {run.id}: {run.status} ({len(run.steps)} step(s) finished)"]
+        if run.error:
+            parts.append(f"Error: {run.error}")
+        parts += _format_workflow_steps(run.steps, run.outputs)
+        return call.respond("\n".join(parts))
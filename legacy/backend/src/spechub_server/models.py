@@ -4,12 +4,15 @@ from datetime import datetime
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     DateTime,
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    SmallInteger,
     String,
     Text,
     UniqueConstraint,
@@ -241,6 +244,8 @@ class Prompt(Base):
     user_id: Mapped[uuid.UUID | None] = mapped_column(
         Uuid, ForeignKey("users.id"), nullable=True, index=True
     )
+    # name + description + latest-version tags; full-text/trigram indexed on Postgres
+    search_document: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -321,6 +326,8 @@ class Workflow(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
     steps: Mapped[list] = mapped_column(JSON, default=list)
+    # Compiled execution plan (workflow_service.compile_plan); NULL until first compiled
+    plan: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -331,6 +338,13 @@ class Workflow(Base):
     shares: Mapped[list["WorkflowShare"]] = relationship(
         back_populates="workflow", cascade="all, delete-orphan"
     )
+    runs: Mapped[list["WorkflowRun"]] = relationship(
+        back_populates="workflow", cascade="all, delete-orphan"
+    )
+
+
+# Case-insensitive name lookup (workflow_service.get_workflow_by_name)
+Index("idx_workflows_lower_name_user", func.lower(Workflow.name), Workflow.user_id)
 
 
 # ---------------------------------------------------------------------------
@@ -339,7 +353,10 @@ class Workflow(Base):
 
 class PromptShare(Base):
     __tablename__ = "prompt_shares"
-    __table_args__ = (UniqueConstraint("prompt_id", "user_id"),)
+    __table_args__ = (
+        UniqueConstraint("prompt_id", "user_id"),
+        Index("idx_prompt_shares_user_prompt", "user_id", "prompt_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     prompt_id: Mapped[uuid.UUID] = mapped_column(
@@ -360,7 +377,10 @@ class PromptShare(Base):
 
 class WorkflowShare(Base):
     __tablename__ = "workflow_shares"
-    __table_args__ = (UniqueConstraint("workflow_id", "user_id"),)
+    __table_args__ = (
+        UniqueConstraint("workflow_id", "user_id"),
+        Index("idx_workflow_shares_user_workflow", "user_id", "workflow_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     workflow_id: Mapped[uuid.UUID] = mapped_column(
@@ -375,6 +395,71 @@ class WorkflowShare(Base):
     user: Mapped["User"] = relationship(back_populates="workflow_shares")
 
 
+# ---------------------------------------------------------------------------
+# WorkflowRun / WorkflowStepRun (asynchronous runs, executed by run_service workers)
+# ---------------------------------------------------------------------------
+
+class WorkflowRun(Base):
+    __tablename__ = "workflow_runs"
+    # Workers claim queued runs and running runs whose lease has expired
+    __table_args__ = (Index("idx_workflow_runs_claim", "status", "lease_expires_at"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    workflow_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        Uuid, ForeignKey("users.id"), nullable=True
+    )
+    # queued -> running -> succeeded | failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    input: Mapped[dict] = mapped_column(JSON, default=dict)
+    max_parallel: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    on_error: Mapped[str] = mapped_column(String(20), nullable=False, default="fail_fast")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lease_owner: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    outputs: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    workflow: Mapped["Workflow"] = relationship(back_populates="runs")
+    steps: Mapped[list["WorkflowStepRun"]] = relationship(
+        back_populates="run",
+        cascade="all, delete-orphan",
+        order_by="WorkflowStepRun.position",
+    )
+
+
+class WorkflowStepRun(Base):
+    __tablename__ = "workflow_step_runs"
+    __table_args__ = (UniqueConstraint("run_id", "step_id"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    run_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("workflow_runs.id", ondelete="CASCADE"), nullable=False
+    )
+    # Index of the step in the compiled plan's topological order
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    step_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    prompt_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    prompt_version: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    system_message: Mapped[str | None] = mapped_column(Text)
+    user_message: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    error: Mapped[str | None] = mapped_column(Text)
+    cached: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Per-element results of a map step
+    items: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    run: Mapped["WorkflowRun"] = relationship(back_populates="steps")
+
+
 # ---------------------------------------------------------------------------
 # Invitation
 # ---------------------------------------------------------------------------
@@ -403,17 +488,91 @@ class Invitation(Base):
 
 
 # ---------------------------------------------------------------------------
-# PromptUsage (unchanged)
+# PromptUsage
 # ---------------------------------------------------------------------------
 
 class PromptUsage(Base):
+    """One expand call: which version it rendered, for whom, and how it went.
+
+    ``prompt_version_id`` is null when the call resolved no version (unknown
+    prompt or version); ``prompt_name`` is what was asked for either way. The
+    caller columns are null for anonymous calls, JWT calls have no key.
+    """
+
+    # On Postgres this is range-partitioned by month on created_at, with primary
+    # key (id, created_at) and a BRIN index on created_at instead of a B-tree
+    # (migrations 013, 015 and 016); other databases get the plain table declared here.
     __tablename__ = "prompt_usage"
+    __table_args__ = (
+        Index("idx_prompt_usage_prompt_name", "prompt_name"),
+        Index("idx_prompt_usage_created_at", "created_at", postgresql_using="brin"),
+        Index("idx_prompt_usage_version_created", "prompt_version_id", "created_at"),
+        Index("idx_prompt_usage_user_created", "user_id", "created_at"),
+        Index("idx_prompt_usage_project_created", "project_id", "created_at"),
+        Index("idx_prompt_usage_api_key_created", "api_key_id", "created_at"),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
-    prompt_name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
-    prompt_version: Mapped[str] = mapped_column(String(50), nullable=False)
-    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
-    latency_ms: Mapped[float] = mapped_column(Float, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), index=True
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
     )
+    prompt_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    prompt_version_id: Mapped[uuid.UUID | None] = mapped_column(
+        Uuid, ForeignKey("prompt_versions.id", ondelete="SET NULL"), nullable=True
+    )
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        Uuid, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    project_id: Mapped[uuid.UUID | None] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True
+    )
+    api_key_id: Mapped[uuid.UUID | None] = mapped_column(
+        Uuid, ForeignKey("api_keys.id", ondelete="SET NULL"), nullable=True
+    )
+    status_code: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    latency_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    # Milliseconds per expansion stage (see prompt_service.expand_prompt)
+    stages: Mapped[dict | None] = mapped_column(JSON(none_as_null=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+# ---------------------------------------------------------------------------
+# Usage rollups (prompt_usage aggregated per hour and per day)
+# ---------------------------------------------------------------------------
+
+class UsageRollupMixin:
+    """Aggregates of the usage rows in one time bucket for one prompt version.
+
+    ``status_class`` is "2xx", "4xx" or "5xx". ``histogram`` maps latency bucket
+    indexes (see ``usage_service.latency_bucket``) to row counts, sparsely.
+    ``stages`` maps expansion stages to ``[rows that timed it, total ms]``.
+    """
+
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    prompt_name: Mapped[str] = mapped_column(String(255), primary_key=True)
+    prompt_version: Mapped[str] = mapped_column(String(50), primary_key=True)
+    status_class: Mapped[str] = mapped_column(String(3), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    latency_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    latency_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    latency_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    histogram: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    stages: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+
+
+class UsageRollupHourly(UsageRollupMixin, Base):
+    __tablename__ = "usage_rollups_hourly"
+
+
+class UsageRollupDaily(UsageRollupMixin, Base):
+    __tablename__ = "usage_rollups_daily"
+
+
+# ---------------------------------------------------------------------------
+# RegistryState (single-row change counter for prompts, shares and workflows)
+# ---------------------------------------------------------------------------
+
+class RegistryState(Base):
+    __tablename__ = "registry_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    revision: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -1,12 +1,173 @@
-from fastapi import APIRouter, Depends
+import csv
+import io
+import json
+import uuid
+import zlib
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.skillcanon_server.auth import get_current_user, require_admin
+from src.skillcanon_server.config import settings
 from src.skillcanon_server.database import get_db
-from src.skillcanon_server.services import metrics_service
+from src.skillcanon_server.models import ApiKey, Project, User
+from src.skillcanon_server.services import metrics_service, project_service, usage_service
 
 router = APIRouter(prefix="/api/v1", tags=["metrics"])
 
 
 @router.get("/metrics/dashboard")
 async def dashboard_stats(db: AsyncSession = Depends(get_db)):
-    return await metrics_service.get_dashboard_stats(db)
+    return await metrics_service.get_cached_dashboard_stats(db)
+
+
+@router.get("/metrics/prompts/{name}")
+async def prompt_stats(
+    name: str,
+    hours: int = Query(default=24, ge=1, le=24 * 90),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await metrics_service.get_prompt_stats(db, name, hours)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Prompt '{name}' not found")
+    return result
+
+
+@router.get("/metrics/users/{user_id}")
+async def user_usage(
+    user_id: uuid.UUID,
+    hours: int = Query(default=24, ge=1, le=24 * 90),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if current_user.id != user_id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized for this user's usage")
+    return await metrics_service.get_usage_by(db, "user", user_id, hours)
+
+
+@router.get("/metrics/projects/{project_id}")
+async def project_usage(
+    project_id: uuid.UUID,
+    hours: int = Query(default=24, ge=1, le=24 * 90),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not await project_service.can_access(db, project_id, current_user):
+        raise HTTPException(status_code=403, detail="Not authorized for this project's usage")
+    return await metrics_service.get_usage_by(db, "project", project_id, hours)
+
+
+@router.get("/metrics/api-keys/{key_id}")
+async def api_key_usage(
+    key_id: uuid.UUID,
+    hours: int = Query(default=24, ge=1, le=24 * 90),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    key = await db.get(ApiKey, key_id)
+    if not key:
+        raise HTTPException(status_code=404, detail="API key not found")
+    if key.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized for this API key's usage")
+    return await metrics_service.get_usage_by(db, "api_key", key_id, hours)
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _ndjson(rows: list[dict]) -> str:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+
+def _csv(rows: list[dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        if row["stages"] is not None:
+            row["stages"] = json.dumps(row["stages"])
+        writer.writerow(row.values())
+    return buffer.getvalue()
+
+
+async def _encode_export(
+    batches: AsyncIterator[list[dict]], fmt: str, compress: bool
+) -> AsyncIterator[bytes]:
+    # Each batch is flushed through the compressor so the client holds every
+    # complete row sent so far, whatever happens to the connection afterwards
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if fmt == "csv":
+        yield encode(",".join(usage_service.EXPORT_COLUMNS) + "\r\n")
+    async for rows in batches:
+        for row in rows:
+            row["created_at"] = row["created_at"].isoformat()
+        yield encode(_ndjson(rows) if fmt == "ndjson" else _csv(rows))
+    if compressor is not None:
+        yield compressor.flush()
+
+
+@router.get("/metrics/usage/export")
+async def export_usage(
+    request: Request,
+    since: datetime | None = Query(None, description="Range start (default: 24 hours ago)"),
+    until: datetime | None = Query(None, description="Range end, exclusive (default: now)"),
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    prompt: str | None = None,
+    user_id: uuid.UUID | None = None,
+    status: str | None = Query(None, description="A status code (404) or class (4xx)"),
+    after: int | None = Query(
+        None, ge=0, description="Resume token: the id of the last row already received"
+    ),
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream raw usage rows in ``(created_at, id)`` order as NDJSON or CSV.
+
+    Gzip-compressed when the request accepts it. An export that broke off
+    resumes by repeating the request with ``after`` set to the last ``id``
+    received. Rows reach the table up to a flush interval after they are
+    recorded, so the range stops ``usage_export_lag_seconds`` before now: what
+    is exported is complete, and later rows are left for a later export. Naive
+    timestamps are taken as UTC.
+    """
+    settled = datetime.now(timezone.utc) - timedelta(seconds=settings.usage_export_lag_seconds)
+    until = min(_utc(until), settled) if until else settled
+    since = _utc(since) if since else until - timedelta(hours=24)
+    if since >= until:
+        raise HTTPException(status_code=422, detail="'since' must be before 'until'")
+    if status is not None:
+        try:
+            usage_service.status_filter(status)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    batches = usage_service.stream_usage(
+        db, since, until, prompt_name=prompt, user_id=user_id, status=status, after_id=after
+    )
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    filename = f"usage-{since:%Y%m%dT%H%M%S}-{until:%Y%m%dT%H%M%S}.{fmt}"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _encode_export(batches, fmt, compress),
+        media_type="application/x-ndjson" if fmt == "ndjson" else "text/csv",
+        headers=headers,
+    )
@@ -1,11 +1,13 @@
 import time
 import uuid
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from jinja2 import UndefinedError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.skillcanon_server.auth import get_current_user
+from src.skillcanon_server import telemetry
+from src.skillcanon_server.auth import get_current_user, get_current_user_optional
 from src.skillcanon_server.database import get_db
 from src.skillcanon_server.models import User
 from src.skillcanon_server.schemas import (
@@ -15,11 +17,17 @@ from src.skillcanon_server.schemas import (
     PromptCreate,
     PromptListResponse,
     PromptResponse,
+    PromptSearchResponse,
     PromptVersionResponse,
     ShareRequest,
     ShareResponse,
 )
-from src.skillcanon_server.services import metrics_service, prompt_service
+from src.skillcanon_server.services import (
+    metrics_service,
+    project_service,
+    prompt_service,
+    search_service,
+)
 
 router = APIRouter(prefix="/api/v1", tags=["prompts"])
 
@@ -52,6 +60,19 @@ async def list_prompts(
     )
 
 
+@router.get("/prompts/search", response_model=PromptSearchResponse)
+async def search_prompts(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    user_id: uuid.UUID | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    return await search_service.search_prompts(
+        db, q, page=page, page_size=page_size, user_id=user_id
+    )
+
+
 @router.get("/prompts/{name}", response_model=PromptResponse)
 async def get_prompt(name: str, db: AsyncSession = Depends(get_db)):
     result = await prompt_service.get_prompt(db, name)
@@ -115,46 +136,133 @@ async def rollback_prompt(
     return result
 
 
-@router.post("/expand/{name}", response_model=ExpandResponse)
-async def expand_prompt(name: str, data: ExpandRequest, db: AsyncSession = Depends(get_db)):
+def _timed(
+    result: ExpandResponse,
+    timer: telemetry.StageTimer,
+    started: float,
+    response: Response,
+    debug: str | None,
+) -> ExpandResponse:
+    """Report the expansion's stage timings in ``Server-Timing`` (and the body if asked)."""
+    total_ms = (time.perf_counter() - started) * 1000
+    response.headers["Server-Timing"] = timer.server_timing(total_ms)
+    if debug == "timing":
+        return result.model_copy(update={"timings": timer.rounded()})
+    return result
+
+
+async def _usage_project(
+    db: AsyncSession, data: ExpandRequest, caller: User | None
+) -> uuid.UUID | None:
+    """The project an expand's usage is charged to, resolved once before rendering.
+
+    ``data.project_id`` only if the caller can access it, so usage can't be
+    charged to (or break the foreign key on) someone else's or a made-up project.
+    """
+    if data.project_id and caller:
+        if await project_service.can_access(db, data.project_id, caller):
+            return data.project_id
+    return None
+
+
+def _usage_refs(
+    result: ExpandResponse | None,
+    project_id: uuid.UUID | None,
+    caller: User | None,
+    request: Request,
+) -> dict:
+    """Ids the usage row of an expand references (see ``usage_service.usage_row``)."""
+    return {
+        "prompt_version_id": result.prompt_version_id if result else None,
+        "user_id": caller.id if caller else None,
+        "project_id": project_id,
+        "api_key_id": getattr(request.state, "api_key_id", None),
+    }
+
+
+@router.post(
+    "/expand/{name}", response_model=ExpandResponse, response_model_exclude_unset=True
+)
+async def expand_prompt(
+    name: str,
+    data: ExpandRequest,
+    request: Request,
+    response: Response,
+    debug: Literal["timing"] | None = Query(None, description="timing: add per-stage timings"),
+    caller: User | None = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_db),
+):
     t0 = time.perf_counter()
+    timer = telemetry.StageTimer()
+    project_id = await _usage_project(db, data, caller)
     status = 200
     version_str = "latest"
+    result = None
     try:
-        result = await prompt_service.expand_prompt(db, name, data)
+        result = await prompt_service.expand_prompt(db, name, data, timer=timer)
         if not result:
             status = 404
             raise HTTPException(status_code=404, detail=f"Prompt '{name}' not found")
         version_str = result.prompt_version
-        return result
+        return _timed(result, timer, t0, response, debug)
     except UndefinedError as e:
         status = 422
         raise HTTPException(status_code=422, detail=f"Template variable error: {e}")
     finally:
         latency = (time.perf_counter() - t0) * 1000
-        await metrics_service.record_usage(db, name, version_str, status, latency)
+        await metrics_service.record_usage(
+            db,
+            name,
+            version_str,
+            status,
+            latency,
+            timer.stages,
+            **_usage_refs(result, project_id, caller, request),
+        )
 
 
-@router.post("/expand/{name}/versions/{version}", response_model=ExpandResponse)
+@router.post(
+    "/expand/{name}/versions/{version}",
+    response_model=ExpandResponse,
+    response_model_exclude_unset=True,
+)
 async def expand_prompt_version(
-    name: str, version: str, data: ExpandRequest, db: AsyncSession = Depends(get_db)
+    name: str,
+    version: str,
+    data: ExpandRequest,
+    request: Request,
+    response: Response,
+    debug: Literal["timing"] | None = Query(None, description="timing: add per-stage timings"),
+    caller: User | None = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_db),
 ):
     t0 = time.perf_counter()
+    timer = telemetry.StageTimer()
+    project_id = await _usage_project(db, data, caller)
     status = 200
+    result = None
     try:
-        result = await prompt_service.expand_prompt(db, name, data, version=version)
+        result = await prompt_service.expand_prompt(db, name, data, version=version, timer=timer)
         if not result:
             status = 404
             raise HTTPException(
                 status_code=404, detail=f"Prompt '{name}' version '{version}' not found"
             )
-        return result
+        return _timed(result, timer, t0, response, debug)
     except UndefinedError as e:
         status = 422
         raise HTTPException(status_code=422, detail=f"Template variable error: {e}")
     finally:
         latency = (time.perf_counter() - t0) * 1000
-        await metrics_service.record_usage(db, name, version, status, latency)
+        await metrics_service.record_usage(
+            db,
+            name,
+            version,
+            status,
+            latency,
+            timer.stages,
+            **_usage_refs(result, project_id, caller, request),
+        )
 
 
 @router.post("/prompts/{name}/shares", response_model=ShareResponse, status_code=201)
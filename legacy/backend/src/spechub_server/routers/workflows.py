@@ -1,6 +1,8 @@
 import uuid
+from collections.abc import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.skillcanon_server.auth import get_current_user
@@ -11,11 +13,13 @@ from src.skillcanon_server.schemas import (
     ShareResponse,
     WorkflowCreate,
     WorkflowResponse,
+    WorkflowRunEvent,
     WorkflowRunRequest,
     WorkflowRunResponse,
+    WorkflowRunStatus,
     WorkflowUpdate,
 )
-from src.skillcanon_server.services import workflow_service
+from src.skillcanon_server.services import run_service, workflow_service
 
 router = APIRouter(prefix="/api/v1", tags=["workflows"])
 
@@ -27,7 +31,10 @@ async def create_workflow(
     db: AsyncSession = Depends(get_db),
 ):
     data.user_id = current_user.id
-    return await workflow_service.create_workflow(db, data)
+    try:
+        return await workflow_service.create_workflow(db, data)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @router.get("/workflows", response_model=list[WorkflowResponse])
@@ -39,6 +46,18 @@ async def list_workflows(
     return await workflow_service.list_workflows(db, user_id=user_id, project_id=project_id)
 
 
+@router.get("/workflows/by-name/{name}", response_model=WorkflowResponse)
+async def get_workflow_by_name(
+    name: str,
+    user_id: uuid.UUID | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    result = await workflow_service.get_workflow_by_name(db, name, user_id=user_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    return result
+
+
 @router.get("/workflows/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(workflow_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     result = await workflow_service.get_workflow(db, workflow_id)
@@ -51,7 +70,10 @@ async def get_workflow(workflow_id: uuid.UUID, db: AsyncSession = Depends(get_db
 async def update_workflow(
     workflow_id: uuid.UUID, data: WorkflowUpdate, db: AsyncSession = Depends(get_db)
 ):
-    result = await workflow_service.update_workflow(db, workflow_id, data)
+    try:
+        result = await workflow_service.update_workflow(db, workflow_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if not result:
         raise HTTPException(status_code=404, detail="Workflow not found")
     return result
@@ -69,7 +91,9 @@ async def run_workflow(
     workflow_id: uuid.UUID, data: WorkflowRunRequest, db: AsyncSession = Depends(get_db)
 ):
     try:
-        result = await workflow_service.run_workflow(db, workflow_id, data.input)
+        result = await workflow_service.run_workflow(
+            db, workflow_id, data.input, max_parallel=data.max_parallel, on_error=data.on_error
+        )
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     if not result:
@@ -77,6 +101,67 @@ async def run_workflow(
     return result
 
 
+async def _encode_events(
+    events: AsyncIterator[WorkflowRunEvent], ndjson: bool
+) -> AsyncIterator[str]:
+    async for event in events:
+        body = event.model_dump_json(exclude_none=True)
+        yield f"{body}\n" if ndjson else f"event: {event.event}\ndata: {body}\n\n"
+
+
+@router.post("/workflows/{workflow_id}/run/stream")
+async def stream_workflow(
+    workflow_id: uuid.UUID,
+    data: WorkflowRunRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """Run a workflow, streaming step events as Server-Sent Events.
+
+    Send ``Accept: application/x-ndjson`` for newline-delimited JSON instead.
+    """
+    if not await workflow_service.get_workflow(db, workflow_id):
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    events = workflow_service.stream_workflow(
+        db, workflow_id, data.input, max_parallel=data.max_parallel, on_error=data.on_error
+    )
+    return StreamingResponse(
+        _encode_events(events, ndjson),
+        media_type="application/x-ndjson" if ndjson else "text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/workflows/{workflow_id}/runs", response_model=WorkflowRunStatus, status_code=202)
+async def submit_workflow_run(
+    workflow_id: uuid.UUID,
+    data: WorkflowRunRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await run_service.submit_run(db, workflow_id, data, user_id=current_user.id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    run_service.worker_pool.wake()
+    return result
+
+
+@router.get("/workflow-runs/{run_id}", response_model=WorkflowRunStatus)
+async def get_workflow_run(
+    run_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # Steps carry rendered messages: only the submitter, the workflow's owner and
+    # users it is shared with (or an admin) may read a run
+    viewer_id = None if current_user.role == "admin" else current_user.id
+    result = await run_service.get_run(db, run_id, viewer_id=viewer_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Workflow run not found")
+    return result
+
+
 @router.post("/workflows/{workflow_id}/shares", response_model=ShareResponse, status_code=201)
 async def share_workflow(
     workflow_id: uuid.UUID, data: ShareRequest, db: AsyncSession = Depends(get_db)
@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -281,6 +282,22 @@ class PromptListResponse(BaseModel):
     page_size: int
 
 
+class PromptSearchResult(BaseModel):
+    id: uuid.UUID
+    name: str
+    description: str | None
+    tags: list[str] = Field(default_factory=list)
+    score: float
+
+
+class PromptSearchResponse(BaseModel):
+    query: str
+    items: list[PromptSearchResult]
+    total: int
+    page: int
+    page_size: int
+
+
 class NewVersionCreate(BaseModel):
     version: str = Field(..., examples=["1.1.0"])
     system_template: str | None = None
@@ -298,6 +315,14 @@ class ExpandRequest(BaseModel):
     project_id: uuid.UUID | None = None
 
 
+class PromptRunItem(BaseModel):
+    """One expansion requested through the ``sh-run-many`` MCP tool."""
+
+    name: str
+    input: str = ""
+    project: str | None = None
+
+
 class ExpandResponse(BaseModel):
     prompt_name: str
     prompt_version: str
@@ -305,6 +330,10 @@ class ExpandResponse(BaseModel):
     user_message: str
     applied_policies: list[str] = Field(default_factory=list)
     objectives: list[str] = Field(default_factory=list)
+    # Milliseconds per expansion stage; only set (and serialized) for ?debug=timing
+    timings: dict[str, float] | None = None
+    # The rendered version's id, for usage records; never serialized
+    prompt_version_id: uuid.UUID | None = Field(default=None, exclude=True)
 
 
 # ---------------------------------------------------------------------------
@@ -345,6 +374,11 @@ class WorkflowStep(BaseModel):
     prompt_name: str = Field(..., examples=["feature-prd"])
     prompt_version: str | None = None
     depends_on: list[str] = Field(default_factory=list)
+    # A "map" step renders its prompt once per element of the list in ``map_over``:
+    # a workflow input field or the id of a step it depends on (whose output is a
+    # JSON array or one item per line). Each element is available as ``item``.
+    type: Literal["prompt", "map"] = "prompt"
+    map_over: str | None = Field(default=None, examples=["files"])
 
 
 class WorkflowCreate(BaseModel):
@@ -376,6 +410,16 @@ class WorkflowResponse(BaseModel):
 
 class WorkflowRunRequest(BaseModel):
     input: dict = Field(default_factory=dict)
+    max_parallel: int | None = Field(default=None, ge=1, le=32)
+    on_error: Literal["fail_fast", "continue"] = "fail_fast"
+
+
+class WorkflowMapItemResult(BaseModel):
+    index: int
+    status: str = "success"
+    system_message: str | None = None
+    user_message: str = ""
+    error: str | None = None
 
 
 class WorkflowStepResult(BaseModel):
@@ -386,6 +430,10 @@ class WorkflowStepResult(BaseModel):
     user_message: str
     status: str = "success"
     error: str | None = None
+    # Reused from an identical earlier render instead of rendered again
+    cached: bool = False
+    # Per-element results of a map step; its user_message is the JSON array of outputs
+    items: list[WorkflowMapItemResult] | None = None
 
 
 class WorkflowRunResponse(BaseModel):
@@ -395,6 +443,36 @@ class WorkflowRunResponse(BaseModel):
     outputs: dict
 
 
+class WorkflowRunEvent(BaseModel):
+    """One event of a streamed run (``POST /workflows/{id}/run/stream``)."""
+
+    event: Literal["step_started", "step_finished", "done", "error"]
+    step_id: str | None = None
+    # Index of the step in the workflow's topological order
+    position: int | None = None
+    result: WorkflowStepResult | None = None
+    outputs: dict | None = None
+    error: str | None = None
+
+
+class WorkflowRunStatus(BaseModel):
+    """A run submitted with ``POST /workflows/{id}/runs``; steps appear as they finish."""
+
+    id: uuid.UUID
+    workflow_id: uuid.UUID
+    user_id: uuid.UUID | None
+    status: str
+    attempts: int
+    error: str | None
+    outputs: dict | None
+    steps: list[WorkflowStepResult] = Field(default_factory=list)
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
+
+
 # ---------------------------------------------------------------------------
 # Sharing schemas
 # ---------------------------------------------------------------------------
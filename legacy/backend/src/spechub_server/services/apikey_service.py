@@ -1,11 +1,12 @@
 import hashlib
 import secrets
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.skillcanon_server.config import settings
 from src.skillcanon_server.models import ApiKey
 
 
@@ -66,8 +67,14 @@ async def revoke_api_key(db: AsyncSession, key_id: uuid.UUID) -> bool:
     return True
 
 
-async def validate_key(db: AsyncSession, raw_key: str) -> ApiKey | None:
-    """Validate a raw API key. Returns the ApiKey if valid, None otherwise."""
+async def validate_key(db: AsyncSession, raw_key: str, commit: bool = True) -> ApiKey | None:
+    """Validate a raw API key. Returns the ApiKey if valid, None otherwise.
+
+    ``last_used_at`` is only rewritten once it is ``api_key_touch_seconds`` stale,
+    so a busy key costs one write per interval rather than one per request. With
+    ``commit=False`` that bump is left pending so the caller can fold it into its
+    own transaction.
+    """
     key_hash = _hash_key(raw_key)
     result = await db.execute(
         select(ApiKey).where(ApiKey.key_hash == key_hash, ApiKey.is_active == True)  # noqa: E712
@@ -77,6 +84,12 @@ async def validate_key(db: AsyncSession, raw_key: str) -> ApiKey | None:
         return None
     if key.expires_at and key.expires_at < datetime.now(timezone.utc):
         return None
-    key.last_used_at = datetime.now(timezone.utc)
-    await db.commit()
+    now = datetime.now(timezone.utc)
+    last_used = key.last_used_at
+    if last_used is not None and last_used.tzinfo is None:
+        last_used = last_used.replace(tzinfo=timezone.utc)
+    if last_used is None or now - last_used >= timedelta(seconds=settings.api_key_touch_seconds):
+        key.last_used_at = now
+        if commit:
+            await db.commit()
     return key
@@ -1,9 +1,21 @@
+import asyncio
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import func, select, text
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
-from src.skillcanon_server.models import Prompt, PromptUsage, PromptVersion
+from src.skillcanon_server import telemetry
+from src.skillcanon_server.config import settings
+from src.skillcanon_server.models import (
+    Prompt,
+    PromptUsage,
+    PromptVersion,
+    UsageRollupDaily,
+    UsageRollupHourly,
+)
+from src.skillcanon_server.services import usage_service
 
 
 async def record_usage(
@@ -12,97 +24,305 @@ async def record_usage(
     prompt_version: str,
     status_code: int,
     latency_ms: float,
+    stages: dict[str, float] | None = None,
+    **refs: uuid.UUID | None,
 ) -> None:
-    usage = PromptUsage(
-        prompt_name=prompt_name,
-        prompt_version=prompt_version,
-        status_code=status_code,
-        latency_ms=latency_ms,
-    )
-    db.add(usage)
-    await db.commit()
+    """Record one expand call, with the milliseconds spent per stage if timed.
 
+    ``refs`` are the version and caller ids (see ``usage_service.usage_row``).
 
-async def get_dashboard_stats(db: AsyncSession) -> dict:
-    """Return aggregate stats for the metrics dashboard."""
-    now = datetime.now(timezone.utc)
-    last_24h = now - timedelta(hours=24)
-    last_7d = now - timedelta(days=7)
+    Buffered for a bulk write by ``usage_service.usage_recorder`` when it is
+    running (it is for the app's lifetime); written on ``db`` right away
+    otherwise, e.g. in scripts.
+    """
+    recorder = usage_service.usage_recorder
+    if recorder.running:
+        await recorder.record(
+            prompt_name, prompt_version, status_code, latency_ms, stages, **refs
+        )
+        return
+    row = usage_service.usage_row(
+        prompt_name, prompt_version, status_code, latency_ms, stages, **refs
+    )
+    await usage_service.write_rows(db, [row])
 
-    # Total prompts
-    total_prompts_r = await db.execute(select(func.count()).select_from(Prompt))
-    total_prompts = total_prompts_r.scalar_one()
 
-    # Total versions
-    total_versions_r = await db.execute(select(func.count()).select_from(PromptVersion))
-    total_versions = total_versions_r.scalar_one()
+async def get_dashboard_stats(db: AsyncSession) -> dict:
+    """Return aggregate stats for the metrics dashboard.
 
-    # Total expand calls
-    total_expands_r = await db.execute(select(func.count()).select_from(PromptUsage))
-    total_expands = total_expands_r.scalar_one()
+    Served from the usage rollups rather than ``prompt_usage``: all-time figures
+    from the daily rollups, windowed ones from the hourly rollups whose bucket
+    overlaps the window. The cost depends on the window, not on total history.
 
-    # Expands last 24h
-    expands_24h_r = await db.execute(
-        select(func.count()).select_from(PromptUsage).where(PromptUsage.created_at >= last_24h)
-    )
-    expands_24h = expands_24h_r.scalar_one()
+    Latency percentiles and the mean time per expansion stage (globally and
+    per top prompt) merge the daily rollups covering the last 7 days.
 
-    # Avg latency (all time)
-    avg_latency_r = await db.execute(
-        select(func.avg(PromptUsage.latency_ms)).select_from(PromptUsage)
-    )
-    avg_latency = round(avg_latency_r.scalar_one() or 0, 1)
+    Four statements, run concurrently on their own connections: every scalar
+    figure in one (conditional aggregation), the top prompts, the daily usage
+    and the latency histograms.
+    """
+    now = datetime.now(timezone.utc)
+    since_24h = usage_service.hour_start(now - timedelta(hours=24))
+    since_7d = usage_service.hour_start(now - timedelta(days=7))
+    hourly, daily = UsageRollupHourly, UsageRollupDaily
 
-    # Error rate (non-200 / total)
-    error_count_r = await db.execute(
-        select(func.count()).select_from(PromptUsage).where(PromptUsage.status_code != 200)
+    all_time = select(
+        func.sum(daily.count).label("expands"),
+        func.sum(daily.latency_sum).label("latency_sum"),
+        func.sum(daily.count).filter(daily.status_class != "2xx").label("errors"),
+    ).subquery()
+    totals = select(
+        select(func.count()).select_from(Prompt).scalar_subquery().label("prompts"),
+        select(func.count()).select_from(PromptVersion).scalar_subquery().label("versions"),
+        select(func.sum(hourly.count))
+        .where(hourly.bucket_start >= since_24h)
+        .scalar_subquery()
+        .label("expands_24h"),
+        all_time.c.expands,
+        all_time.c.latency_sum,
+        all_time.c.errors,
     )
-    error_count = error_count_r.scalar_one()
-    error_rate = round((error_count / total_expands * 100) if total_expands > 0 else 0, 1)
 
     # Top prompts by usage (last 7 days)
-    top_prompts_r = await db.execute(
-        select(
-            PromptUsage.prompt_name,
-            func.count().label("count"),
-            func.avg(PromptUsage.latency_ms).label("avg_latency"),
-        )
-        .where(PromptUsage.created_at >= last_7d)
-        .group_by(PromptUsage.prompt_name)
-        .order_by(func.count().desc())
+    count = func.sum(hourly.count).label("count")
+    top_prompts_q = (
+        select(hourly.prompt_name, count, func.sum(hourly.latency_sum).label("latency_sum"))
+        .where(hourly.bucket_start >= since_7d)
+        .group_by(hourly.prompt_name)
+        .order_by(count.desc())
         .limit(10)
     )
-    top_prompts = [
-        {
-            "name": row.prompt_name,
-            "count": row.count,
-            "avg_latency_ms": round(row.avg_latency, 1),
-        }
-        for row in top_prompts_r
-    ]
 
     # Daily usage for last 7 days
-    daily_usage_r = await db.execute(
+    daily_usage_q = (
         select(
-            func.date(PromptUsage.created_at).label("day"),
-            func.count().label("count"),
+            func.date(hourly.bucket_start).label("day"),
+            func.sum(hourly.count).label("count"),
         )
-        .where(PromptUsage.created_at >= last_7d)
-        .group_by(func.date(PromptUsage.created_at))
+        .where(hourly.bucket_start >= since_7d)
+        .group_by(func.date(hourly.bucket_start))
         .order_by(text("day"))
     )
+
+    # Latency histograms for the last 7 days
+    histograms_q = select(
+        daily.prompt_name, daily.histogram, daily.latency_min, daily.latency_max, daily.stages
+    ).where(daily.bucket_start >= usage_service.day_start(since_7d))
+
+    sessions = async_sessionmaker(db.bind, class_=AsyncSession)
+
+    async def fetch(statement) -> list:
+        async with sessions() as session:
+            return (await session.execute(statement)).all()
+
+    (row,), top_prompts_r, daily_usage_r, histograms_r = await asyncio.gather(
+        fetch(totals), fetch(top_prompts_q), fetch(daily_usage_q), fetch(histograms_q)
+    )
+    by_prompt: dict[str, list] = {}
+    for r in histograms_r:
+        by_prompt.setdefault(r.prompt_name, []).append(r)
+
+    total_expands = row.expands or 0
+    avg_latency = round((row.latency_sum or 0) / total_expands if total_expands > 0 else 0, 1)
+    error_rate = round(((row.errors or 0) / total_expands * 100) if total_expands > 0 else 0, 1)
+    top_prompts = [
+        {
+            "name": r.prompt_name,
+            "count": r.count,
+            "avg_latency_ms": round(r.latency_sum / r.count, 1),
+            "latency_ms": _percentiles(by_prompt.get(r.prompt_name, [])),
+            "stages_ms": _stages(by_prompt.get(r.prompt_name, [])),
+        }
+        for r in top_prompts_r
+    ]
     daily_usage = [
-        {"date": str(row.day), "count": row.count}
-        for row in daily_usage_r
+        {"date": str(r.day), "count": r.count}
+        for r in daily_usage_r
     ]
 
     return {
-        "total_prompts": total_prompts,
-        "total_versions": total_versions,
+        "total_prompts": row.prompts,
+        "total_versions": row.versions,
         "total_expands": total_expands,
-        "expands_24h": expands_24h,
+        "expands_24h": row.expands_24h or 0,
         "avg_latency_ms": avg_latency,
         "error_rate_pct": error_rate,
+        "latency_ms": _percentiles(histograms_r),
+        "stages_ms": _stages(histograms_r),
         "top_prompts": top_prompts,
         "daily_usage": daily_usage,
     }
+
+
+def _percentiles(rollups) -> dict:
+    """Latency percentiles over rollup rows, merging their histograms."""
+    histogram: dict = {}
+    for r in rollups:
+        usage_service.merge_histograms(histogram, r.histogram)
+    lows = [r.latency_min for r in rollups if r.latency_min is not None]
+    highs = [r.latency_max for r in rollups if r.latency_max is not None]
+    return usage_service.latency_percentiles(
+        histogram, min(lows, default=None), max(highs, default=None)
+    )
+
+
+def _stages(rollups) -> dict[str, float]:
+    """Mean milliseconds per expansion stage over rollup rows."""
+    stages: dict = {}
+    for r in rollups:
+        usage_service.merge_stages(stages, r.stages or {})
+    return usage_service.stage_means(stages)
+
+
+async def get_prompt_stats(db: AsyncSession, name: str, hours: int = 24) -> dict | None:
+    """Usage of one prompt over the last ``hours``, from the rollups.
+
+    Totals and latency percentiles overall and per version, plus a series per
+    rollup bucket: hourly for windows up to a week, daily beyond. None when
+    the prompt neither exists nor has usage in the window.
+    """
+    now = datetime.now(timezone.utc)
+    if hours <= 24 * 7:
+        model, since = UsageRollupHourly, usage_service.hour_start(now - timedelta(hours=hours))
+    else:
+        model, since = UsageRollupDaily, usage_service.day_start(now - timedelta(hours=hours))
+    rollups = (
+        await db.execute(
+            select(model)
+            .where(model.prompt_name == name, model.bucket_start >= since)
+            .order_by(model.bucket_start)
+        )
+    ).scalars().all()
+    if not rollups:
+        exists = await db.execute(select(Prompt.id).where(Prompt.name == name))
+        if exists.first() is None:
+            return None
+
+    def summary(rows) -> dict:
+        count = sum(r.count for r in rows)
+        errors = sum(r.count for r in rows if r.status_class != "2xx")
+        latency_sum = sum(r.latency_sum for r in rows)
+        return {
+            "count": count,
+            "error_rate_pct": round(errors / count * 100 if count else 0, 1),
+            "avg_latency_ms": round(latency_sum / count if count else 0, 1),
+            "latency_ms": _percentiles(rows),
+            "stages_ms": _stages(rows),
+        }
+
+    versions: dict[str, list] = {}
+    buckets: dict[datetime, list] = {}
+    for r in rollups:
+        versions.setdefault(r.prompt_version, []).append(r)
+        buckets.setdefault(r.bucket_start, []).append(r)
+    return {
+        "name": name,
+        "window_hours": hours,
+        "granularity": "hour" if model is UsageRollupHourly else "day",
+        **summary(rollups),
+        "versions": [
+            {"version": version, **summary(rows)} for version, rows in sorted(versions.items())
+        ],
+        "series": [
+            {"bucket_start": bucket_start.isoformat(), **summary(rows)}
+            for bucket_start, rows in buckets.items()
+        ],
+    }
+
+
+# Caller dimensions usage can be broken down by, each indexed with created_at
+USAGE_DIMENSIONS = {
+    "user": PromptUsage.user_id,
+    "project": PromptUsage.project_id,
+    "api_key": PromptUsage.api_key_id,
+}
+
+
+async def get_usage_by(
+    db: AsyncSession, dimension: str, value: uuid.UUID, hours: int = 24
+) -> dict:
+    """Usage by one user, project or API key over the last ``hours``, per prompt version.
+
+    Read from ``prompt_usage`` (the rollups have no caller), one range scan of
+    the dimension's (id, created_at) index; on Postgres only the partitions
+    covering the window are touched.
+    """
+    column = USAGE_DIMENSIONS[dimension]
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    count = func.count().label("count")
+    rows = (
+        await db.execute(
+            select(
+                PromptUsage.prompt_name,
+                PromptVersion.version,
+                count,
+                func.count().filter(PromptUsage.status_code >= 300).label("errors"),
+                func.sum(PromptUsage.latency_ms).label("latency_sum"),
+                func.max(PromptUsage.latency_ms).label("latency_max"),
+            )
+            .outerjoin(PromptVersion, PromptVersion.id == PromptUsage.prompt_version_id)
+            .where(column == value, PromptUsage.created_at >= since)
+            .group_by(PromptUsage.prompt_name, PromptVersion.version)
+            .order_by(count.desc(), PromptUsage.prompt_name, PromptVersion.version)
+        )
+    ).all()
+
+    def summary(count: int, errors: int, latency_sum: float) -> dict:
+        return {
+            "count": count,
+            "error_rate_pct": round(errors / count * 100 if count else 0, 1),
+            "avg_latency_ms": round(latency_sum / count if count else 0, 1),
+        }
+
+    return {
+        f"{dimension}_id": str(value),
+        "window_hours": hours,
+        **summary(
+            sum(r.count for r in rows),
+            sum(r.errors for r in rows),
+            sum(r.latency_sum or 0 for r in rows),
+        ),
+        "max_latency_ms": round(max((r.latency_max for r in rows), default=0), 1),
+        "prompts": [
+            {
+                "name": r.prompt_name,
+                "version": r.version,
+                **summary(r.count, r.errors, r.latency_sum or 0),
+            }
+            for r in rows
+        ],
+    }
+
+
+# The last dashboard computed, as (engine, expiry on the monotonic clock, stats),
+# and the computation in flight, as (engine, task)
+_dashboard: tuple[AsyncEngine, float, dict] | None = None
+_dashboard_refresh: tuple[AsyncEngine, asyncio.Task] | None = None
+
+
+async def get_cached_dashboard_stats(db: AsyncSession) -> dict:
+    """``get_dashboard_stats``, cached for ``metrics_dashboard_cache_seconds``.
+
+    Refreshes are single-flight: requests arriving while one is computed wait
+    for it instead of starting their own. The computation uses its own
+    connections, so a waiter going away (or being cancelled) doesn't affect
+    the others.
+    """
+    global _dashboard_refresh
+    bind = db.bind
+    if _dashboard and _dashboard[0] is bind and time.monotonic() < _dashboard[1]:
+        telemetry.cache_lookup("dashboard", True)
+        return _dashboard[2]
+    telemetry.cache_lookup("dashboard", False)
+    if _dashboard_refresh is None or _dashboard_refresh[0] is not bind or (
+        _dashboard_refresh[1].done()
+    ):
+        _dashboard_refresh = (bind, asyncio.create_task(_refresh_dashboard(db)))
+    return await asyncio.shield(_dashboard_refresh[1])
+
+
+async def _refresh_dashboard(db: AsyncSession) -> dict:
+    global _dashboard
+    stats = await get_dashboard_stats(db)
+    _dashboard = (db.bind, time.monotonic() + settings.metrics_dashboard_cache_seconds, stats)
+    return stats
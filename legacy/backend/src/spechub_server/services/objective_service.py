@@ -165,7 +165,11 @@ async def resolve_all_objectives(
     db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID | None = None
 ) -> list[str]:
     """Return a flat list of all effective objective titles for template injection."""
-    effective = await resolve_effective(db, user_id, project_id)
+    return flatten_objectives(await resolve_effective(db, user_id, project_id))
+
+
+def flatten_objectives(effective: EffectiveObjectivesResponse) -> list[str]:
+    """Flatten an already-resolved two-layer set into titles, inherited first."""
     titles = [o.title for o in effective.inherited]
     titles.extend(o.title for o in effective.local)
     return titles
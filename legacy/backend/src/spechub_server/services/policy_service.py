@@ -159,7 +159,11 @@ async def resolve_all_policies(
 ) -> list[PolicyResponse]:
     """Return a single merged list of all effective policies, ordered by priority.
     Inherited policies win ties."""
-    effective = await resolve_effective(db, user_id, project_id)
+    return flatten_policies(await resolve_effective(db, user_id, project_id))
+
+
+def flatten_policies(effective: EffectivePoliciesResponse) -> list[PolicyResponse]:
+    """Merge an already-resolved two-layer set into the ordering used for enforcement."""
     all_policies = []
     for p in effective.inherited:
         all_policies.append(p)
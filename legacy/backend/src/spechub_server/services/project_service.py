@@ -1,9 +1,9 @@
 import uuid
 
-from sqlalchemy import func, select
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.skillcanon_server.models import Project, ProjectMember
+from src.skillcanon_server.models import Project, ProjectMember, User
 from src.skillcanon_server.schemas import (
     ProjectCreate,
     ProjectListResponse,
@@ -58,6 +58,22 @@ async def get_project(db: AsyncSession, project_id: uuid.UUID) -> ProjectRespons
     return ProjectResponse.model_validate(project)
 
 
+async def can_access(db: AsyncSession, project_id: uuid.UUID, user: User) -> bool:
+    """Whether the project exists and ``user`` is an admin, its lead, a member or on its team."""
+    query = select(Project.id).where(Project.id == project_id)
+    if user.role != "admin":
+        query = query.where(
+            or_(
+                Project.lead_user_id == user.id,
+                Project.team_id == user.team_id,
+                Project.id.in_(
+                    select(ProjectMember.project_id).where(ProjectMember.user_id == user.id)
+                ),
+            )
+        )
+    return (await db.execute(query)).first() is not None
+
+
 async def update_project(
     db: AsyncSession, project_id: uuid.UUID, data: ProjectUpdate
 ) -> ProjectResponse | None:
@@ -1,12 +1,15 @@
 import re
+import time
 import uuid
 
 from jinja2 import StrictUndefined
 from jinja2.sandbox import SandboxedEnvironment
-from sqlalchemy import String, func, or_, select
+from sqlalchemy import String, exists, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from src.skillcanon_server import telemetry
 from src.skillcanon_server.models import Prompt, PromptShare, PromptVersion, User
 from src.skillcanon_server.schemas import (
     ExpandRequest,
@@ -19,6 +22,12 @@ from src.skillcanon_server.schemas import (
     PromptVersionResponse,
     ShareResponse,
 )
+from src.skillcanon_server.services import registry_service
+
+
+def build_search_document(name: str, description: str | None, tags: list[str]) -> str:
+    """Text indexed by search_service: name, description and latest-version tags."""
+    return " ".join(part for part in (name, description or "", " ".join(tags)) if part)
 
 
 def _prompt_response(prompt: Prompt) -> PromptResponse:
@@ -36,7 +45,12 @@ def _prompt_response(prompt: Prompt) -> PromptResponse:
 
 
 async def create_prompt(db: AsyncSession, data: PromptCreate) -> PromptResponse:
-    prompt = Prompt(name=data.name, description=data.description, user_id=data.user_id)
+    prompt = Prompt(
+        name=data.name,
+        description=data.description,
+        user_id=data.user_id,
+        search_document=build_search_document(data.name, data.description, data.version.tags),
+    )
     db.add(prompt)
     await db.flush()
 
@@ -49,6 +63,7 @@ async def create_prompt(db: AsyncSession, data: PromptCreate) -> PromptResponse:
         tags=data.version.tags,
     )
     db.add(version)
+    await registry_service.bump(db)
     await db.commit()
 
     result = await db.execute(
@@ -104,6 +119,36 @@ async def list_prompts(
     )
 
 
+def accessible_filter(user_id: uuid.UUID):
+    """WHERE clause for prompts the user owns or that have been shared with them."""
+    shared = exists().where(PromptShare.prompt_id == Prompt.id, PromptShare.user_id == user_id)
+    return or_(Prompt.user_id == user_id, shared)
+
+
+async def accessible_prompt_names(
+    db: AsyncSession, user_id: uuid.UUID, names: set[str]
+) -> set[str]:
+    """Subset of ``names`` the user owns or has been shared, in one query."""
+    if not names:
+        return set()
+    result = await db.execute(
+        select(Prompt.name).where(Prompt.name.in_(names), accessible_filter(user_id))
+    )
+    return set(result.scalars().all())
+
+
+async def can_access_prompt(db: AsyncSession, user_id: uuid.UUID, name: str) -> bool:
+    """Return True if the user owns the prompt or it has been shared with them.
+
+    Single indexed lookup: unique ``prompts.name`` plus the
+    ``prompt_shares(user_id, prompt_id)`` composite index.
+    """
+    result = await db.execute(
+        select(Prompt.id).where(Prompt.name == name, accessible_filter(user_id))
+    )
+    return result.first() is not None
+
+
 async def get_prompt(db: AsyncSession, name: str) -> PromptResponse | None:
     result = await db.execute(
         select(Prompt).where(Prompt.name == name).options(selectinload(Prompt.versions))
@@ -141,6 +186,8 @@ async def create_version(
         tags=data.tags,
     )
     db.add(version)
+    prompt.search_document = build_search_document(prompt.name, prompt.description, data.tags)
+    await registry_service.bump(db)
     await db.commit()
     await db.refresh(version)
     return PromptVersionResponse.model_validate(version)
@@ -152,6 +199,7 @@ async def deprecate_prompt(db: AsyncSession, name: str) -> bool:
     if not prompt:
         return False
     prompt.is_deprecated = True
+    await registry_service.bump(db)
     await db.commit()
     return True
 
@@ -172,17 +220,21 @@ async def pin_version(
     if not target:
         return None
     prompt.active_version_id = target.id
+    await registry_service.bump(db)
     await db.commit()
     await db.refresh(prompt)
     return _prompt_response(prompt)
 
 
-async def _fetch_prompt_version(
-    db: AsyncSession, name: str, version: str | None = None
-) -> PromptVersion | None:
-    query = select(Prompt).where(Prompt.name == name).options(selectinload(Prompt.versions))
-    result = await db.execute(query)
-    prompt = result.scalar_one_or_none()
+def _select_version(prompt: Prompt | None, version: str | None = None) -> PromptVersion | None:
+    pv = _pick_version(prompt, version)
+    if pv is not None:
+        # Keep the prompt loaded (and in the session) for as long as its version
+        set_committed_value(pv, "prompt", prompt)
+    return pv
+
+
+def _pick_version(prompt: Prompt | None, version: str | None) -> PromptVersion | None:
     if not prompt or not prompt.versions or prompt.is_deprecated:
         return None
     if version:
@@ -194,6 +246,80 @@ async def _fetch_prompt_version(
     return prompt.versions[0]
 
 
+async def _fetch_prompt_version(
+    db: AsyncSession, name: str, version: str | None = None
+) -> PromptVersion | None:
+    query = select(Prompt).where(Prompt.name == name).options(selectinload(Prompt.versions))
+    result = await db.execute(query)
+    return _select_version(result.scalar_one_or_none(), version)
+
+
+async def prefetch_versions(db: AsyncSession, names: set[str]) -> dict[str, PromptVersion]:
+    """Resolve the active version of each prompt and of everything it includes.
+
+    One bulk query per include level instead of one per prompt; the result can
+    be handed to ``expand_prompt`` as ``prompt_cache``. Deprecated and unknown
+    names are simply absent.
+    """
+    cache: dict[str, PromptVersion] = {}
+    seen: set[str] = set()
+    pending = set(names)
+    for _ in range(MAX_INCLUDE_DEPTH + 1):
+        pending -= seen
+        if not pending:
+            break
+        seen |= pending
+        result = await db.execute(
+            select(Prompt).where(Prompt.name.in_(pending)).options(selectinload(Prompt.versions))
+        )
+        fetched = {}
+        for prompt in result.scalars().all():
+            pv = _select_version(prompt)
+            if pv:
+                fetched[prompt.name] = pv
+        cache.update(fetched)
+        pending = set()
+        for pv in fetched.values():
+            pending |= _included_names(pv.system_template) | _included_names(pv.user_template)
+    return cache
+
+
+async def resolve_versions(
+    db: AsyncSession, refs: set[tuple[str, str | None]]
+) -> dict[tuple[str, str | None], PromptVersion]:
+    """Bulk ``resolve_version`` for ``(name, version)`` pairs in one query.
+
+    A ``None`` version means the pinned or newest one. Unknown, deprecated and
+    unmatched references are absent from the result.
+    """
+    if not refs:
+        return {}
+    result = await db.execute(
+        select(Prompt)
+        .where(Prompt.name.in_({name for name, _ in refs}))
+        .options(selectinload(Prompt.versions))
+    )
+    prompts = {prompt.name: prompt for prompt in result.scalars().all()}
+    resolved = {}
+    for name, version in refs:
+        pv = _select_version(prompts.get(name), version)
+        if pv:
+            resolved[(name, version)] = pv
+    return resolved
+
+
+async def resolve_version(
+    db: AsyncSession,
+    name: str,
+    version: str | None = None,
+    version_id: uuid.UUID | None = None,
+) -> PromptVersion | None:
+    """The version a run renders: ``version_id`` if known, else explicit, pinned or newest."""
+    if version_id:
+        return await db.get(PromptVersion, version_id)
+    return await _fetch_prompt_version(db, name, version)
+
+
 def _render_template(
     env: SandboxedEnvironment, template_str: str, variables: dict
 ) -> str:
@@ -227,9 +353,7 @@ def _build_include_prompt(
     return include_prompt
 
 
-async def _prefetch_included_prompts(
-    db: AsyncSession, template_str: str | None
-) -> set[str]:
+def _included_names(template_str: str | None) -> set[str]:
     if not template_str:
         return set()
     return set(re.findall(r"include_prompt\(['\"]([a-z0-9-]+)['\"]\)", template_str))
@@ -271,86 +395,176 @@ async def expand_prompt(
     data: ExpandRequest,
     version: str | None = None,
     user_id: uuid.UUID | None = None,
+    policies: list[PolicyResponse] | None = None,
+    objectives: list[str] | None = None,
+    version_id: uuid.UUID | None = None,
+    prompt_cache: dict[str, PromptVersion] | None = None,
+    timer: telemetry.StageTimer | None = None,
 ) -> ExpandResponse | None:
-    pv = await _fetch_prompt_version(db, name, version)
+    """Render a prompt with governance applied.
+
+    Callers that have already resolved governance for ``user_id`` (e.g. the MCP
+    tool pipeline) pass ``policies``/``objectives`` to skip re-resolving them,
+    and callers that already know which version to render pass ``version_id``
+    to load just that row. ``prompt_cache`` (see ``prefetch_versions``) supplies
+    active versions of the prompt and its includes so no per-name lookups run.
+
+    ``timer`` receives the time spent in each stage: "lookup" (the version),
+    "governance", "includes" (prefetching included prompts), "compile" and
+    "render".
+    """
+    timer = timer or telemetry.StageTimer()
+    prompt_cache = dict(prompt_cache or {})
+    with timer.stage("lookup"):
+        pv = None
+        if version is None and version_id is None:
+            pv = prompt_cache.get(name)
+        if not pv:
+            pv = await resolve_version(db, name, version, version_id)
     if not pv:
         return None
 
-    # Resolve policies and objectives if user context is available
-    applied_policy_names: list[str] = []
-    objective_titles: list[str] = []
-    effective_user_id = user_id
+    with timer.stage("governance"):
+        effective_user_id = user_id
 
-    # If no explicit user_id, try to get it from the prompt's owner
-    if not effective_user_id:
-        prompt_result = await db.execute(
-            select(Prompt).where(Prompt.name == name)
-        )
-        prompt_obj = prompt_result.scalar_one_or_none()
-        if prompt_obj:
-            effective_user_id = prompt_obj.user_id
+        # If no explicit user_id, try to get it from the prompt's owner (usually
+        # already in the session from the version lookup, so no query runs)
+        if not effective_user_id and policies is None:
+            prompt_obj = await db.get(Prompt, pv.prompt_id)
+            if prompt_obj:
+                effective_user_id = prompt_obj.user_id
+
+        if effective_user_id and policies is None:
+            from src.skillcanon_server.services import objective_service, policy_service
 
+            policies = await policy_service.resolve_all_policies(
+                db, effective_user_id, data.project_id
+            )
+            objectives = await objective_service.resolve_all_objectives(
+                db, effective_user_id, data.project_id
+            )
+
+    with timer.stage("includes"):
+        fetch_queue = list(template_includes(pv, policies))
+        seen = set()
+        for _ in range(MAX_INCLUDE_DEPTH):
+            next_queue: list[str] = []
+            for ref_name in fetch_queue:
+                if ref_name in seen:
+                    continue
+                seen.add(ref_name)
+                ref_pv = prompt_cache.get(ref_name) or await _fetch_prompt_version(db, ref_name)
+                if ref_pv:
+                    prompt_cache[ref_name] = ref_pv
+                    next_queue += list(
+                        _included_names(ref_pv.system_template)
+                        | _included_names(ref_pv.user_template)
+                    )
+            fetch_queue = next_queue
+            if not fetch_queue:
+                break
+
+    return render_prompt(name, pv, data, policies, objectives, prompt_cache, timer)
+
+
+def template_includes(pv: PromptVersion, policies: list[PolicyResponse] | None = None) -> set[str]:
+    """Prompt names ``pv`` includes directly, counting includes policies add to it."""
+    names = _included_names(pv.system_template) | _included_names(pv.user_template)
+    for policy in policies or ():
+        if policy.is_active:
+            names |= _included_names(policy.content)
+    return names
+
+
+def render_prompt(
+    name: str,
+    pv: PromptVersion,
+    data: ExpandRequest,
+    policies: list[PolicyResponse] | None = None,
+    objectives: list[str] | None = None,
+    prompt_cache: dict[str, PromptVersion] | None = None,
+    timer: telemetry.StageTimer | None = None,
+) -> ExpandResponse:
+    """Render an already-resolved version: no database access, just templating.
+
+    ``policies`` (None means no governance) are applied as ``expand_prompt``
+    would, and ``prompt_cache`` must hold everything reachable through
+    ``include_prompt``; a name missing from it renders as "prompt not found".
+    """
+    result = render_many(name, pv, [data.input], policies, objectives, prompt_cache, timer)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def render_many(
+    name: str,
+    pv: PromptVersion,
+    inputs: list[dict],
+    policies: list[PolicyResponse] | None = None,
+    objectives: list[str] | None = None,
+    prompt_cache: dict[str, PromptVersion] | None = None,
+    timer: telemetry.StageTimer | None = None,
+) -> list[ExpandResponse | Exception]:
+    """``render_prompt`` over many inputs, applying governance and compiling once.
+
+    Returns one entry per input: its rendering, or the exception rendering it
+    raised. ``timer`` receives the "compile" and "render" (all inputs) stages.
+    """
+    timer = timer or telemetry.StageTimer()
+    applied_policy_names: list[str] = []
+    objective_titles: list[str] = []
     system_tpl = pv.system_template
     user_tpl = pv.user_template or "{{ input }}"
-    template_vars = dict(data.input)
+    governance_vars: dict = {}
 
-    if effective_user_id:
-        from src.skillcanon_server.services import objective_service, policy_service
-
-        all_policies = await policy_service.resolve_all_policies(
-            db, effective_user_id, data.project_id
-        )
-        system_tpl, user_tpl, applied_policy_names = _apply_policies(
-            system_tpl, user_tpl, all_policies, template_vars
-        )
-        objective_titles = await objective_service.resolve_all_objectives(
-            db, effective_user_id, data.project_id
-        )
-        if objective_titles:
-            template_vars["objectives"] = "\n".join(objective_titles)
-
-    referenced_names: set[str] = set()
-    referenced_names |= await _prefetch_included_prompts(db, system_tpl)
-    referenced_names |= await _prefetch_included_prompts(db, user_tpl)
-
-    prompt_cache: dict[str, PromptVersion] = {}
-    fetch_queue = list(referenced_names)
-    seen = set()
-    for _ in range(MAX_INCLUDE_DEPTH):
-        next_queue: list[str] = []
-        for ref_name in fetch_queue:
-            if ref_name in seen:
+    with timer.stage("compile"):
+        if policies is not None:
+            system_tpl, user_tpl, applied_policy_names = _apply_policies(
+                system_tpl, user_tpl, policies, governance_vars
+            )
+            objective_titles = list(objectives or [])
+            if objective_titles:
+                governance_vars["objectives"] = "\n".join(objective_titles)
+
+        # include_prompt renders with the variables of the input being rendered
+        template_vars: dict = {}
+        env = SandboxedEnvironment(undefined=StrictUndefined)
+        include_fn = _build_include_prompt(prompt_cache or {}, env, template_vars, depth=0)
+        env.globals["include_prompt"] = include_fn
+        try:
+            system_compiled = env.from_string(system_tpl) if system_tpl else None
+            user_compiled = env.from_string(user_tpl)
+        except Exception as e:
+            return [e] * len(inputs)
+
+    results: list[ExpandResponse | Exception] = []
+    with timer.stage("render"):
+        for variables in inputs:
+            template_vars.clear()
+            template_vars.update(variables)
+            template_vars.update(governance_vars)
+            started = time.perf_counter()
+            try:
+                system_message = system_compiled.render(template_vars) if system_compiled else None
+                user_message = user_compiled.render(template_vars)
+            except Exception as e:
+                results.append(e)
                 continue
-            seen.add(ref_name)
-            ref_pv = await _fetch_prompt_version(db, ref_name)
-            if ref_pv:
-                prompt_cache[ref_name] = ref_pv
-                next_queue += list(
-                    await _prefetch_included_prompts(db, ref_pv.system_template)
-                    | await _prefetch_included_prompts(db, ref_pv.user_template)
+            finally:
+                telemetry.expand_render_duration.observe(time.perf_counter() - started)
+            results.append(
+                ExpandResponse(
+                    prompt_name=name,
+                    prompt_version=pv.version,
+                    prompt_version_id=pv.id,
+                    system_message=system_message,
+                    user_message=user_message,
+                    applied_policies=applied_policy_names,
+                    objectives=objective_titles,
                 )
-        fetch_queue = next_queue
-        if not fetch_queue:
-            break
-
-    env = SandboxedEnvironment(undefined=StrictUndefined)
-    include_fn = _build_include_prompt(prompt_cache, env, template_vars, depth=0)
-    env.globals["include_prompt"] = include_fn
-
-    system_message = None
-    if system_tpl:
-        system_message = _render_template(env, system_tpl, template_vars)
-
-    user_message = _render_template(env, user_tpl, template_vars)
-
-    return ExpandResponse(
-        prompt_name=name,
-        prompt_version=pv.version,
-        system_message=system_message,
-        user_message=user_message,
-        applied_policies=applied_policy_names,
-        objectives=objective_titles,
-    )
+            )
+    return results
 
 
 async def get_all_prompt_names(db: AsyncSession) -> list[str]:
@@ -384,6 +598,7 @@ async def share_prompt(
         )
     share = PromptShare(prompt_id=prompt.id, user_id=target_user_id)
     db.add(share)
+    await registry_service.bump(db)
     await db.commit()
     await db.refresh(share)
     user = (await db.execute(select(User).where(User.id == target_user_id))).scalar_one()
@@ -412,6 +627,7 @@ async def unshare_prompt(
     if not share:
         return False
     await db.delete(share)
+    await registry_service.bump(db)
     await db.commit()
     return True
 
@@ -0,0 +1,44 @@
+"""Registry revision counter.
+
+A single row bumped inside the same transaction as every change to prompts,
+versions, shares and workflows. MCP sessions compare it with the revision their
+cached catalog and ACL decisions were built at, which keeps those caches a pure
+optimization across workers: one primary-key read tells them whether anything
+changed anywhere.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.skillcanon_server.models import RegistryState
+
+_ROW_ID = 1
+
+
+async def bump(db: AsyncSession) -> None:
+    """Advance the revision; takes effect when the caller commits.
+
+    One upsert, so concurrent first writes cannot race to insert the row:
+    migration 006 seeds it, but databases built with ``create_all`` start empty.
+    Every registry write updates this one row, and the row stays locked until
+    the transaction ends, so call this last, right before committing. Pending
+    changes are flushed first so their statements run before the lock is taken.
+    """
+    await db.flush()
+    dialect_insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    await db.execute(
+        dialect_insert(RegistryState)
+        .values(id=_ROW_ID, revision=1)
+        .on_conflict_do_update(
+            index_elements=[RegistryState.id],
+            set_={"revision": RegistryState.revision + 1},
+        )
+    )
+
+
+async def current(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(RegistryState.revision).where(RegistryState.id == _ROW_ID)
+    )
+    return result.scalar_one_or_none() or 0
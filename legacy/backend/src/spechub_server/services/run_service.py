@@ -0,0 +1,357 @@
+"""Asynchronous workflow runs.
+
+``submit_run`` persists a queued ``WorkflowRun`` and returns immediately; a
+``RunWorkerPool`` of in-process workers claims runs from the database and
+executes them with ``workflow_service.run_workflow``, recording each step as a
+``WorkflowStepRun`` as it finishes.
+
+A claim is a lease: the claiming worker's id plus an expiry, renewed by a
+heartbeat for as long as the run executes (however long a single step takes)
+and checked as each step is recorded. If a worker dies mid-run the lease lapses
+and any worker (on any process sharing the database) claims the run again and
+re-executes it from the start, up to ``MAX_ATTEMPTS`` times. A worker whose
+lease was taken over stops executing.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, exists, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from src.skillcanon_server.config import settings
+from src.skillcanon_server.models import Workflow, WorkflowRun, WorkflowShare, WorkflowStepRun
+from src.skillcanon_server.schemas import (
+    WorkflowRunRequest,
+    WorkflowRunStatus,
+    WorkflowStepResult,
+)
+from src.skillcanon_server.services import workflow_service
+
+logger = logging.getLogger("skillcanon.runs")
+
+MAX_ATTEMPTS = 3
+
+
+class LeaseLost(Exception):
+    """Another worker claimed the run after this worker's lease expired."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _run_status(run: WorkflowRun) -> WorkflowRunStatus:
+    return WorkflowRunStatus(
+        id=run.id,
+        workflow_id=run.workflow_id,
+        user_id=run.user_id,
+        status=run.status,
+        attempts=run.attempts,
+        error=run.error,
+        outputs=run.outputs,
+        steps=[WorkflowStepResult.model_validate(s, from_attributes=True) for s in run.steps],
+        created_at=run.created_at,
+        started_at=run.started_at,
+        finished_at=run.finished_at,
+    )
+
+
+async def submit_run(
+    db: AsyncSession,
+    workflow_id: uuid.UUID,
+    data: WorkflowRunRequest,
+    user_id: uuid.UUID | None = None,
+) -> WorkflowRunStatus | None:
+    if not await db.get(Workflow, workflow_id):
+        return None
+    run = WorkflowRun(
+        workflow_id=workflow_id,
+        user_id=user_id,
+        input=data.input,
+        max_parallel=data.max_parallel,
+        on_error=data.on_error,
+    )
+    db.add(run)
+    await db.commit()
+    return await get_run(db, run.id)
+
+
+async def get_run(
+    db: AsyncSession, run_id: uuid.UUID, viewer_id: uuid.UUID | None = None
+) -> WorkflowRunStatus | None:
+    """The run's status and recorded steps.
+
+    With ``viewer_id`` only a run that user submitted, or one of a workflow they
+    own or have been shared, is returned; any other run reads as missing.
+    """
+    query = select(WorkflowRun).where(WorkflowRun.id == run_id)
+    if viewer_id is not None:
+        visible_workflow = exists().where(
+            Workflow.id == WorkflowRun.workflow_id,
+            or_(
+                Workflow.user_id == viewer_id,
+                exists().where(
+                    WorkflowShare.workflow_id == Workflow.id, WorkflowShare.user_id == viewer_id
+                ),
+            ),
+        )
+        query = query.where(or_(WorkflowRun.user_id == viewer_id, visible_workflow))
+    result = await db.execute(
+        query.options(selectinload(WorkflowRun.steps)).execution_options(populate_existing=True)
+    )
+    run = result.scalar_one_or_none()
+    if not run:
+        return None
+    return _run_status(run)
+
+
+def _claimable(now: datetime):
+    return or_(
+        WorkflowRun.status == "queued",
+        and_(WorkflowRun.status == "running", WorkflowRun.lease_expires_at < now),
+    )
+
+
+async def claim_run(
+    db: AsyncSession, worker_id: str, lease_seconds: float | None = None
+) -> uuid.UUID | None:
+    """Lease the oldest claimable run to ``worker_id``; None when the queue is empty.
+
+    The candidate is locked with SKIP LOCKED where the database supports it, and
+    the conditional UPDATE re-checks claimability, so two workers racing for
+    the same run cannot both win.
+    """
+    now = _now()
+    lease = timedelta(seconds=lease_seconds or settings.workflow_run_lease_seconds)
+    candidate = (
+        await db.execute(
+            select(WorkflowRun.id)
+            .where(_claimable(now))
+            .order_by(WorkflowRun.created_at, WorkflowRun.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+    ).scalar_one_or_none()
+    if candidate is None:
+        await db.rollback()
+        return None
+    result = await db.execute(
+        update(WorkflowRun)
+        .where(WorkflowRun.id == candidate, _claimable(now))
+        .values(
+            status="running",
+            lease_owner=worker_id,
+            lease_expires_at=now + lease,
+            attempts=WorkflowRun.attempts + 1,
+            started_at=now,
+        )
+    )
+    await db.commit()
+    return candidate if result.rowcount == 1 else None
+
+
+async def _finish(
+    db: AsyncSession,
+    run_id: uuid.UUID,
+    worker_id: str,
+    status: str,
+    outputs: dict | None = None,
+    error: str | None = None,
+) -> None:
+    # Guarded by the lease so a worker that lost its run cannot overwrite the new owner
+    await db.execute(
+        update(WorkflowRun)
+        .where(WorkflowRun.id == run_id, WorkflowRun.lease_owner == worker_id)
+        .values(
+            status=status,
+            outputs=outputs,
+            error=error,
+            finished_at=_now(),
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+    )
+    await db.commit()
+
+
+async def _keep_lease(
+    session_factory: async_sessionmaker, run_id: uuid.UUID, worker_id: str, lease: timedelta
+) -> None:
+    """Renew the lease every third of its length; returns once another worker holds it."""
+    while True:
+        await asyncio.sleep(lease.total_seconds() / 3)
+        try:
+            async with session_factory() as db:
+                renewed = await db.execute(
+                    update(WorkflowRun)
+                    .where(WorkflowRun.id == run_id, WorkflowRun.lease_owner == worker_id)
+                    .values(lease_expires_at=_now() + lease)
+                )
+                await db.commit()
+        except Exception:
+            logger.warning("Could not renew the lease on workflow run %s", run_id, exc_info=True)
+            continue
+        if renewed.rowcount == 0:
+            return
+
+
+async def execute_run(
+    session_factory: async_sessionmaker,
+    run_id: uuid.UUID,
+    worker_id: str,
+    lease_seconds: float | None = None,
+) -> None:
+    """Execute a run this worker has claimed, persisting steps as they finish."""
+    lease = timedelta(seconds=lease_seconds or settings.workflow_run_lease_seconds)
+    async with session_factory() as db:
+        run = await db.get(WorkflowRun, run_id)
+        if run.attempts > MAX_ATTEMPTS:
+            await _finish(
+                db, run_id, worker_id, "failed", error=f"Gave up after {MAX_ATTEMPTS} attempts"
+            )
+            return
+        workflow_id, run_input = run.workflow_id, dict(run.input or {})
+        max_parallel, on_error = run.max_parallel, run.on_error
+        # A reclaimed run starts over; drop whatever the previous attempt recorded
+        await db.execute(delete(WorkflowStepRun).where(WorkflowStepRun.run_id == run_id))
+        await db.commit()
+
+        async def record(position: int, result: WorkflowStepResult) -> None:
+            renewed = await db.execute(
+                update(WorkflowRun)
+                .where(WorkflowRun.id == run_id, WorkflowRun.lease_owner == worker_id)
+                .values(lease_expires_at=_now() + lease)
+            )
+            if renewed.rowcount == 0:
+                raise LeaseLost(str(run_id))
+            db.add(WorkflowStepRun(run_id=run_id, position=position, **result.model_dump()))
+            await db.commit()
+
+        run_task = asyncio.ensure_future(
+            workflow_service.run_workflow(
+                db,
+                workflow_id,
+                run_input,
+                max_parallel=max_parallel,
+                on_error=on_error,
+                on_step=record,
+            )
+        )
+        heartbeat = asyncio.create_task(_keep_lease(session_factory, run_id, worker_id, lease))
+        try:
+            await asyncio.wait({run_task, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+            if not run_task.done():
+                raise LeaseLost(str(run_id))
+            result = run_task.result()
+        except LeaseLost:
+            await db.rollback()
+            logger.warning("Worker %s lost the lease on workflow run %s", worker_id, run_id)
+            return
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Workflow run %s failed", run_id)
+            await _finish(db, run_id, worker_id, "failed", error=str(e))
+            return
+        finally:
+            for task in (run_task, heartbeat):
+                task.cancel()
+            await asyncio.gather(run_task, heartbeat, return_exceptions=True)
+
+        if result is None:
+            await _finish(db, run_id, worker_id, "failed", error="Workflow not found")
+        elif all(step.status == "success" for step in result.steps):
+            await _finish(db, run_id, worker_id, "succeeded", outputs=result.outputs)
+        else:
+            await _finish(
+                db,
+                run_id,
+                worker_id,
+                "failed",
+                outputs=result.outputs,
+                error="One or more steps failed",
+            )
+
+
+async def process_next(
+    session_factory: async_sessionmaker, worker_id: str, lease_seconds: float | None = None
+) -> bool:
+    """Claim and execute one run. Returns False when there was nothing to claim."""
+    async with session_factory() as db:
+        run_id = await claim_run(db, worker_id, lease_seconds)
+    if run_id is None:
+        return False
+    await execute_run(session_factory, run_id, worker_id, lease_seconds)
+    return True
+
+
+class RunWorkerPool:
+    """A bounded set of in-process workers draining the workflow run queue.
+
+    Workers poll every ``poll_seconds`` when idle; ``wake()`` (called on submit)
+    lets them pick new runs up immediately. Stopping cancels in-flight runs,
+    whose leases then lapse and are reclaimed.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(
+        self,
+        session_factory: async_sessionmaker,
+        size: int | None = None,
+        poll_seconds: float | None = None,
+        lease_seconds: float | None = None,
+    ) -> None:
+        size = settings.workflow_run_workers if size is None else size
+        poll = settings.workflow_run_poll_seconds if poll_seconds is None else poll_seconds
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = [
+            asyncio.create_task(
+                self._work(session_factory, f"{prefix}:{n}", poll, lease_seconds)
+            )
+            for n in range(size)
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def _work(
+        self,
+        session_factory: async_sessionmaker,
+        worker_id: str,
+        poll_seconds: float,
+        lease_seconds: float | None,
+    ) -> None:
+        while True:
+            try:
+                claimed = await process_next(session_factory, worker_id, lease_seconds)
+            except Exception:
+                logger.warning("Workflow run worker %s failed", worker_id, exc_info=True)
+                claimed = False
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+worker_pool = RunWorkerPool()
@@ -0,0 +1,289 @@
+"""Prompt search: name, description and latest-version tags.
+
+On Postgres the query runs against ``prompts.search_document`` using the
+full-text (prefix tsquery) and trigram (substring) GIN indexes created in
+migration 005. Other dialects (SQLite in tests and local dev) fall back to an
+in-process inverted index that is rebuilt whenever the registry revision
+(``registry_service``) moves. Both paths rank, paginate and apply owner-or-shared ACL filtering
+before results leave the service.
+"""
+
+import bisect
+import re
+import uuid
+from dataclasses import dataclass, field
+
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.skillcanon_server import telemetry
+from src.skillcanon_server.models import Prompt, PromptShare, PromptVersion
+from src.skillcanon_server.schemas import PromptSearchResponse, PromptSearchResult
+from src.skillcanon_server.services import prompt_service, registry_service
+
+# Per-field weights for the inverted index; exact token hits score double a prefix hit.
+_NAME_WEIGHT = 3.0
+_TAG_WEIGHT = 2.0
+_DESCRIPTION_WEIGHT = 1.0
+_EXACT_NAME_BONUS = 10.0
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+def weighted_terms(
+    name: str, description: str | None, tags: list[str]
+) -> tuple[tuple[str, float], ...]:
+    """Distinct tokens of a prompt with the weight of the strongest field they appear in."""
+    weights: dict[str, float] = {}
+    for weight, text in (
+        (_NAME_WEIGHT, name),
+        (_TAG_WEIGHT, " ".join(tags)),
+        (_DESCRIPTION_WEIGHT, description),
+    ):
+        for token in tokenize(text):
+            if weights.get(token, 0.0) < weight:
+                weights[token] = weight
+    return tuple(weights.items())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_prompts(
+    db: AsyncSession,
+    query: str,
+    page: int = 1,
+    page_size: int = 20,
+    user_id: uuid.UUID | None = None,
+) -> PromptSearchResponse:
+    """Ranked, paginated search over non-deprecated prompts visible to ``user_id``."""
+    terms = tokenize(query)
+    if not terms:
+        return PromptSearchResponse(query=query, items=[], total=0, page=page, page_size=page_size)
+
+    if db.bind.dialect.name == "postgresql":
+        items, total = await _search_postgres(db, query, terms, page, page_size, user_id)
+    else:
+        items, total = await _search_fallback(db, query, terms, page, page_size, user_id)
+    return PromptSearchResponse(
+        query=query, items=items, total=total, page=page, page_size=page_size
+    )
+
+
+# ---------------------------------------------------------------------------
+# Postgres: full-text + trigram
+# ---------------------------------------------------------------------------
+
+async def _search_postgres(
+    db: AsyncSession,
+    query: str,
+    terms: list[str],
+    page: int,
+    page_size: int,
+    user_id: uuid.UUID | None,
+) -> tuple[list[PromptSearchResult], int]:
+    # Must match the indexed expressions of migration 005 exactly; a bound ''
+    # parameter here would keep the planner off both GIN indexes.
+    document = func.coalesce(Prompt.search_document, literal_column("''"))
+    vector = func.to_tsvector(literal_column("'simple'::regconfig"), document)
+    # Terms come from tokenize(), so they are plain [a-z0-9]+ and safe in tsquery syntax.
+    tsquery = func.to_tsquery(
+        literal_column("'simple'::regconfig"), " & ".join(f"{t}:*" for t in terms)
+    )
+    match = or_(
+        vector.op("@@")(tsquery),
+        document.ilike(f"%{_escape_like(query)}%", escape="\\"),
+    )
+    rank = (func.ts_rank(vector, tsquery) + func.similarity(Prompt.name, query.lower())).label(
+        "score"
+    )
+
+    filters = [match, Prompt.is_deprecated.is_(False)]
+    if user_id:
+        filters.append(prompt_service.accessible_filter(user_id))
+
+    total = (
+        await db.execute(select(func.count()).select_from(Prompt).where(*filters))
+    ).scalar_one()
+    rows = (
+        await db.execute(
+            select(Prompt.id, Prompt.name, Prompt.description, rank)
+            .where(*filters)
+            .order_by(rank.desc(), Prompt.name)
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+    ).all()
+
+    tags = await _latest_tags(db, [row.id for row in rows])
+    items = [
+        PromptSearchResult(
+            id=row.id,
+            name=row.name,
+            description=row.description,
+            tags=tags.get(row.id, []),
+            score=round(float(row.score), 4),
+        )
+        for row in rows
+    ]
+    return items, total
+
+
+async def _latest_tags(
+    db: AsyncSession, prompt_ids: list[uuid.UUID] | None = None
+) -> dict[uuid.UUID, list]:
+    """Map prompt id -> tags of its newest version (all prompts when ids is None)."""
+    query = select(PromptVersion.prompt_id, PromptVersion.tags).order_by(
+        PromptVersion.prompt_id, PromptVersion.created_at.desc()
+    )
+    if prompt_ids is not None:
+        if not prompt_ids:
+            return {}
+        query = query.where(PromptVersion.prompt_id.in_(prompt_ids))
+    result = await db.execute(query)
+    tags: dict[uuid.UUID, list] = {}
+    for prompt_id, version_tags in result.all():
+        tags.setdefault(prompt_id, list(version_tags or []))
+    return tags
+
+
+# ---------------------------------------------------------------------------
+# Fallback: in-process inverted index
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class _Doc:
+    id: uuid.UUID
+    name: str
+    description: str | None
+    tags: list[str]
+    owner_id: uuid.UUID | None
+
+
+@dataclass
+class _InvertedIndex:
+    revision: int
+    docs: dict[uuid.UUID, _Doc] = field(default_factory=dict)
+    postings: dict[str, dict[uuid.UUID, float]] = field(default_factory=dict)
+    vocabulary: list[str] = field(default_factory=list)
+
+    def add(self, doc: _Doc) -> None:
+        self.docs[doc.id] = doc
+        for token, weight in weighted_terms(doc.name, doc.description, doc.tags):
+            self.postings.setdefault(token, {})[doc.id] = weight
+
+    def freeze(self) -> None:
+        self.vocabulary = sorted(self.postings)
+
+    def match(self, term: str) -> dict[uuid.UUID, float]:
+        """Score every doc containing a token that equals or starts with ``term``."""
+        scores: dict[uuid.UUID, float] = {}
+        vocabulary = self.vocabulary
+        i = bisect.bisect_left(vocabulary, term)
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            token = vocabulary[i]
+            i += 1
+            factor = 2.0 if token == term else 1.0
+            for doc_id, weight in self.postings[token].items():
+                score = weight * factor
+                if scores.get(doc_id, 0.0) < score:
+                    scores[doc_id] = score
+        return scores
+
+
+# Rebuilds are idempotent, so concurrent misses may race; the last one wins.
+_index: _InvertedIndex | None = None
+
+
+async def _get_index(db: AsyncSession) -> _InvertedIndex:
+    global _index
+    revision = await registry_service.current(db)
+    if _index is not None and _index.revision == revision:
+        telemetry.cache_lookup("search_index", True)
+        return _index
+    telemetry.cache_lookup("search_index", False)
+    index = _InvertedIndex(revision=revision)
+    prompts = (
+        await db.execute(
+            select(Prompt.id, Prompt.name, Prompt.description, Prompt.user_id).where(
+                Prompt.is_deprecated.is_(False)
+            )
+        )
+    ).all()
+    tags = await _latest_tags(db)
+    for row in prompts:
+        index.add(
+            _Doc(
+                id=row.id,
+                name=row.name,
+                description=row.description,
+                tags=tags.get(row.id, []),
+                owner_id=row.user_id,
+            )
+        )
+    index.freeze()
+    _index = index
+    return index
+
+
+async def _search_fallback(
+    db: AsyncSession,
+    query: str,
+    terms: list[str],
+    page: int,
+    page_size: int,
+    user_id: uuid.UUID | None,
+) -> tuple[list[PromptSearchResult], int]:
+    index = await _get_index(db)
+
+    scores: dict[uuid.UUID, float] | None = None
+    for term in terms:
+        term_scores = index.match(term)
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {
+                doc_id: score + term_scores[doc_id]
+                for doc_id, score in scores.items()
+                if doc_id in term_scores
+            }
+        if not scores:
+            return [], 0
+
+    if user_id:
+        shared = set(
+            (
+                await db.execute(
+                    select(PromptShare.prompt_id).where(PromptShare.user_id == user_id)
+                )
+            ).scalars()
+        )
+        scores = {
+            doc_id: score
+            for doc_id, score in scores.items()
+            if index.docs[doc_id].owner_id == user_id or doc_id in shared
+        }
+
+    normalized = query.strip().lower()
+    for doc_id in scores:
+        if index.docs[doc_id].name == normalized:
+            scores[doc_id] += _EXACT_NAME_BONUS
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], index.docs[item[0]].name))
+    offset = (page - 1) * page_size
+    items = []
+    for doc_id, score in ranked[offset:offset + page_size]:
+        doc = index.docs[doc_id]
+        items.append(
+            PromptSearchResult(
+                id=doc.id, name=doc.name, description=doc.description, tags=doc.tags, score=score
+            )
+        )
+    return items, len(ranked)
@@ -0,0 +1,687 @@
+"""Write-behind recording of prompt usage.
+
+Expand requests hand their ``PromptUsage`` row to ``usage_recorder`` instead of
+inserting it on the request's own session. Rows wait in a bounded in-process
+buffer and a background flusher writes them in bulk, every ``flush_rows`` rows
+or ``flush_ms`` milliseconds, whichever comes first: one multi-row ``INSERT``
+per batch, or ``COPY`` on Postgres. Stopping the recorder flushes what is left.
+
+When the buffer is full, ``overflow`` decides what gives:
+
+- ``drop_newest``: the new row is discarded (the request never waits)
+- ``drop_oldest``: the oldest buffered row is discarded to make room
+- ``block``: the request waits until the flusher has made room
+
+Rows are timestamped when recorded, not when written. A batch that fails to
+write is retried one row at a time, and rows that still fail are logged and
+dropped; usage is best effort and never fails a request.
+
+Every write also folds its rows into the hourly and daily rollup tables in the
+same transaction (``apply_rollups``), which is what the dashboard reads. Rows
+may carry the time spent in each expansion stage; the rollups keep a count and
+total per stage so latency can be broken down by stage.
+
+On Postgres ``prompt_usage`` is range-partitioned by month (migration 013).
+``maintain_partitions``, run periodically for the app's lifetime, creates the
+partitions for the coming months and drops those entirely older than the
+retention period; on other databases it deletes expired rows instead.
+
+``stream_usage`` reads raw rows back for export through a server-side cursor.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.skillcanon_server.config import settings
+from src.skillcanon_server.models import (
+    PromptUsage,
+    PromptVersion,
+    UsageRollupDaily,
+    UsageRollupHourly,
+)
+
+logger = logging.getLogger("skillcanon.usage")
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+# prompt_usage columns a usage row fills; the key comes from the table's sequence
+_COLUMNS = (
+    "prompt_name",
+    "prompt_version_id",
+    "user_id",
+    "project_id",
+    "api_key_id",
+    "status_code",
+    "latency_ms",
+    "stages",
+    "created_at",
+)
+
+# Latency histogram buckets grow geometrically: bucket i holds latencies in
+# (HISTOGRAM_MIN_MS * GAMMA**(i-1), HISTOGRAM_MIN_MS * GAMMA**i], so any value is
+# within 10% of its bucket's bounds. Bucket 0 takes everything at or below the
+# minimum and the last bucket everything above ~60 hours. Migration 012 computes
+# the same index in SQL; keep them in step.
+HISTOGRAM_MIN_MS = 0.01
+HISTOGRAM_GAMMA = 1.1
+HISTOGRAM_MAX_BUCKET = 250
+
+_LOG_GAMMA = math.log(HISTOGRAM_GAMMA)
+
+
+def usage_row(
+    prompt_name: str,
+    prompt_version: str,
+    status_code: int,
+    latency_ms: float,
+    stages: dict[str, float] | None = None,
+    *,
+    prompt_version_id: uuid.UUID | None = None,
+    user_id: uuid.UUID | None = None,
+    project_id: uuid.UUID | None = None,
+    api_key_id: uuid.UUID | None = None,
+) -> dict:
+    """One expand call. ``prompt_version`` only feeds the rollups; ``prompt_usage``
+    references the version by ``prompt_version_id`` (None if none resolved)."""
+    return {
+        "prompt_name": prompt_name,
+        "prompt_version": prompt_version,
+        "prompt_version_id": prompt_version_id,
+        "user_id": user_id,
+        "project_id": project_id,
+        "api_key_id": api_key_id,
+        "status_code": status_code,
+        "latency_ms": latency_ms,
+        "stages": stages or None,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def latency_bucket(latency_ms: float) -> int:
+    if latency_ms <= HISTOGRAM_MIN_MS:
+        return 0
+    index = math.ceil(math.log(latency_ms / HISTOGRAM_MIN_MS) / _LOG_GAMMA)
+    return min(index, HISTOGRAM_MAX_BUCKET)
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def _aware(ts: datetime) -> datetime:
+    # SQLite hands timestamps back without their (UTC) timezone
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def hour_start(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _aggregate(rows: list[dict], truncate) -> dict[tuple, dict]:
+    """Rollup deltas for ``rows``, keyed by (bucket_start, name, version, status class)."""
+    deltas: dict[tuple, dict] = {}
+    for row in rows:
+        key = (
+            truncate(row["created_at"]),
+            row["prompt_name"],
+            row["prompt_version"],
+            status_class(row["status_code"]),
+        )
+        latency = row["latency_ms"]
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = {
+                "count": 0,
+                "latency_sum": 0.0,
+                "latency_min": latency,
+                "latency_max": latency,
+                "histogram": {},
+                "stages": {},
+            }
+        delta["count"] += 1
+        delta["latency_sum"] += latency
+        delta["latency_min"] = min(delta["latency_min"], latency)
+        delta["latency_max"] = max(delta["latency_max"], latency)
+        bucket = str(latency_bucket(latency))
+        delta["histogram"][bucket] = delta["histogram"].get(bucket, 0) + 1
+        if row.get("stages"):
+            merge_stages(delta["stages"], {k: [1, ms] for k, ms in row["stages"].items()})
+    return deltas
+
+
+def merge_histograms(into: dict, other: dict) -> dict:
+    """Add ``other``'s counts into ``into``; histograms from any rollup or worker merge."""
+    for bucket, count in other.items():
+        into[bucket] = into.get(bucket, 0) + count
+    return into
+
+
+def merge_stages(into: dict, other: dict) -> dict:
+    """Add ``other``'s ``{stage: [count, total ms]}`` into ``into``."""
+    for stage, (count, total) in other.items():
+        current = into.get(stage, (0, 0.0))
+        into[stage] = [current[0] + count, current[1] + total]
+    return into
+
+
+def stage_means(stages: dict) -> dict[str, float]:
+    """Mean milliseconds per stage from ``{stage: [count, total ms]}``."""
+    return {
+        stage: round(total / count, 3)
+        for stage, (count, total) in stages.items()
+        if count
+    }
+
+
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99, "p99.9": 0.999}
+
+
+def latency_percentiles(
+    histogram: dict, low: float | None = None, high: float | None = None
+) -> dict[str, float | None]:
+    """Estimate ``QUANTILES`` from a latency histogram (nearest rank).
+
+    Each estimate is the point of its bucket with the least relative error to
+    either bound, so it is within ~5% of the true value; ``low`` and ``high``
+    (the observed min and max, when known) clamp the estimates.
+    """
+    counts = sorted((int(bucket), count) for bucket, count in histogram.items() if count)
+    total = sum(count for _, count in counts)
+    if not total:
+        return {name: None for name in QUANTILES}
+    result = {}
+    for name, q in QUANTILES.items():
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for bucket, count in counts:
+            seen += count
+            if seen >= rank:
+                break
+        if bucket == 0:
+            value = HISTOGRAM_MIN_MS
+        else:
+            value = 2 * HISTOGRAM_MIN_MS * HISTOGRAM_GAMMA**bucket / (1 + HISTOGRAM_GAMMA)
+        if low is not None:
+            value = max(value, low)
+        if high is not None:
+            value = min(value, high)
+        result[name] = round(value, 3)
+    return result
+
+
+async def apply_rollups(db: AsyncSession, rows: list[dict]) -> None:
+    """Fold usage rows into the hourly and daily rollups; the caller commits.
+
+    Missing rollup rows are created empty (``ON CONFLICT DO NOTHING``), then all
+    touched rows are locked in key order, merged in Python and written back, so
+    concurrent writers on other workers serialize per bucket instead of losing
+    counts. The seed insert runs in key order too: two flushes over overlapping
+    buckets then wait on each other's new rows in the same order, never in
+    opposite ones, and cannot deadlock.
+    """
+    dialect_insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    for model, truncate in ((UsageRollupHourly, hour_start), (UsageRollupDaily, day_start)):
+        deltas = _aggregate(rows, truncate)
+        pk = (model.bucket_start, model.prompt_name, model.prompt_version, model.status_class)
+        await db.execute(
+            dialect_insert(model)
+            .values(
+                [
+                    {
+                        "bucket_start": key[0],
+                        "prompt_name": key[1],
+                        "prompt_version": key[2],
+                        "status_class": key[3],
+                        "count": 0,
+                        "latency_sum": 0.0,
+                        "histogram": {},
+                        "stages": {},
+                    }
+                    for key in sorted(deltas)
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+        current = await db.execute(
+            select(
+                *pk,
+                model.count,
+                model.latency_sum,
+                model.latency_min,
+                model.latency_max,
+                model.histogram,
+                model.stages,
+            )
+            .where(tuple_(*pk).in_(list(deltas)))
+            .order_by(*pk)
+            .with_for_update()
+        )
+        merged = []
+        for rollup in current:
+            delta = deltas[
+                (
+                    _aware(rollup.bucket_start),
+                    rollup.prompt_name,
+                    rollup.prompt_version,
+                    rollup.status_class,
+                )
+            ]
+            latency_min, latency_max = delta["latency_min"], delta["latency_max"]
+            if rollup.latency_min is not None:
+                latency_min = min(latency_min, rollup.latency_min)
+                latency_max = max(latency_max, rollup.latency_max)
+            merged.append(
+                {
+                    "bucket_start": rollup.bucket_start,
+                    "prompt_name": rollup.prompt_name,
+                    "prompt_version": rollup.prompt_version,
+                    "status_class": rollup.status_class,
+                    "count": rollup.count + delta["count"],
+                    "latency_sum": rollup.latency_sum + delta["latency_sum"],
+                    "latency_min": latency_min,
+                    "latency_max": latency_max,
+                    "histogram": merge_histograms(dict(rollup.histogram), delta["histogram"]),
+                    "stages": merge_stages(dict(rollup.stages or {}), delta["stages"]),
+                }
+            )
+        await db.execute(update(model), merged)
+
+
+def _copy_record(row: dict) -> tuple:
+    # COPY takes json columns as text
+    stages = row.get("stages")
+    return tuple(
+        (json.dumps(stages) if stages else None) if c == "stages" else row[c] for c in _COLUMNS
+    )
+
+
+async def write_rows(db: AsyncSession, rows: list[dict]) -> None:
+    """Insert usage rows in one statement (``COPY`` on Postgres), roll them up and commit."""
+    if db.bind.dialect.name == "postgresql":
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            PromptUsage.__tablename__,
+            records=[_copy_record(row) for row in rows],
+            columns=list(_COLUMNS),
+        )
+    else:
+        await db.execute(insert(PromptUsage), [{c: row[c] for c in _COLUMNS} for row in rows])
+    await apply_rollups(db, rows)
+    await db.commit()
+
+
+_PARTITION = re.compile(r"^prompt_usage_p(\d{4})(\d{2})$")
+
+# Transaction-scoped advisory lock serializing partition maintenance, which
+# every worker process runs on its own schedule
+_MAINTENANCE_LOCK = 0x70755F6D61696E74
+
+
+def month_start(ts: datetime, months: int = 0) -> datetime:
+    """The first instant of ``ts``'s month, shifted by ``months``."""
+    month = ts.year * 12 + ts.month - 1 + months
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+async def maintain_partitions(
+    db: AsyncSession,
+    now: datetime | None = None,
+    months_ahead: int | None = None,
+    retention_days: int | None = None,
+) -> dict:
+    """Pre-create upcoming ``prompt_usage`` partitions and expire old usage.
+
+    Postgres: ensures a partition exists for the current month and the next
+    ``months_ahead``, and drops partitions whose whole range is older than
+    ``retention_days`` (0, the default, keeps everything). Elsewhere the table
+    isn't partitioned and expired rows are deleted. Rollups are kept either way.
+    Returns the partitions created and dropped and the rows deleted.
+
+    Rows that landed in the default partition while a month had none (see
+    migration 013) would make creating that month's partition fail; they are
+    moved into it as it is created (see ``_create_partition``).
+
+    On Postgres the work runs under an advisory lock; when another worker holds
+    it that worker is already maintaining the partitions and nothing is done.
+    """
+    now = now or datetime.now(timezone.utc)
+    ahead = settings.usage_partitions_ahead if months_ahead is None else months_ahead
+    retention = settings.usage_retention_days if retention_days is None else retention_days
+    cutoff = now - timedelta(days=retention) if retention else None
+    report = {"created": [], "dropped": [], "deleted": 0}
+
+    if db.bind.dialect.name != "postgresql":
+        if cutoff is not None:
+            result = await db.execute(delete(PromptUsage).where(PromptUsage.created_at < cutoff))
+            report["deleted"] = result.rowcount
+        await db.commit()
+        return report
+
+    locked = await db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _MAINTENANCE_LOCK}
+    )
+    if not locked.scalar():
+        await db.rollback()
+        return report
+
+    existing = set(
+        (
+            await db.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = 'prompt_usage'"
+                )
+            )
+        ).scalars()
+    )
+    for offset in range(ahead + 1):
+        start = month_start(now, offset)
+        name = f"prompt_usage_p{start:%Y%m}"
+        if name in existing:
+            continue
+        await _create_partition(db, name, start, "prompt_usage_default" in existing)
+        report["created"].append(name)
+    if cutoff is not None:
+        for name in sorted(existing):
+            match = _PARTITION.match(name)
+            if not match:
+                continue
+            start = datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+            if month_start(start, 1) <= cutoff:
+                await db.execute(text(f"ALTER TABLE prompt_usage DETACH PARTITION {name}"))
+                await db.execute(text(f"DROP TABLE {name}"))
+                report["dropped"].append(name)
+    await db.commit()
+    return report
+
+
+async def _create_partition(
+    db: AsyncSession, name: str, start: datetime, has_default: bool
+) -> None:
+    """Create the monthly partition ``name`` starting at ``start``.
+
+    Postgres refuses to create a partition while the default partition holds
+    rows in its range, so when it does the default is detached, the partition
+    created, those rows moved into it and the default attached again, all in
+    the caller's transaction.
+    """
+    end = month_start(start, 1)
+    bounds = {"start": start, "end": end}
+    in_range = "created_at >= :start AND created_at < :end"
+    create = text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF prompt_usage "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    stranded = has_default and (
+        await db.execute(
+            text(f"SELECT 1 FROM prompt_usage_default WHERE {in_range} LIMIT 1"), bounds
+        )
+    ).first()
+    if not stranded:
+        await db.execute(create)
+        return
+    await db.execute(text("ALTER TABLE prompt_usage DETACH PARTITION prompt_usage_default"))
+    await db.execute(create)
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM prompt_usage_default WHERE {in_range} RETURNING *) "
+            "INSERT INTO prompt_usage SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await db.execute(text("ALTER TABLE prompt_usage ATTACH PARTITION prompt_usage_default DEFAULT"))
+    logger.info("Moved rows from prompt_usage_default into new partition %s", name)
+
+
+async def run_maintenance(session_factory: async_sessionmaker, interval: float) -> None:
+    """Run ``maintain_partitions`` every ``interval`` seconds for the app's lifetime."""
+    while True:
+        try:
+            async with session_factory() as db:
+                report = await maintain_partitions(db)
+        except Exception:
+            logger.warning("Usage partition maintenance failed", exc_info=True)
+        else:
+            if report["created"] or report["dropped"] or report["deleted"]:
+                logger.info("Usage partition maintenance: %s", report)
+        await asyncio.sleep(interval)
+
+
+EXPORT_COLUMNS = (
+    "id",
+    "created_at",
+    "prompt_name",
+    "prompt_version",
+    "prompt_version_id",
+    "user_id",
+    "project_id",
+    "api_key_id",
+    "status_code",
+    "latency_ms",
+    "stages",
+)
+
+_STATUS = re.compile(r"^([1-5])(xx|\d\d)$")
+
+
+def status_filter(status: str):
+    """A ``prompt_usage`` condition for "404" (one code) or "4xx" (a class)."""
+    match = _STATUS.match(status)
+    if not match:
+        raise ValueError(f"Invalid status filter '{status}': use a code (404) or class (4xx)")
+    if match.group(2) == "xx":
+        low = int(match.group(1)) * 100
+        return PromptUsage.status_code.between(low, low + 99)
+    return PromptUsage.status_code == int(status)
+
+
+async def stream_usage(
+    db: AsyncSession,
+    since: datetime,
+    until: datetime,
+    *,
+    prompt_name: str | None = None,
+    user_id: uuid.UUID | None = None,
+    status: str | None = None,
+    after_id: int | None = None,
+    batch_rows: int | None = None,
+) -> AsyncIterator[list[dict]]:
+    """Usage rows created in [``since``, ``until``), in batches of ``batch_rows``.
+
+    Rows come in ``(created_at, id)`` order through a server-side cursor, so
+    memory stays flat however many rows match. ``after_id`` skips rows up to and
+    including that row in the same order, which resumes an export from the last
+    row it delivered. Ids alone can't be the resume point: they are assigned when
+    a buffer is flushed, so a worker flushing later can commit lower ids than
+    rows already exported. Each row
+    is a dict of the ``EXPORT_COLUMNS`` (the version string joined in from
+    ``prompt_versions``).
+    """
+    query = (
+        select(
+            PromptUsage.id,
+            PromptUsage.created_at,
+            PromptUsage.prompt_name,
+            PromptVersion.version.label("prompt_version"),
+            PromptUsage.prompt_version_id,
+            PromptUsage.user_id,
+            PromptUsage.project_id,
+            PromptUsage.api_key_id,
+            PromptUsage.status_code,
+            PromptUsage.latency_ms,
+            PromptUsage.stages,
+        )
+        .outerjoin(PromptVersion, PromptVersion.id == PromptUsage.prompt_version_id)
+        .where(PromptUsage.created_at >= since, PromptUsage.created_at < until)
+        .order_by(PromptUsage.created_at, PromptUsage.id)
+        .execution_options(yield_per=batch_rows or settings.usage_export_batch_rows)
+    )
+    if prompt_name is not None:
+        query = query.where(PromptUsage.prompt_name == prompt_name)
+    if user_id is not None:
+        query = query.where(PromptUsage.user_id == user_id)
+    if status is not None:
+        query = query.where(status_filter(status))
+    if after_id is not None:
+        resumed_at = await db.scalar(
+            select(PromptUsage.created_at).where(PromptUsage.id == after_id)
+        )
+        if resumed_at is None:
+            # The row has since been expired; its id is the best resume point left
+            query = query.where(PromptUsage.id > after_id)
+        else:
+            query = query.where(
+                tuple_(PromptUsage.created_at, PromptUsage.id) > tuple_(resumed_at, after_id)
+            )
+
+    result = await db.stream(query)
+    try:
+        async for batch in result.partitions():
+            rows = [row._asdict() for row in batch]
+            for row in rows:
+                row["created_at"] = _aware(row["created_at"])
+            yield rows
+    finally:
+        await result.close()
+
+
+class UsageRecorder:
+    """A bounded usage buffer drained by one background flusher task."""
+
+    def __init__(self) -> None:
+        self._buffer: deque[dict] = deque()
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._closing = False
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(
+        self,
+        session_factory: async_sessionmaker,
+        buffer_size: int | None = None,
+        flush_rows: int | None = None,
+        flush_ms: float | None = None,
+        overflow: str | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._buffer_size = settings.usage_buffer_size if buffer_size is None else buffer_size
+        self._flush_rows = settings.usage_flush_rows if flush_rows is None else flush_rows
+        self._flush_seconds = (settings.usage_flush_ms if flush_ms is None else flush_ms) / 1000
+        self._overflow = settings.usage_overflow if overflow is None else overflow
+        if self._overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown usage overflow policy '{self._overflow}'")
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting rows, flush everything buffered and wait for the flusher."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        self._closing = True
+        self._ready.set()
+        self._space.set()
+        await task
+
+    async def record(
+        self,
+        prompt_name: str,
+        prompt_version: str,
+        status_code: int,
+        latency_ms: float,
+        stages: dict[str, float] | None = None,
+        **refs: uuid.UUID | None,
+    ) -> None:
+        """Buffer a ``usage_row``; ``refs`` are its id keyword arguments."""
+        row = usage_row(prompt_name, prompt_version, status_code, latency_ms, stages, **refs)
+        while len(self._buffer) >= self._buffer_size:
+            if self._overflow == "block" and not self._closing:
+                self._space.clear()
+                await self._space.wait()
+                continue
+            if self._overflow == "drop_oldest":
+                self._buffer.popleft()
+                self.dropped += 1
+                break
+            self.dropped += 1
+            return
+        self._buffer.append(row)
+        if len(self._buffer) >= self._flush_rows:
+            self._ready.set()
+
+    async def _run(self) -> None:
+        reported = 0
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self._flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            await self._flush()
+            if self.dropped != reported:
+                logger.warning(
+                    "Usage buffer full: dropped %d row(s)", self.dropped - reported
+                )
+                reported = self.dropped
+        await self._flush()
+
+    async def _flush(self) -> None:
+        while self._buffer:
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self._flush_rows, len(self._buffer)))
+            ]
+            self._space.set()
+            try:
+                await self._write(batch)
+            except Exception:
+                if len(batch) == 1:
+                    logger.warning("Failed to write 1 usage row", exc_info=True)
+                    continue
+                # One bad row fails the whole statement; retry the rows one by
+                # one so only the rows that can't be written are lost.
+                logger.warning(
+                    "Failed to write %d usage row(s); retrying them one at a time",
+                    len(batch),
+                    exc_info=True,
+                )
+                failed = 0
+                for row in batch:
+                    try:
+                        await self._write([row])
+                    except Exception:
+                        failed += 1
+                if failed:
+                    logger.warning("Dropped %d usage row(s) that could not be written", failed)
+
+    async def _write(self, rows: list[dict]) -> None:
+        async with self._session_factory() as db:
+            await write_rows(db, rows)
+        self.written += len(rows)
+
+
+usage_recorder = UsageRecorder()
@@ -1,21 +1,36 @@
+import asyncio
+import hashlib
+import json
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import NamedTuple
 
-from sqlalchemy import or_, select
+from sqlalchemy import case, exists, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.skillcanon_server.models import User, Workflow, WorkflowShare
+from src.skillcanon_server import telemetry
+from src.skillcanon_server.config import settings
+from src.skillcanon_server.models import Prompt, PromptVersion, User, Workflow, WorkflowShare
 from src.skillcanon_server.schemas import (
     ExpandRequest,
+    PolicyResponse,
     ShareResponse,
     WorkflowCreate,
+    WorkflowMapItemResult,
     WorkflowResponse,
+    WorkflowRunEvent,
     WorkflowRunResponse,
     WorkflowStep,
     WorkflowStepResult,
     WorkflowUpdate,
 )
-from src.skillcanon_server.services import prompt_service
+from src.skillcanon_server.services import (
+    objective_service,
+    policy_service,
+    prompt_service,
+    registry_service,
+)
 
 
 async def create_workflow(db: AsyncSession, data: WorkflowCreate) -> WorkflowResponse:
@@ -27,6 +42,8 @@ async def create_workflow(db: AsyncSession, data: WorkflowCreate) -> WorkflowRes
         steps=[s.model_dump() for s in data.steps],
     )
     db.add(workflow)
+    await _store_plan(db, workflow, data.steps)
+    await registry_service.bump(db)
     await db.commit()
     await db.refresh(workflow)
     return WorkflowResponse.model_validate(workflow)
@@ -55,6 +72,38 @@ async def get_workflow(db: AsyncSession, workflow_id: uuid.UUID) -> WorkflowResp
     return WorkflowResponse.model_validate(workflow)
 
 
+async def get_workflow_by_name(
+    db: AsyncSession, name: str, user_id: uuid.UUID | None = None
+) -> WorkflowResponse | None:
+    """Case-insensitive lookup among the workflows ``user_id`` owns or has been shared.
+
+    Names are not unique, so ties resolve deterministically: workflows the user
+    owns beat shared ones, an exact-case match beats a case-insensitive one,
+    then the most recently updated wins (id breaks any remaining tie). Served by
+    the ``lower(name), user_id`` index. Without a user, every workflow is a
+    candidate.
+    """
+    query = select(Workflow).where(func.lower(Workflow.name) == name.lower())
+    order = []
+    if user_id is not None:
+        shared = exists().where(
+            WorkflowShare.workflow_id == Workflow.id, WorkflowShare.user_id == user_id
+        )
+        owned = Workflow.user_id == user_id
+        query = query.where(or_(owned, shared))
+        order.append(case((owned, 0), else_=1))
+    order += [
+        case((Workflow.name == name, 0), else_=1),
+        Workflow.updated_at.desc(),
+        Workflow.id,
+    ]
+    result = await db.execute(query.order_by(*order).limit(1))
+    workflow = result.scalar_one_or_none()
+    if not workflow:
+        return None
+    return WorkflowResponse.model_validate(workflow)
+
+
 async def update_workflow(
     db: AsyncSession, workflow_id: uuid.UUID, data: WorkflowUpdate
 ) -> WorkflowResponse | None:
@@ -68,6 +117,8 @@ async def update_workflow(
         workflow.description = data.description
     if data.steps is not None:
         workflow.steps = [s.model_dump() for s in data.steps]
+        await _store_plan(db, workflow, data.steps)
+    await registry_service.bump(db)
     await db.commit()
     await db.refresh(workflow)
     return WorkflowResponse.model_validate(workflow)
@@ -79,118 +130,620 @@ async def delete_workflow(db: AsyncSession, workflow_id: uuid.UUID) -> bool:
     if not workflow:
         return False
     await db.delete(workflow)
+    await registry_service.bump(db)
     await db.commit()
     return True
 
 
-def _topological_sort(steps: list[WorkflowStep]) -> list[WorkflowStep]:
-    """Sort steps in dependency order. Raises ValueError on cycles."""
-    step_map = {s.id: s for s in steps}
-    in_degree: dict[str, int] = defaultdict(int)
-    dependents: dict[str, list[str]] = defaultdict(list)
+def _steps(workflow: Workflow) -> list[WorkflowStep]:
+    return [WorkflowStep(**s) if isinstance(s, dict) else s for s in workflow.steps or []]
 
-    for s in steps:
-        in_degree.setdefault(s.id, 0)
-        for dep in s.depends_on:
-            dependents[dep].append(s.id)
-            in_degree[s.id] += 1
 
-    queue = [sid for sid, deg in in_degree.items() if deg == 0]
-    ordered: list[WorkflowStep] = []
+def _plan_graph(steps: list[WorkflowStep]) -> dict:
+    """Validate the step graph and lay it out in dependency levels.
 
-    while queue:
-        sid = queue.pop(0)
-        ordered.append(step_map[sid])
-        for dependent in dependents[sid]:
-            in_degree[dependent] -= 1
-            if in_degree[dependent] == 0:
-                queue.append(dependent)
+    Each step waits on its ``depends_on`` and on ``input_from``, the step whose
+    output becomes its ``input``: the last dependency listed, or — when no step
+    declares any dependency, i.e. a linear pipeline — the step before it.
+    Raises ValueError on duplicate ids, unknown dependencies, cycles and map
+    steps without a valid ``map_over``.
+    """
+    position: dict[str, int] = {}
+    for i, step in enumerate(steps):
+        if step.id in position:
+            raise ValueError(f"Duplicate step id '{step.id}'")
+        position[step.id] = i
+    for step in steps:
+        for dep_id in step.depends_on:
+            if dep_id not in position:
+                raise ValueError(f"Step '{step.id}' depends on unknown step '{dep_id}'")
+        if step.type == "map" and not step.map_over:
+            raise ValueError(f"Map step '{step.id}' needs map_over")
+        if step.type != "map" and step.map_over:
+            raise ValueError(f"Step '{step.id}' sets map_over but is not a map step")
+        if step.map_over in position and step.map_over not in step.depends_on:
+            raise ValueError(
+                f"Map step '{step.id}' maps over step '{step.map_over}' without depending on it"
+            )
 
-    if len(ordered) != len(steps):
+    linear = not any(step.depends_on for step in steps)
+    nodes: dict[str, dict] = {}
+    dependents: dict[str, list[str]] = defaultdict(list)
+    for i, step in enumerate(steps):
+        if linear:
+            input_from = steps[i - 1].id if i else None
+        else:
+            input_from = step.depends_on[-1] if step.depends_on else None
+        waits_on = list(dict.fromkeys(step.depends_on + ([input_from] if input_from else [])))
+        for dep_id in waits_on:
+            dependents[dep_id].append(step.id)
+        nodes[step.id] = {"input_from": input_from, "waits_on": waits_on}
+
+    # Kahn's algorithm, one level at a time; each level keeps declaration order
+    remaining = {sid: len(node["waits_on"]) for sid, node in nodes.items()}
+    levels: list[list[str]] = []
+    level = [sid for sid, count in remaining.items() if count == 0]
+    while level:
+        levels.append(level)
+        unlocked = []
+        for sid in level:
+            for dependent_id in dependents[sid]:
+                remaining[dependent_id] -= 1
+                if remaining[dependent_id] == 0:
+                    unlocked.append(dependent_id)
+        level = sorted(unlocked, key=position.__getitem__)
+    if sum(len(level) for level in levels) != len(steps):
         raise ValueError("Circular dependency detected in workflow steps")
-    return ordered
+
+    for sid, node in nodes.items():
+        node["dependents"] = dependents[sid]
+    return {"order": [sid for level in levels for sid in level], "levels": levels, "steps": nodes}
+
+
+async def compile_plan(db: AsyncSession, steps: list[WorkflowStep], strict: bool = True) -> dict:
+    """Compile steps into the execution plan ``run_workflow`` follows.
+
+    On top of the graph layout (see ``_plan_graph``) every step gets the id of
+    the prompt version it renders, resolved in one query. The plan also records
+    the state of each referenced prompt (see ``_prompt_states``) so a run can
+    tell whether deprecating, pinning or versioning one of them has changed
+    what the steps resolve to. With ``strict`` a step whose prompt (or
+    requested version) does not resolve raises ValueError; otherwise its
+    ``version_id`` is None and the step fails when run.
+    """
+    return await _resolve_plan_versions(db, steps, _plan_graph(steps), strict)
+
+
+async def _resolve_plan_versions(
+    db: AsyncSession, steps: list[WorkflowStep], plan: dict, strict: bool
+) -> dict:
+    plan["prompts"] = await _prompt_states(db, {step.prompt_name for step in steps})
+    refs = {(step.prompt_name, step.prompt_version) for step in steps}
+    versions = await prompt_service.resolve_versions(db, refs)
+    for step in steps:
+        pv = versions.get((step.prompt_name, step.prompt_version))
+        if pv is None and strict:
+            suffix = f" version '{step.prompt_version}'" if step.prompt_version else ""
+            raise ValueError(
+                f"Step '{step.id}' references unknown or deprecated prompt "
+                f"'{step.prompt_name}'{suffix}"
+            )
+        plan["steps"][step.id]["version_id"] = str(pv.id) if pv else None
+    return plan
+
+
+async def _prompt_states(db: AsyncSession, names: set[str]) -> dict[str, list]:
+    """Per prompt name: everything that decides which version a step resolves to.
+
+    Versions are immutable and only ever added, so the prompt's id, deprecation,
+    pin and version count change exactly when a resolution can. Unknown names
+    are absent.
+    """
+    if not names:
+        return {}
+    result = await db.execute(
+        select(
+            Prompt.name,
+            Prompt.id,
+            Prompt.is_deprecated,
+            Prompt.active_version_id,
+            func.count(PromptVersion.id),
+        )
+        .outerjoin(PromptVersion, PromptVersion.prompt_id == Prompt.id)
+        .where(Prompt.name.in_(names))
+        .group_by(Prompt.id)
+    )
+    return {
+        name: [str(prompt_id), deprecated, str(pinned) if pinned else None, count]
+        for name, prompt_id, deprecated, pinned, count in result.all()
+    }
+
+
+async def _store_plan(db: AsyncSession, workflow: Workflow, steps: list[WorkflowStep]) -> None:
+    """Compile and attach a plan while saving; on ValueError the transaction is rolled back."""
+    try:
+        workflow.plan = await compile_plan(db, steps)
+    except ValueError:
+        await db.rollback()
+        raise
+
+
+async def _current_plan(db: AsyncSession, workflow: Workflow) -> dict:
+    """The workflow's stored plan, its versions re-resolved if a referenced prompt changed.
+
+    Edits to unrelated prompts, shares or workflows leave the plan alone. A stale
+    plan is refreshed in memory for this run only (the graph layout is reused);
+    nothing is written, and the next save stores a fresh plan.
+    """
+    steps = _steps(workflow)
+    plan = workflow.plan
+    if not plan:
+        return await compile_plan(db, steps, strict=False)
+    if plan.get("prompts") == await _prompt_states(db, {step.prompt_name for step in steps}):
+        return plan
+    refreshed = {**plan, "steps": {sid: dict(node) for sid, node in plan["steps"].items()}}
+    return await _resolve_plan_versions(db, steps, refreshed, strict=False)
+
+
+def _error_result(step: WorkflowStep, error: str, status: str = "error") -> WorkflowStepResult:
+    return WorkflowStepResult(
+        step_id=step.id,
+        prompt_name=step.prompt_name,
+        prompt_version=step.prompt_version or "latest",
+        system_message=None,
+        user_message="",
+        status=status,
+        error=error,
+    )
+
+
+class _StepRender(NamedTuple):
+    """What one step renders with, resolved before the run starts."""
+
+    version: PromptVersion
+    # Governance of the prompt's owner; None when the prompt has no owner
+    policies: list[PolicyResponse] | None
+    objectives: list[str] | None
+    # Hash of everything above plus the include closure; see _fingerprint
+    fingerprint: str
+
+
+def _fingerprint(
+    pv: PromptVersion,
+    policies: list[PolicyResponse] | None,
+    objectives: list[str] | None,
+    prompt_cache: dict[str, PromptVersion],
+) -> str:
+    """Identify what a step renders with, independent of its input.
+
+    Versions are immutable, so ids stand in for templates: the step's version,
+    the versions its transitive includes resolve to, and the governance applied.
+    """
+    closure: dict[str, str | None] = {}
+    pending = prompt_service.template_includes(pv, policies)
+    for _ in range(prompt_service.MAX_INCLUDE_DEPTH):
+        pending -= closure.keys()
+        if not pending:
+            break
+        included = {name: prompt_cache.get(name) for name in pending}
+        closure.update({name: str(v.id) if v else None for name, v in included.items()})
+        pending = set().union(
+            *(prompt_service.template_includes(v) for v in included.values() if v)
+        )
+    material = {
+        "version": str(pv.id),
+        "includes": sorted(closure.items()),
+        "policies": None if policies is None else [p.model_dump(mode="json") for p in policies],
+        "objectives": objectives,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+# Memoized step results by content hash (see _memo_key). Keys cover everything a
+# render depends on, so entries never go stale; the LRU bounds (entry count and
+# total rendered text, see _result_chars) only cap memory.
+_step_memo: OrderedDict[str, tuple[WorkflowStepResult, int]] = OrderedDict()
+_step_memo_chars = 0
+
+
+def _memo_key(step: WorkflowStep, render: _StepRender, step_input: dict) -> str:
+    # step_input already carries the upstream outputs the step was fed; type and
+    # map_over decide whether it is rendered once or once per element
+    payload = json.dumps(
+        [render.fingerprint, step.prompt_name, step.type, step.map_over, step_input],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _result_chars(result: WorkflowStepResult) -> int:
+    """Rendered text a result holds; map results count every element."""
+    size = len(result.user_message) + len(result.system_message or "")
+    for item in result.items or ():
+        size += len(item.user_message) + len(item.system_message or "") + len(item.error or "")
+    return size
+
+
+def _memo_get(key: str) -> WorkflowStepResult | None:
+    entry = _step_memo.get(key)
+    if entry is not None:
+        _step_memo.move_to_end(key)
+    telemetry.cache_lookup("workflow_step", entry is not None)
+    return entry[0] if entry is not None else None
+
+
+def _memo_put(key: str, result: WorkflowStepResult) -> None:
+    global _step_memo_chars
+    size = _result_chars(result)
+    if settings.workflow_step_cache_size <= 0 or size > settings.workflow_step_cache_chars:
+        return
+    previous = _step_memo.pop(key, None)
+    if previous is not None:
+        _step_memo_chars -= previous[1]
+    _step_memo[key] = (result, size)
+    _step_memo_chars += size
+    while (
+        len(_step_memo) > settings.workflow_step_cache_size
+        or _step_memo_chars > settings.workflow_step_cache_chars
+    ):
+        _, (_, evicted) = _step_memo.popitem(last=False)
+        _step_memo_chars -= evicted
+
+
+def _memo_clear() -> None:
+    global _step_memo_chars
+    _step_memo.clear()
+    _step_memo_chars = 0
+
+
+async def _prefetch_run(
+    db: AsyncSession, nodes: dict[str, dict]
+) -> tuple[dict[str, _StepRender], dict[str, PromptVersion]]:
+    """Load everything a run renders, in bulk, so steps never touch the database.
+
+    One query for every step's version and owner, governance resolved once per
+    distinct owner (the same policies and objectives ``expand_prompt`` derives
+    from the prompt owner), and ``prefetch_versions`` over the union of the
+    include references. Returns the per-step renders, keyed by version id, and
+    the shared include cache.
+    """
+    version_ids = {uuid.UUID(node["version_id"]) for node in nodes.values() if node["version_id"]}
+    rows = []
+    if version_ids:
+        result = await db.execute(
+            select(PromptVersion, Prompt.user_id)
+            .join(Prompt, Prompt.id == PromptVersion.prompt_id)
+            .where(PromptVersion.id.in_(version_ids))
+        )
+        rows = result.all()
+
+    governance: dict[uuid.UUID, tuple[list[PolicyResponse], list[str]]] = {}
+    for owner_id in {owner_id for _, owner_id in rows if owner_id}:
+        governance[owner_id] = (
+            await policy_service.resolve_all_policies(db, owner_id),
+            await objective_service.resolve_all_objectives(db, owner_id),
+        )
+
+    includes: set[str] = set()
+    for pv, owner_id in rows:
+        includes |= prompt_service.template_includes(pv, governance.get(owner_id, (None,))[0])
+    prompt_cache = await prompt_service.prefetch_versions(db, includes)
+
+    renders: dict[str, _StepRender] = {}
+    for pv, owner_id in rows:
+        policies, objectives = governance.get(owner_id, (None, None))
+        renders[str(pv.id)] = _StepRender(
+            pv, policies, objectives, _fingerprint(pv, policies, objectives, prompt_cache)
+        )
+    return renders, prompt_cache
+
+
+async def _run_step(
+    step: WorkflowStep,
+    step_input: dict,
+    render: _StepRender | None,
+    prompt_cache: dict[str, PromptVersion],
+) -> WorkflowStepResult:
+    """Render one step from prefetched data; pure templating, no database access.
+
+    The rendering itself runs on a worker thread, so steps in flight at once
+    render concurrently instead of taking turns on the event loop. Identical
+    renders (same fingerprint, prompt and input) are served from the step memo
+    and flagged ``cached``.
+    """
+    if render is None:
+        return _error_result(step, f"Prompt '{step.prompt_name}' not found")
+    key = _memo_key(step, render, step_input)
+    memoized = _memo_get(key)
+    if memoized is not None:
+        return memoized.model_copy(update={"step_id": step.id, "cached": True})
+    if step.type == "map":
+        result = await _run_map_step(step, step_input, render, prompt_cache)
+        if result.status == "success":
+            _memo_put(key, result)
+        return result
+    try:
+        expand_result = await asyncio.to_thread(
+            prompt_service.render_prompt,
+            step.prompt_name,
+            render.version,
+            ExpandRequest(input=step_input),
+            render.policies,
+            render.objectives,
+            prompt_cache,
+        )
+    except Exception as e:
+        return _error_result(step, str(e))
+    result = WorkflowStepResult(
+        step_id=step.id,
+        prompt_name=step.prompt_name,
+        prompt_version=expand_result.prompt_version,
+        system_message=expand_result.system_message,
+        user_message=expand_result.user_message,
+    )
+    _memo_put(key, result)
+    return result
+
+
+def _map_items(value) -> list:
+    """The list a map step iterates: a list, a JSON array, or one item per line."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [line for line in value.splitlines() if line.strip()]
+    if not isinstance(value, list):
+        raise ValueError("map_over must name a list, a JSON array or one item per line")
+    return value
+
+
+async def _run_map_step(
+    step: WorkflowStep,
+    step_input: dict,
+    render: _StepRender,
+    prompt_cache: dict[str, PromptVersion],
+) -> WorkflowStepResult:
+    """Render the step's prompt once per item, a batch at a time on a worker thread.
+
+    Governance is applied and the templates compiled once for all items (see
+    ``prompt_service.render_many``). Each item sees the step's input plus
+    ``item`` and ``item_index``, with ``input`` set to the item.
+    """
+    try:
+        if step.map_over not in step_input:
+            raise ValueError(f"map_over '{step.map_over}' is not in the workflow input")
+        items = _map_items(step_input[step.map_over])
+        if len(items) > settings.workflow_map_max_items:
+            raise ValueError(
+                f"map_over '{step.map_over}' has {len(items)} items; "
+                f"the limit is {settings.workflow_map_max_items}"
+            )
+    except ValueError as e:
+        return _error_result(step, str(e))
+
+    inputs = [
+        {
+            **step_input,
+            "item": item,
+            "item_index": index,
+            "input": item if isinstance(item, str) else json.dumps(item),
+        }
+        for index, item in enumerate(items)
+    ]
+    batch = max(1, settings.workflow_map_batch_size)
+    item_results: list[WorkflowMapItemResult] = []
+    for start in range(0, len(inputs), batch):
+        rendered = await asyncio.to_thread(
+            prompt_service.render_many,
+            step.prompt_name,
+            render.version,
+            inputs[start:start + batch],
+            render.policies,
+            render.objectives,
+            prompt_cache,
+        )
+        for index, expanded in enumerate(rendered, start):
+            if isinstance(expanded, Exception):
+                item_results.append(
+                    WorkflowMapItemResult(index=index, status="error", error=str(expanded))
+                )
+            else:
+                item_results.append(
+                    WorkflowMapItemResult(
+                        index=index,
+                        system_message=expanded.system_message,
+                        user_message=expanded.user_message,
+                    )
+                )
+
+    failures = sum(1 for r in item_results if r.status != "success")
+    result = WorkflowStepResult(
+        step_id=step.id,
+        prompt_name=step.prompt_name,
+        prompt_version=render.version.version,
+        system_message=None,
+        user_message=json.dumps([r.user_message for r in item_results]),
+        items=item_results,
+    )
+    if failures:
+        result.status = "error"
+        result.error = f"{failures} of {len(item_results)} items failed"
+        result.user_message = ""
+    return result
 
 
 async def run_workflow(
-    db: AsyncSession, workflow_id: uuid.UUID, workflow_input: dict
+    db: AsyncSession,
+    workflow_id: uuid.UUID,
+    workflow_input: dict,
+    max_parallel: int | None = None,
+    on_error: str = "fail_fast",
+    on_step: Callable[[int, WorkflowStepResult], Awaitable[None]] | None = None,
+    on_start: Callable[[int, WorkflowStep], Awaitable[None]] | None = None,
 ) -> WorkflowRunResponse | None:
-    wf = await get_workflow(db, workflow_id)
-    if not wf:
+    """Run a workflow's compiled plan as a DAG, rendering independent steps concurrently.
+
+    The plan stored at save time is used as is unless a prompt it references has
+    changed since, in which case its versions are re-resolved (see ``_current_plan``).
+
+    Versions, includes and governance for every step are prefetched up front
+    (see ``_prefetch_run``), so steps only render, each on a worker thread (see
+    ``_run_step``); rendering is CPU-bound Python, so threads overlap steps and
+    keep the event loop free rather than adding cores. Up to ``max_parallel``
+    steps are in flight at once. With ``on_error="fail_fast"`` no new step starts
+    after a failure (steps already running finish); with ``"continue"`` only the
+    failed step's dependents are skipped. Results and ``outputs`` are always in
+    topological order, whatever order steps finished in.
+
+    ``on_step(position, result)`` is awaited for every result as it is recorded,
+    ``position`` being the step's index in that order, and ``on_start(position,
+    step)`` as each step is launched; asynchronous runs (``run_service``) and
+    streaming runs (``stream_workflow``) report progress through them.
+    """
+    workflow = (
+        await db.execute(select(Workflow).where(Workflow.id == workflow_id))
+    ).scalar_one_or_none()
+    if not workflow:
         return None
+    workflow_name = workflow.name
+    step_map = {step.id: step for step in _steps(workflow)}
 
-    steps = [WorkflowStep(**s) if isinstance(s, dict) else s for s in wf.steps]
-    ordered = _topological_sort(steps)
+    plan = await _current_plan(db, workflow)
+    order: list[str] = plan["order"]
+    nodes: dict[str, dict] = plan["steps"]
+    renders, prompt_cache = await _prefetch_run(db, nodes)
+    limit = max(1, max_parallel or settings.workflow_max_parallel)
 
-    step_outputs: dict[str, str] = {}
-    step_results: list[WorkflowStepResult] = []
+    waiting = {sid: set(nodes[sid]["waits_on"]) for sid in order}
+    position = {sid: i for i, sid in enumerate(order)}
 
-    # Build the input for each step: start with workflow_input, then layer in
-    # the output of each dependency (keyed by step id).
-    # Ensure "input" key always exists so {{ input }} never crashes.
-    prev_output: str | None = None
-    for step in ordered:
+    step_outputs: dict[str, str] = {}
+    results: dict[str, WorkflowStepResult] = {}
+    ready = deque(sid for sid in order if not waiting[sid])
+    running: dict[asyncio.Task, str] = {}
+    failed = False
+    reported: set[str] = set()
+
+    def build_input(step: WorkflowStep) -> dict:
+        # Start with workflow_input, layer in each dependency's output (keyed by
+        # step id), and make sure "input" exists so {{ input }} never crashes.
         step_input = dict(workflow_input)
         for dep_id in step.depends_on:
-            if dep_id in step_outputs:
-                step_input[dep_id] = step_outputs[dep_id]
-        if prev_output is not None:
-            step_input["input"] = prev_output
+            step_input[dep_id] = step_outputs[dep_id]
+        source = nodes[step.id]["input_from"]
+        if source is not None:
+            step_input["input"] = step_outputs[source]
         step_input.setdefault("input", "")
+        return step_input
 
-        try:
-            expand_result = await prompt_service.expand_prompt(
-                db,
-                step.prompt_name,
-                ExpandRequest(input=step_input),
-                version=step.prompt_version,
-            )
-            if not expand_result:
-                step_results.append(
-                    WorkflowStepResult(
-                        step_id=step.id,
-                        prompt_name=step.prompt_name,
-                        prompt_version=step.prompt_version or "latest",
-                        system_message=None,
-                        user_message="",
-                        status="error",
-                        error=f"Prompt '{step.prompt_name}' not found",
-                    )
-                )
-                break
-
-            step_outputs[step.id] = expand_result.user_message
-            prev_output = expand_result.user_message
-            step_results.append(
-                WorkflowStepResult(
-                    step_id=step.id,
-                    prompt_name=step.prompt_name,
-                    prompt_version=expand_result.prompt_version,
-                    system_message=expand_result.system_message,
-                    user_message=expand_result.user_message,
-                )
-            )
-        except Exception as e:
-            step_results.append(
-                WorkflowStepResult(
-                    step_id=step.id,
-                    prompt_name=step.prompt_name,
-                    prompt_version=step.prompt_version or "latest",
-                    system_message=None,
-                    user_message="",
-                    status="error",
-                    error=str(e),
+    def skip_dependents(step_id: str) -> None:
+        for dependent_id in nodes[step_id]["dependents"]:
+            if dependent_id not in results:
+                results[dependent_id] = _error_result(
+                    step_map[dependent_id], f"Skipped: dependency '{step_id}' failed", "skipped"
                 )
+                skip_dependents(dependent_id)
+
+    while ready or running:
+        while ready and len(running) < limit and not (failed and on_error == "fail_fast"):
+            step = step_map[ready.popleft()]
+            if on_start:
+                await on_start(position[step.id], step)
+            render = renders.get(nodes[step.id]["version_id"])
+            task = asyncio.create_task(
+                _run_step(step, build_input(step), render, prompt_cache)
             )
+            running[task] = step.id
+        if not running:
             break
-
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        # Handle completions in topological order so scheduling stays deterministic
+        for task in sorted(done, key=lambda t: position[running[t]]):
+            step_id = running.pop(task)
+            result = task.result()
+            results[step_id] = result
+            if result.status != "success":
+                failed = True
+                skip_dependents(step_id)
+                continue
+            step_outputs[step_id] = result.user_message
+            for dependent_id in nodes[step_id]["dependents"]:
+                waiting[dependent_id].discard(step_id)
+                if not waiting[dependent_id] and dependent_id not in results:
+                    ready.append(dependent_id)
+        if on_step:
+            for sid in sorted(results.keys() - reported, key=position.__getitem__):
+                reported.add(sid)
+                if results[sid].status != "skipped" or on_error != "fail_fast":
+                    await on_step(position[sid], results[sid])
+
+    if on_error == "fail_fast":
+        results = {k: v for k, v in results.items() if v.status != "skipped"}
     return WorkflowRunResponse(
-        workflow_id=wf.id,
-        workflow_name=wf.name,
-        steps=step_results,
-        outputs=step_outputs,
+        workflow_id=workflow_id,
+        workflow_name=workflow_name,
+        steps=[results[sid] for sid in order if sid in results],
+        outputs={sid: step_outputs[sid] for sid in order if sid in step_outputs},
     )
 
 
+async def stream_workflow(
+    db: AsyncSession,
+    workflow_id: uuid.UUID,
+    workflow_input: dict,
+    max_parallel: int | None = None,
+    on_error: str = "fail_fast",
+) -> AsyncIterator[WorkflowRunEvent]:
+    """Run a workflow, yielding events as it goes instead of one response at the end.
+
+    ``step_started`` and ``step_finished`` per step as the DAG progresses, then
+    a final ``done`` with the outputs (or ``error`` if the run could not start).
+    Closing the iterator early cancels the run.
+    """
+    events: asyncio.Queue[WorkflowRunEvent | None] = asyncio.Queue()
+
+    async def started(position: int, step: WorkflowStep) -> None:
+        events.put_nowait(
+            WorkflowRunEvent(event="step_started", step_id=step.id, position=position)
+        )
+
+    async def finished(position: int, result: WorkflowStepResult) -> None:
+        events.put_nowait(
+            WorkflowRunEvent(
+                event="step_finished", step_id=result.step_id, position=position, result=result
+            )
+        )
+
+    async def produce() -> None:
+        try:
+            result = await run_workflow(
+                db,
+                workflow_id,
+                workflow_input,
+                max_parallel=max_parallel,
+                on_error=on_error,
+                on_step=finished,
+                on_start=started,
+            )
+            if result is None:
+                events.put_nowait(WorkflowRunEvent(event="error", error="Workflow not found"))
+            else:
+                events.put_nowait(WorkflowRunEvent(event="done", outputs=result.outputs))
+        except ValueError as e:
+            events.put_nowait(WorkflowRunEvent(event="error", error=str(e)))
+        finally:
+            events.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        await producer
+    finally:
+        producer.cancel()
+
+
 async def share_workflow(
     db: AsyncSession, workflow_id: uuid.UUID, target_user_id: uuid.UUID
 ) -> ShareResponse | None:
@@ -217,6 +770,7 @@ async def share_workflow(
         )
     share = WorkflowShare(workflow_id=workflow_id, user_id=target_user_id)
     db.add(share)
+    await registry_service.bump(db)
     await db.commit()
     await db.refresh(share)
     user = (await db.execute(select(User).where(User.id == target_user_id))).scalar_one()
@@ -242,6 +796,7 @@ async def unshare_workflow(
     if not share:
         return False
     await db.delete(share)
+    await registry_service.bump(db)
     await db.commit()
     return True
 
@@ -0,0 +1,571 @@
+"""In-process metrics, exposed at ``/metrics`` in OpenMetrics text format.
+
+Counters, gauges and histograms live in plain dicts keyed by label values:
+updates happen on the event loop thread, so they need no locks and cost a dict
+lookup and an add. Gauges can also be backed by a callback read at scrape time
+(active MCP sessions, DB pool state).
+
+With several uvicorn workers, set ``metrics_multiproc_dir`` to a directory the
+workers share. Each worker writes a snapshot of its metrics there every
+``metrics_flush_seconds`` (and before answering a scrape) under an id unique to
+the process; ``/metrics`` merges all snapshots. Counters and histograms are
+summed over every snapshot, including those of workers that have exited, so
+totals don't go backwards when a worker restarts; gauges are summed over
+snapshots written within the last few flush intervals only. Snapshots not
+rewritten for ``metrics_snapshot_ttl_seconds`` are deleted.
+
+``MetricsMiddleware`` times every HTTP request by route template and counts
+the SQL statements each request runs (``instrument_engine`` hooks the engine).
+Requests running more than ``db_query_budget`` statements are logged with their
+slowest statements, and a statement shape repeated ``db_repeat_threshold``
+times in one request is logged as a likely N+1.
+``StageTimer`` breaks one operation (a prompt expansion) down into stages.
+"""
+
+import asyncio
+import contextvars
+import glob
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.skillcanon_server.config import settings
+
+logger = logging.getLogger("skillcanon.telemetry")
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._values: dict[tuple[str, ...], float] = {}
+        super().__init__(*args, **kwargs)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> dict:
+        return dict(self._values)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Callable[[], dict | float] | None = None, **kwargs):
+        self._values: dict[tuple[str, ...], float] = {}
+        self._callback = callback
+        super().__init__(*args, **kwargs)
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> dict:
+        if self._callback is None:
+            return dict(self._values)
+        try:
+            value = self._callback()
+        except Exception:
+            logger.debug("Gauge %s callback failed", self.name, exc_info=True)
+            return {}
+        if isinstance(value, dict):
+            return {(k,) if isinstance(k, str) else tuple(k): v for k, v in value.items()}
+        return {(): value}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = LATENCY_BUCKETS, **kwargs) -> None:
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        super().__init__(*args, **kwargs)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    def time(self, **labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def samples(self) -> dict:
+        return {key: list(state) for key, state in self._values.items()}
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict) -> None:
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(time.perf_counter() - self._started, **self._labels)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics[metric.name] = metric
+
+    def snapshot(self) -> dict:
+        """This process's metrics as JSON-serializable data."""
+        return {
+            "id": _snapshot_id(),
+            "metrics": {
+                m.name: {
+                    "samples": [[list(key), value] for key, value in m.samples().items()]
+                }
+                for m in self._metrics.values()
+            },
+        }
+
+    def write_snapshot(self, directory: str) -> None:
+        path = os.path.join(directory, f"metrics-{_snapshot_id()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def collect(self, directory: str | None = None) -> dict[str, dict[tuple, object]]:
+        """Samples per metric, merged over every worker's snapshot in ``directory``."""
+        if not directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.write_snapshot(directory)
+            snapshots = _read_snapshots(directory)
+        merged: dict[str, dict[tuple, object]] = {name: {} for name in self._metrics}
+        for snapshot in snapshots:
+            live = snapshot.get("live", True)
+            for name, data in snapshot["metrics"].items():
+                metric = self._metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not live):
+                    continue
+                samples = merged[name]
+                for key, value in data["samples"]:
+                    key = tuple(key)
+                    if metric.kind == "histogram":
+                        total = samples.get(key)
+                        samples[key] = (
+                            list(value) if total is None else [a + b for a, b in zip(total, value)]
+                        )
+                    else:
+                        samples[key] = samples.get(key, 0) + value
+        return merged
+
+    def render(self, directory: str | None = None) -> str:
+        merged = self.collect(directory)
+        lines: list[str] = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.append(f"# HELP {name} {_escape(metric.documentation)}")
+            for key, value in sorted(merged[name].items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind == "counter":
+                    lines.append(f"{name}_total{_labels(labels)} {_number(value)}")
+                elif metric.kind == "gauge":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                else:
+                    cumulative = 0
+                    for bound, count in zip((*metric.buckets, math.inf), value):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else repr(float(bound))
+                        lines.append(
+                            f"{name}_bucket{_labels([*labels, ('le', le)])} {int(cumulative)}"
+                        )
+                    lines.append(f"{name}_count{_labels(labels)} {int(cumulative)}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+_snapshot_owner: tuple[int, str] | None = None
+
+
+def _snapshot_id() -> str:
+    """This process's snapshot id: its pid plus a random suffix.
+
+    Regenerated after a fork, and never reused, so a new worker that happens to
+    get an exited worker's pid cannot overwrite that worker's snapshot.
+    """
+    global _snapshot_owner
+    pid = os.getpid()
+    if _snapshot_owner is None or _snapshot_owner[0] != pid:
+        _snapshot_owner = (pid, f"{pid}-{uuid.uuid4().hex[:12]}")
+    return _snapshot_owner[1]
+
+
+def _read_snapshots(directory: str) -> list[dict]:
+    """Every worker's snapshot in ``directory``, flagged ``live`` if recently written.
+
+    Snapshots older than ``metrics_snapshot_ttl_seconds`` belong to workers long
+    gone and are deleted instead of read.
+    """
+    now = time.time()
+    live_window = 3 * settings.metrics_flush_seconds
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            age = now - os.path.getmtime(path)
+            if age > settings.metrics_snapshot_ttl_seconds:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            logger.debug("Skipping unreadable metrics snapshot %s", path)
+            continue
+        snapshot["live"] = snapshot.get("id") == _snapshot_id() or age <= live_window
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = Registry()
+
+
+async def flush_snapshots(directory: str, interval: float) -> None:
+    """Write this worker's snapshot every ``interval`` seconds for the app's lifetime."""
+    while True:
+        try:
+            registry.write_snapshot(directory)
+        except OSError:
+            logger.warning("Failed to write metrics snapshot to %s", directory, exc_info=True)
+        await asyncio.sleep(interval)
+
+
+def render_metrics() -> str:
+    return registry.render(settings.metrics_multiproc_dir or None)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+http_request_duration = Histogram(
+    "skillcanon_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+db_query_duration = Histogram(
+    "skillcanon_db_query_duration_seconds", "Time spent executing one SQL statement"
+)
+db_queries_per_request = Histogram(
+    "skillcanon_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ("route",),
+    buckets=COUNT_BUCKETS,
+)
+db_seconds_per_request = Histogram(
+    "skillcanon_db_seconds_per_request",
+    "Time spent executing SQL per HTTP request",
+    ("route",),
+)
+db_budget_exceeded = Counter(
+    "skillcanon_db_query_budget_exceeded",
+    "HTTP requests that ran more SQL statements than db_query_budget",
+    ("route",),
+)
+db_repeated_statements = Counter(
+    "skillcanon_db_repeated_statements",
+    "Statement shapes run db_repeat_threshold or more times in one HTTP request (N+1)",
+    ("route",),
+)
+expand_render_duration = Histogram(
+    "skillcanon_expand_render_seconds", "Time to render one prompt expansion"
+)
+cache_requests = Counter(
+    "skillcanon_cache_requests",
+    "Lookups in in-process caches by outcome",
+    ("cache", "result"),
+)
+mcp_tool_duration = Histogram(
+    "skillcanon_mcp_tool_duration_seconds",
+    "MCP tool call latency by tool",
+    ("tool", "status"),
+)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class StageTimer:
+    """Durations of the named stages of one operation, in milliseconds.
+
+    Stages are timed on the monotonic clock; timing a stage again adds to it.
+    """
+
+    __slots__ = ("stages",)
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def rounded(self) -> dict[str, float]:
+        return {name: round(ms, 3) for name, ms in self.stages.items()}
+
+    def server_timing(self, total_ms: float | None = None) -> str:
+        """The stages as a ``Server-Timing`` header value."""
+        entries = [f"{name};dur={ms:.3f}" for name, ms in self.stages.items()]
+        if total_ms is not None:
+            entries.append(f"total;dur={total_ms:.3f}")
+        return ", ".join(entries)
+
+
+# ---------------------------------------------------------------------------
+# Request and database instrumentation
+# ---------------------------------------------------------------------------
+
+
+SLOWEST_KEPT = 5
+
+# A parenthesised list of bind parameters, in any DBAPI paramstyle
+_PARAM = r"(?:\?|\$\d+|%s|%\(\w+\)s|:\w+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with whitespace collapsed and parameter lists reduced to ``(...)``.
+
+    Statements that differ only in their parameters (the size of an ``IN``
+    list, the rows of a multi-row ``VALUES``) have the same shape.
+    """
+    shape = _PARAM_LIST.sub("(...)", _WHITESPACE.sub(" ", statement.strip()))
+    return _REPEATED_LISTS.sub("(...)", shape)
+
+
+class RequestStats:
+    """SQL statements run while serving one request, or in a ``track_queries`` block.
+
+    Keeps the statement count and total time, how often each statement shape
+    ran and the ``SLOWEST_KEPT`` slowest statements. Statements also count
+    against ``parent``, the stats that were current when these were created.
+    """
+
+    __slots__ = ("queries", "db_seconds", "shapes", "_slowest", "parent")
+
+    def __init__(self, parent: "RequestStats | None" = None) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.shapes: dict[str, int] = {}
+        self._slowest: list[tuple[float, str]] = []
+        self.parent = parent
+
+    def record(self, statement: str, seconds: float) -> None:
+        stats = self
+        shape = statement_shape(statement)
+        while stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+            stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+            if len(stats._slowest) < SLOWEST_KEPT:
+                heapq.heappush(stats._slowest, (seconds, shape))
+            elif seconds > stats._slowest[0][0]:
+                heapq.heapreplace(stats._slowest, (seconds, shape))
+            stats = stats.parent
+
+    def slowest(self) -> list[tuple[float, str]]:
+        """The slowest statements as (seconds, shape), slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Statement shapes that ran at least ``threshold`` times."""
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+    def describe(self) -> str:
+        lines = [f"{self.queries} statement(s) in {self.db_seconds * 1000:.1f} ms"]
+        lines += [
+            f"  {n}x {_abbreviate(shape)}"
+            for shape, n in sorted(self.shapes.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines)
+
+
+def _abbreviate(shape: str, limit: int = 200) -> str:
+    return shape if len(shape) <= limit else shape[: limit - 3] + "..."
+
+
+request_stats: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[RequestStats]:
+    """Collect the statements run inside the block (including by requests it serves)."""
+    stats = RequestStats(parent=request_stats.get())
+    token = request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        request_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own execution context: a statement that fails never
+    # reaches after_cursor_execute, and its start time goes away with the context
+    if context is not None:
+        context._skillcanon_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_skillcanon_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_query_duration.observe(elapsed)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement ``engine`` runs and count it against the current request.
+
+    Instrumenting the same engine again is a no-op.
+    """
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def check_query_budget(method: str, route: str, stats: RequestStats) -> None:
+    """Log (and count) a request over ``db_query_budget`` or with repeated statements."""
+    budget = settings.db_query_budget
+    if budget and stats.queries > budget:
+        db_budget_exceeded.inc(route=route)
+        logger.warning(
+            "%s %s ran %d SQL statements (budget %d) in %.1f ms; slowest: %s",
+            method,
+            route,
+            stats.queries,
+            budget,
+            stats.db_seconds * 1000,
+            "; ".join(
+                f"{seconds * 1000:.1f} ms {_abbreviate(shape)}"
+                for seconds, shape in stats.slowest()
+            ),
+        )
+    threshold = settings.db_repeat_threshold
+    if threshold:
+        for shape, count in stats.repeated(threshold).items():
+            db_repeated_statements.inc(route=route)
+            logger.warning(
+                "Possible N+1 in %s %s: %d x %s", method, route, count, _abbreviate(shape)
+            )
+
+
+class MetricsMiddleware:
+    """Record latency and SQL statement count per request, labelled by route template."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats(parent=request_stats.get())
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or (
+                "/mcp" if scope["path"].startswith("/mcp") else "unmatched"
+            )
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=path,
+                status=status,
+            )
+            db_queries_per_request.observe(stats.queries, route=path)
+            db_seconds_per_request.observe(stats.db_seconds, route=path)
+            check_query_budget(scope["method"], path, stats)
@@ -0,0 +1,129 @@
+"""Benchmark prompt search over a synthetic registry.
+
+Run from legacy/backend:
+
+    python -m tests.bench.bench_search [--prompts 50000] [--database-url URL]
+
+Defaults to in-memory SQLite (the inverted-index fallback). Point
+``--database-url`` at a migrated Postgres database to exercise the
+full-text/trigram path. Prints a JSON summary to stdout.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.skillcanon_server.models import Base, Prompt, PromptVersion
+from src.skillcanon_server.services import prompt_service, search_service
+
+_WORDS = (
+    "review plan commit spec test deploy refactor security audit docs release triage "
+    "migration incident design api schema frontend backend infra data model metrics "
+    "onboarding checklist summary changelog bug feature perf latency cache queue"
+).split()
+
+QUERIES = ["review", "sec", "deploy checklist", "prompt-49999", "nothing-matches-this"]
+
+
+def _synthetic_rows(count: int, seed: int = 7) -> tuple[list[dict], list[dict]]:
+    rng = random.Random(seed)
+    prompts, versions = [], []
+    for i in range(count):
+        prompt_id = uuid.uuid4()
+        name = f"{rng.choice(_WORDS)}-{rng.choice(_WORDS)}-prompt-{i}"
+        description = " ".join(rng.sample(_WORDS, 6))
+        tags = rng.sample(_WORDS, 3)
+        prompts.append(
+            {
+                "id": prompt_id,
+                "name": name,
+                "description": description,
+                "search_document": prompt_service.build_search_document(name, description, tags),
+            }
+        )
+        versions.append(
+            {
+                "id": uuid.uuid4(),
+                "prompt_id": prompt_id,
+                "version": "1.0.0",
+                "user_template": "{{ input }}",
+                "input_schema": {},
+                "tags": tags,
+            }
+        )
+    return prompts, versions
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+async def run(prompt_count: int, database_url: str, iterations: int) -> dict:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    prompts, versions = _synthetic_rows(prompt_count)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        t0 = time.perf_counter()
+        for start in range(0, len(prompts), 5000):
+            await db.execute(insert(Prompt), prompts[start:start + 5000])
+            await db.execute(insert(PromptVersion), versions[start:start + 5000])
+        await db.commit()
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        await search_service.search_prompts(db, "warmup")
+        cold_ms = (time.perf_counter() - t0) * 1000
+
+        per_query = {}
+        for query in QUERIES:
+            samples = []
+            total = 0
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                result = await search_service.search_prompts(db, query, page_size=20)
+                samples.append((time.perf_counter() - t0) * 1000)
+                total = result.total
+            per_query[query] = {"hits": total, **_percentiles(samples)}
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+    return {
+        "benchmark": "prompt_search",
+        "dialect": engine.dialect.name,
+        "prompts": prompt_count,
+        "iterations": iterations,
+        "load_ms": round(load_ms, 1),
+        "first_query_ms": round(cold_ms, 1),
+        "queries": per_query,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=50_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite://")
+    args = parser.parse_args()
+    summary = asyncio.run(run(args.prompts, args.database_url, args.iterations))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Benchmark the workflow planner and scheduler over synthetic DAGs.
+
+Run from legacy/backend:
+
+    python -m tests.bench.bench_workflows [--shapes chain,fanout,diamond]
+        [--sizes 10,100,500,2000] [--baseline tests/bench/baselines/workflows.json]
+        [--output results.json]
+
+Every step renders the same trivial prompt on in-memory SQLite, so the numbers
+are dominated by planning, scheduling and database round trips rather than
+template work. For each shape and size it reports:
+
+- ``plan_ms``: validating and levelling the graph (``_plan_graph``)
+- ``save_ms``: ``create_workflow``, which compiles and stores the plan
+- ``run_p50_ms`` / ``run_max_ms``: end-to-end ``run_workflow`` latency
+- ``overhead_ms`` / ``overhead_per_step_us``: run time spent neither rendering
+  steps nor waiting on the database, i.e. the scheduler itself
+- ``queries`` / ``queries_per_step``: statements executed by one run
+- ``peak_kb``: peak Python allocation during one run (tracemalloc)
+
+The step memo is cleared before every run so each one renders all its steps.
+Prints a JSON summary to stdout. With ``--baseline`` each case is compared
+against a stored summary and the process exits non-zero when a metric grew by
+more than ``--tolerance``; ``--output`` writes the summary for use as the next
+baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from collections.abc import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.skillcanon_server.models import Base, Team, User
+from src.skillcanon_server.schemas import (
+    PromptCreate,
+    PromptVersionCreate,
+    WorkflowCreate,
+    WorkflowStep,
+)
+from src.skillcanon_server.services import prompt_service, workflow_service
+
+PROMPT = "bench-step"
+
+# Metrics compared against a baseline; larger is worse for all of them
+COMPARED = ("run_p50_ms", "overhead_per_step_us", "queries", "peak_kb")
+
+
+def chain(size: int) -> list[WorkflowStep]:
+    """s0 -> s1 -> ... -> s{size-1}."""
+    return [
+        WorkflowStep(id=f"s{i}", prompt_name=PROMPT, depends_on=[f"s{i - 1}"] if i else [])
+        for i in range(size)
+    ]
+
+
+def fanout(size: int) -> list[WorkflowStep]:
+    """One root feeding ``size - 1`` independent leaves."""
+    root = WorkflowStep(id="root", prompt_name=PROMPT, depends_on=[])
+    return [root] + [
+        WorkflowStep(id=f"leaf{i}", prompt_name=PROMPT, depends_on=["root"])
+        for i in range(size - 1)
+    ]
+
+
+def diamond(size: int) -> list[WorkflowStep]:
+    """Diamonds stacked end to end: top -> (left, right) -> bottom = next top."""
+    steps = [WorkflowStep(id="d0", prompt_name=PROMPT, depends_on=[])]
+    top = "d0"
+    block = 0
+    while len(steps) < size:
+        block += 1
+        left, right, bottom = f"l{block}", f"r{block}", f"d{block}"
+        steps.append(WorkflowStep(id=left, prompt_name=PROMPT, depends_on=[top]))
+        steps.append(WorkflowStep(id=right, prompt_name=PROMPT, depends_on=[top]))
+        steps.append(WorkflowStep(id=bottom, prompt_name=PROMPT, depends_on=[left, right]))
+        top = bottom
+    return steps[:size]
+
+
+SHAPES: dict[str, Callable[[int], list[WorkflowStep]]] = {
+    "chain": chain,
+    "fanout": fanout,
+    "diamond": diamond,
+}
+
+
+class _Counters:
+    """Statement count and time spent in the database driver."""
+
+    def __init__(self, engine) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+        self._started: list[float] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, *args) -> None:
+        self.queries += 1
+        self._started.append(time.perf_counter())
+
+    def _after(self, *args) -> None:
+        self.db_seconds += time.perf_counter() - self._started.pop()
+
+    def reset(self) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+def _timed_run_step(real_run_step: Callable, totals: dict) -> Callable:
+    async def run_step(*args):
+        t0 = time.perf_counter()
+        try:
+            return await real_run_step(*args)
+        finally:
+            totals["step_seconds"] += time.perf_counter() - t0
+
+    return run_step
+
+
+async def _measure(
+    session_factory,
+    counters: _Counters,
+    owner_id: uuid.UUID,
+    shape: str,
+    size: int,
+    iterations: int,
+    limit: int,
+) -> dict:
+    steps = SHAPES[shape](size)
+
+    t0 = time.perf_counter()
+    workflow_service._plan_graph(steps)
+    plan_ms = (time.perf_counter() - t0) * 1000
+
+    async with session_factory() as db:
+        t0 = time.perf_counter()
+        workflow = await workflow_service.create_workflow(
+            db, WorkflowCreate(user_id=owner_id, name=f"bench-{shape}-{size}", steps=steps)
+        )
+        save_ms = (time.perf_counter() - t0) * 1000
+
+    samples, overheads, queries = [], [], 0
+    real_run_step = workflow_service._run_step
+    for _ in range(iterations):
+        workflow_service._memo_clear()
+        totals = {"step_seconds": 0.0}
+        workflow_service._run_step = _timed_run_step(real_run_step, totals)
+        counters.reset()
+        try:
+            async with session_factory() as db:
+                t0 = time.perf_counter()
+                result = await workflow_service.run_workflow(
+                    db, workflow.id, {"input": "x"}, max_parallel=limit
+                )
+                elapsed = time.perf_counter() - t0
+        finally:
+            workflow_service._run_step = real_run_step
+        assert result and all(s.status == "success" for s in result.steps), "bench run failed"
+        samples.append(elapsed * 1000)
+        overheads.append((elapsed - totals["step_seconds"] - counters.db_seconds) * 1000)
+        queries = counters.queries
+
+    workflow_service._memo_clear()
+    tracemalloc.start()
+    async with session_factory() as db:
+        await workflow_service.run_workflow(db, workflow.id, {"input": "x"}, max_parallel=limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    overhead_ms = statistics.median(overheads)
+    return {
+        "shape": shape,
+        "steps": size,
+        "plan_ms": round(plan_ms, 3),
+        "save_ms": round(save_ms, 1),
+        "run_p50_ms": round(statistics.median(samples), 1),
+        "run_max_ms": round(max(samples), 1),
+        "overhead_ms": round(overhead_ms, 1),
+        "overhead_per_step_us": round(overhead_ms * 1000 / size, 1),
+        "queries": queries,
+        "queries_per_step": round(queries / size, 3),
+        "peak_kb": round(peak / 1024),
+    }
+
+
+async def run(
+    shapes: list[str], sizes: list[int], database_url: str, iterations: int, max_parallel: int
+) -> dict:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    counters = _Counters(engine)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    owner_id = uuid.uuid4()
+    async with session_factory() as db:
+        team = Team(name="Bench", slug="bench")
+        db.add(team)
+        await db.flush()
+        db.add(User(id=owner_id, team_id=team.id, username="bench"))
+        await db.commit()
+        await prompt_service.create_prompt(
+            db,
+            PromptCreate(
+                name=PROMPT,
+                version=PromptVersionCreate(version="1.0.0", user_template="<{{ input[:8] }}>"),
+            ),
+        )
+
+    cases = []
+    for shape in shapes:
+        for size in sizes:
+            cases.append(
+                await _measure(
+                    session_factory, counters, owner_id, shape, size, iterations, max_parallel
+                )
+            )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+    return {
+        "benchmark": "workflow_scheduler",
+        "dialect": engine.dialect.name,
+        "iterations": iterations,
+        "max_parallel": max_parallel,
+        "cases": cases,
+    }
+
+
+def compare(summary: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of ``summary`` against ``baseline``, one line per metric."""
+    previous = {(c["shape"], c["steps"]): c for c in baseline.get("cases", [])}
+    regressions = []
+    for case in summary["cases"]:
+        before = previous.get((case["shape"], case["steps"]))
+        if before is None:
+            continue
+        case["baseline"] = {}
+        for metric in COMPARED:
+            old, new = before.get(metric), case[metric]
+            if not old:
+                continue
+            ratio = new / old
+            case["baseline"][metric] = {"was": old, "ratio": round(ratio, 2)}
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{case['shape']}/{case['steps']}: {metric} {old} -> {new} ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--sizes", default="10,100,500,2000")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--max-parallel", type=int, default=8)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite://")
+    parser.add_argument("--baseline", help="JSON summary from an earlier run to diff against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed growth per metric (0.25 = 25%%)"
+    )
+    parser.add_argument("--output", help="also write the JSON summary to this file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(
+        run(
+            args.shapes.split(","),
+            [int(s) for s in args.sizes.split(",")],
+            args.database_url,
+            args.iterations,
+            args.max_parallel,
+        )
+    )
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        summary["regressions"] = regressions
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
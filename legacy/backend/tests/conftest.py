@@ -3,12 +3,14 @@
 import asyncio
 import uuid
 from collections.abc import AsyncGenerator
+from contextlib import contextmanager
 
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from src.skillcanon_server import telemetry
 from src.skillcanon_server.models import Base, User
 
 # A mock admin user for tests that hit auth-protected endpoints
@@ -77,6 +79,27 @@ async def client(db_engine) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def query_budget(db_engine):
+    """Fail the test when a block runs more SQL than allowed.
+
+    ``with query_budget(3): await client.get(...)`` allows at most 3 statements;
+    ``max_repeats`` also caps how often any one statement shape may run (N+1).
+    """
+    telemetry.instrument_engine(db_engine)
+
+    @contextmanager
+    def budget(limit: int, max_repeats: int | None = None):
+        with telemetry.track_queries() as stats:
+            yield stats
+        assert stats.queries <= limit, f"over budget of {limit}: {stats.describe()}"
+        if max_repeats is not None:
+            repeated = stats.repeated(max_repeats + 1)
+            assert not repeated, f"repeated more than {max_repeats}x: {stats.describe()}"
+
+    return budget
+
+
 def make_user_client_factory(db_engine):
     """Return a factory that creates an AsyncClient authenticated as a specific User."""
 
@@ -201,3 +201,33 @@ async def test_revoke_api_key_forbidden_for_other_user(client, user_client_facto
     intruder_client = await user_client_factory(intruder)
     resp = await intruder_client.delete(f"/api/v1/api-keys/{key_id}")
     assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_expand_with_api_key_touches_last_used_at_once_per_interval(
+    client, db_session, monkeypatch
+):
+    from src.skillcanon_server.config import settings
+    from src.skillcanon_server.services import apikey_service
+
+    user_id = await _create_user(client)
+    key, raw_key = await apikey_service.create_api_key(db_session, uuid.UUID(user_id), "ci")
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "touched", "version": {"version": "1.0.0", "user_template": "a"}},
+    )
+    auth = {"Authorization": f"Bearer {raw_key}"}
+    assert (await client.post("/api/v1/expand/touched", json={}, headers=auth)).is_success
+    await db_session.refresh(key)
+    first_use = key.last_used_at
+    assert first_use is not None
+
+    for _ in range(2):
+        assert (await client.post("/api/v1/expand/touched", json={}, headers=auth)).is_success
+    await db_session.refresh(key)
+    assert key.last_used_at == first_use
+
+    monkeypatch.setattr(settings, "api_key_touch_seconds", 0)
+    assert (await client.post("/api/v1/expand/touched", json={}, headers=auth)).is_success
+    await db_session.refresh(key)
+    assert key.last_used_at > first_use
@@ -1,6 +1,6 @@
 """Tests for MCP tool registration and invocation."""
 
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
@@ -12,8 +12,17 @@ from src.skillcanon_server.mcp.tools import (
     sh_search,
     sh_workflow_list,
     sh_workflow_run,
+    sh_workflow_status,
 )
 from src.skillcanon_server.models import Prompt, PromptVersion, Team, User, Workflow
+from src.skillcanon_server.services import search_service
+
+
+@pytest.fixture(autouse=True)
+def fresh_search_index(monkeypatch):
+    # sh-search uses search_service's process-wide index, keyed by registry
+    # revision only; every test starts a new database at revision 0.
+    monkeypatch.setattr(search_service, "_index", None)
 
 
 def _test_session_factory(db_session):
@@ -22,10 +31,17 @@ def _test_session_factory(db_session):
     )
 
 
+# MCP session state is keyed by id(ctx.session); keeping every mock session alive
+# stops a collected one's id (and cached user) from being reused by a later ctx.
+_live_sessions: list = []
+
+
 def _mock_ctx():
     """Create a mock Context with a unique session identity."""
     ctx = MagicMock()
     ctx.session = MagicMock()
+    ctx.report_progress = AsyncMock()
+    _live_sessions.append(ctx.session)
     return ctx
 
 
@@ -141,6 +157,34 @@ async def test_sh_search_by_description(db_session: AsyncSession, monkeypatch):
     assert "sh-desc-match" in result
 
 
+@pytest.mark.asyncio
+async def test_sh_search_only_finds_accessible_prompts(db_session: AsyncSession, monkeypatch):
+    """sh-search applies the same owner-or-shared filtering as the prompts API."""
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.mcp.session import _current_api_key
+    from src.skillcanon_server.services import apikey_service
+
+    owner = await _create_test_user(db_session)
+    stranger = User(team_id=owner.team_id, username="search-stranger", email="ss@test.local")
+    db_session.add(stranger)
+    prompt = Prompt(name="private-finding", description="Owner only", user_id=owner.id)
+    db_session.add(prompt)
+    await db_session.flush()
+    db_session.add(PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template="x"))
+    await db_session.commit()
+    _, owner_key = await apikey_service.create_api_key(db_session, owner.id, "mcp")
+    _, stranger_key = await apikey_service.create_api_key(db_session, stranger.id, "mcp")
+    monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
+
+    for key, visible in ((owner_key, True), (stranger_key, False)):
+        token = _current_api_key.set(key)
+        try:
+            result = await sh_search("finding", ctx=_mock_ctx())
+        finally:
+            _current_api_key.reset(token)
+        assert ("sh-private-finding" in result) is visible
+
+
 def test_sh_run_tool_registered():
     """sh-run is registered as a static MCP tool."""
     assert "sh-run" in mcp._tool_manager._tools
@@ -194,6 +238,98 @@ async def test_sh_run_plain_string_input(db_session: AsyncSession, monkeypatch):
     assert "Got: just a string" in result
 
 
+def test_sh_run_many_tool_registered():
+    """sh-run-many is registered with a structured items schema."""
+    tool = mcp._tool_manager._tools["sh-run-many"]
+    assert tool.parameters["properties"]["items"]["type"] == "array"
+
+
+@pytest.mark.asyncio
+async def test_sh_run_many_renders_in_order_with_per_item_errors(
+    db_session: AsyncSession, monkeypatch
+):
+    """sh-run-many expands every item in one call and reports failures inline."""
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.schemas import PromptRunItem
+
+    for name, template in (
+        ("plan", "Plan: {{ input }}"),
+        ("spec", "Spec {{ include_prompt('shared-footer') }}"),
+        ("shared-footer", "-- footer --"),
+        ("strict", "Needs {{ missing_var }}"),
+    ):
+        prompt = Prompt(name=name)
+        db_session.add(prompt)
+        await db_session.flush()
+        db_session.add(PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template=template))
+    await db_session.commit()
+
+    monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
+
+    result = await tools_module.sh_run_many(
+        items=[
+            PromptRunItem(name="plan", input="ship it"),
+            PromptRunItem(name="nope", input="x"),
+            PromptRunItem(name="strict", input="x"),
+            PromptRunItem(name="spec", input='{"input": "y"}'),
+        ],
+        ctx=_mock_ctx(),
+    )
+    sections = result.split("\n\n=== ")
+    assert sections[0].startswith("=== [1] plan (v1.0.0) ===")
+    assert "Plan: ship it" in sections[0]
+    assert sections[1].startswith("[2] nope ===\nError:")
+    assert sections[2].startswith("[3] strict ===\nError:")
+    assert "-- footer --" in sections[3]
+
+
+@pytest.mark.asyncio
+async def test_sh_run_many_reports_unexpected_errors_per_item(
+    db_session: AsyncSession, monkeypatch
+):
+    """Any exception from one item is reported inline; the other items still render."""
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.schemas import PromptRunItem
+    from src.skillcanon_server.services import prompt_service
+
+    for name in ("first", "broken", "last"):
+        prompt = Prompt(name=name)
+        db_session.add(prompt)
+        await db_session.flush()
+        db_session.add(PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template=name))
+    await db_session.commit()
+
+    monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
+    real_expand = prompt_service.expand_prompt
+
+    async def _expand(db, name, *args, **kwargs):
+        if name == "broken":
+            raise ValueError("bad reference")
+        return await real_expand(db, name, *args, **kwargs)
+
+    monkeypatch.setattr(prompt_service, "expand_prompt", _expand)
+
+    result = await tools_module.sh_run_many(
+        items=[PromptRunItem(name=name) for name in ("first", "broken", "last")],
+        ctx=_mock_ctx(),
+    )
+    sections = result.split("\n\n=== ")
+    assert "[User]\nfirst" in sections[0]
+    assert sections[1] == "[2] broken ===\nError: ValueError: bad reference"
+    assert "[User]\nlast" in sections[2]
+
+
+@pytest.mark.asyncio
+async def test_sh_run_many_limits(db_session: AsyncSession, monkeypatch):
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.schemas import PromptRunItem
+
+    monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
+    assert "no items" in await tools_module.sh_run_many(items=[], ctx=_mock_ctx())
+    too_many = [PromptRunItem(name="p")] * 21
+    assert "at most 20" in await tools_module.sh_run_many(items=too_many, ctx=_mock_ctx())
+
+
 # ---------------------------------------------------------------------------
 # Workflow MCP tools
 # ---------------------------------------------------------------------------
@@ -290,7 +426,280 @@ async def test_workflow_run_success(db_session: AsyncSession, monkeypatch):
 
     monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
 
-    result = await sh_workflow_run(name="Greet Flow", input="World", ctx=_mock_ctx())
+    ctx = _mock_ctx()
+    result = await sh_workflow_run(name="Greet Flow", input="World", ctx=ctx)
     assert "Greet Flow" in result
     assert "Hello World" in result
     assert "s1" in result
+    ctx.report_progress.assert_awaited_once_with(1, 1, "s1: success")
+
+
+@pytest.mark.asyncio
+async def test_workflow_run_in_background(db_session: AsyncSession, monkeypatch):
+    """sh-workflow-run(background=True) queues a run that sh-workflow-status reports on."""
+    import re
+
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.mcp.session import _current_api_key
+    from src.skillcanon_server.services import apikey_service, run_service
+
+    user = await _create_test_user(db_session)
+    prompt = Prompt(name="bg-greet", user_id=user.id)
+    db_session.add(prompt)
+    await db_session.flush()
+    db_session.add(
+        PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template="Hi {{ input }}")
+    )
+    db_session.add(
+        Workflow(
+            user_id=user.id,
+            name="Background Flow",
+            steps=[{"id": "s1", "prompt_name": "bg-greet", "depends_on": []}],
+        )
+    )
+    stranger = User(team_id=user.team_id, username="bg-stranger", email="bg@test.local")
+    db_session.add(stranger)
+    await db_session.commit()
+    _, raw_key = await apikey_service.create_api_key(db_session, user.id, "mcp")
+    _, stranger_key = await apikey_service.create_api_key(db_session, stranger.id, "mcp")
+    factory = _test_session_factory(db_session)
+    monkeypatch.setattr(tools_module, "async_session", factory)
+
+    assert "authenticated" in await sh_workflow_run(
+        name="Background Flow", input="there", ctx=_mock_ctx(), background=True
+    )
+    token = _current_api_key.set(raw_key)
+    try:
+        queued = await sh_workflow_run(
+            name="Background Flow", input="there", ctx=_mock_ctx(), background=True
+        )
+        run_id = re.search(r"run ([0-9a-f-]{36})", queued).group(1)
+        assert "queued" in await sh_workflow_status(run_id=run_id, ctx=_mock_ctx())
+
+        await run_service.process_next(factory, "worker-1")
+        status = await sh_workflow_status(run_id=run_id, ctx=_mock_ctx())
+        assert "succeeded" in status
+        assert "Hi there" in status
+        assert "not found" in await sh_workflow_status(run_id="nope", ctx=_mock_ctx())
+    finally:
+        _current_api_key.reset(token)
+
+    # Neither anonymous sessions nor other users can read the run
+    assert "not found" in await sh_workflow_status(run_id=run_id, ctx=_mock_ctx())
+    token = _current_api_key.set(stranger_key)
+    try:
+        assert "not found" in await sh_workflow_status(run_id=run_id, ctx=_mock_ctx())
+    finally:
+        _current_api_key.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# Per-call pipeline
+# ---------------------------------------------------------------------------
+
+def _counting_session_factory(db_session, counter: list):
+    factory = _test_session_factory(db_session)
+
+    def _open():
+        counter.append(1)
+        return factory()
+
+    return _open
+
+
+@pytest.mark.asyncio
+async def test_tool_call_opens_one_session(db_session: AsyncSession, monkeypatch):
+    """Each tool call uses a single DB session, including auth and context injection."""
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.mcp.session import _current_api_key
+    from src.skillcanon_server.services import apikey_service
+
+    user = await _create_test_user(db_session)
+    key, raw_key = await apikey_service.create_api_key(db_session, user.id, "mcp")
+    prompt = Prompt(name="one-session", user_id=user.id)
+    db_session.add(prompt)
+    await db_session.flush()
+    db_session.add(PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template="{{ input }}"))
+    await db_session.commit()
+
+    opened: list = []
+    monkeypatch.setattr(
+        tools_module, "async_session", _counting_session_factory(db_session, opened)
+    )
+    validations: list = []
+    real_validate = apikey_service.validate_key
+
+    async def _validate(db, raw, commit=True):
+        validations.append(commit)
+        return await real_validate(db, raw, commit=commit)
+
+    monkeypatch.setattr(apikey_service, "validate_key", _validate)
+
+    ctx = _mock_ctx()
+    token = _current_api_key.set(raw_key)
+    try:
+        first = await sh_run(name="one-session", input="hi", ctx=ctx)
+        assert len(opened) == 1
+        assert "SESSION CONTEXT" in first
+
+        second = await sh_list(ctx=ctx)
+        assert len(opened) == 2
+        assert "SESSION CONTEXT" not in second
+        assert "one-session" in second
+    finally:
+        _current_api_key.reset(token)
+
+    # Validated once per MCP session, inside the tool's own transaction
+    assert validations == [False]
+    await db_session.refresh(key)
+    assert key.last_used_at is not None
+
+
+@pytest.mark.asyncio
+async def test_sh_run_access_follows_registry_revision(db_session: AsyncSession, monkeypatch):
+    """sh-run denies unshared prompts and picks up a new share within the same MCP session."""
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.mcp.session import _current_api_key, session_manager
+    from src.skillcanon_server.services import apikey_service, prompt_service
+
+    owner = await _create_test_user(db_session)
+    caller = User(team_id=owner.team_id, username="mcp-caller", email="caller@test.local")
+    db_session.add(caller)
+    await db_session.flush()
+    prompt = Prompt(name="owned-elsewhere", user_id=owner.id)
+    db_session.add(prompt)
+    await db_session.flush()
+    db_session.add(PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template="ok"))
+    await db_session.commit()
+    _, raw_key = await apikey_service.create_api_key(db_session, caller.id, "mcp")
+
+    monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
+    calls: list = []
+    real_check = prompt_service.can_access_prompt
+
+    async def _check(db, user_id, name):
+        calls.append(name)
+        return await real_check(db, user_id, name)
+
+    monkeypatch.setattr(prompt_service, "can_access_prompt", _check)
+
+    ctx = _mock_ctx()
+    token = _current_api_key.set(raw_key)
+    try:
+        assert "not shared with you" in await sh_run(name="owned-elsewhere", input="x", ctx=ctx)
+        assert "not shared with you" in await sh_run(name="owned-elsewhere", input="x", ctx=ctx)
+        assert calls == []  # answered by the session catalog
+
+        # Stale catalog: the check goes to the database while the catalog rebuilds
+        await prompt_service.share_prompt(db_session, "owned-elsewhere", caller.id)
+        result = await sh_run(name="owned-elsewhere", input="x", ctx=ctx)
+        assert "[User]\nok" in result
+        assert calls == ["owned-elsewhere"]
+
+        await session_manager.get_or_create(id(ctx.session)).catalog_refresh
+        assert "[User]\nok" in await sh_run(name="owned-elsewhere", input="x", ctx=ctx)
+        assert calls == ["owned-elsewhere"]
+    finally:
+        _current_api_key.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_sh_run_applies_owner_governance(client, db_session: AsyncSession, monkeypatch):
+    """sh-run and sh-run-many render under the prompt owner's policies, like REST /expand."""
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.mcp.session import _current_api_key
+    from src.skillcanon_server.models import EnforcementType, Policy
+    from src.skillcanon_server.schemas import PromptRunItem
+    from src.skillcanon_server.services import apikey_service, prompt_service
+
+    owner = await _create_test_user(db_session)
+    other_team = Team(name="Caller Team", slug="caller-team")
+    db_session.add(other_team)
+    await db_session.flush()
+    caller = User(team_id=other_team.id, username="gov-caller", email="gov-caller@test.local")
+    db_session.add(caller)
+    for team_id, rule in ((owner.team_id, "owner rule"), (other_team.id, "caller rule")):
+        db_session.add(
+            Policy(
+                team_id=team_id,
+                name=rule,
+                enforcement_type=EnforcementType.append,
+                content=rule,
+            )
+        )
+    prompt = Prompt(name="governed", user_id=owner.id)
+    db_session.add(prompt)
+    await db_session.flush()
+    db_session.add(PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template="go"))
+    await db_session.commit()
+    await prompt_service.share_prompt(db_session, "governed", caller.id)
+    _, raw_key = await apikey_service.create_api_key(db_session, caller.id, "mcp")
+
+    monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
+    rest = await client.post("/api/v1/expand/governed", json={"input": {}})
+    assert rest.json()["applied_policies"] == ["owner rule"]
+
+    token = _current_api_key.set(raw_key)
+    try:
+        single = await sh_run(name="governed", input="x", ctx=_mock_ctx())
+        batch = await tools_module.sh_run_many(
+            items=[PromptRunItem(name="governed", input="x")], ctx=_mock_ctx()
+        )
+    finally:
+        _current_api_key.reset(token)
+    for result in (single, batch):
+        assert "[Policies Applied]\nowner rule" in result
+        assert "caller rule" not in result.split("═══════")[-1]
+
+
+@pytest.mark.asyncio
+async def test_catalog_served_stale_then_refreshed(db_session: AsyncSession, monkeypatch):
+    """Discovery tools serve the session catalog and rebuild it when the registry moves."""
+    from src.skillcanon_server.mcp import tools as tools_module
+    from src.skillcanon_server.mcp.session import session_manager
+    from src.skillcanon_server.schemas import PromptCreate, PromptVersionCreate
+    from src.skillcanon_server.services import prompt_service
+
+    await prompt_service.create_prompt(
+        db_session,
+        PromptCreate(name="first", version=PromptVersionCreate(version="1.0.0", tags=["alpha"])),
+    )
+    monkeypatch.setattr(tools_module, "async_session", _test_session_factory(db_session))
+    ctx = _mock_ctx()
+    state = session_manager.get_or_create(id(ctx.session))
+
+    assert "first" in await sh_list(ctx=ctx)
+    snapshot = state.catalog
+    assert "sh-first" in await sh_search(query="alph", ctx=ctx)
+    assert state.catalog is snapshot
+    assert state.catalog_refresh is None
+
+    await prompt_service.create_prompt(
+        db_session,
+        PromptCreate(name="second", version=PromptVersionCreate(version="1.0.0")),
+    )
+    assert "second" not in await sh_list(ctx=ctx)
+    await state.catalog_refresh
+    assert state.catalog.revision > snapshot.revision
+    assert "second" in await sh_list(ctx=ctx)
+
+
+@pytest.mark.asyncio
+async def test_catalog_excludes_deprecated_and_tracks_pinned_version(db_session: AsyncSession):
+    from src.skillcanon_server.mcp.catalog import build_catalog
+
+    prompt = Prompt(name="pinned")
+    old = Prompt(name="retired", is_deprecated=True)
+    db_session.add_all([prompt, old])
+    await db_session.flush()
+    v1 = PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template="v1")
+    db_session.add_all([v1, PromptVersion(prompt_id=old.id, version="1.0.0")])
+    await db_session.flush()
+    prompt.active_version_id = v1.id
+    await db_session.commit()
+
+    snapshot = await build_catalog(db_session, None, revision=7)
+    assert [p.name for p in snapshot.prompts] == ["pinned"]
+    assert snapshot.prompt("pinned").version_id == v1.id
+    assert snapshot.accessible == {"pinned", "retired"}
+    assert snapshot.revision == 7
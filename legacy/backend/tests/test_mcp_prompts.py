@@ -0,0 +1,216 @@
+"""Tests for native MCP prompts/resources and list_changed notifications."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from mcp import types
+from mcp.shared.exceptions import McpError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.skillcanon_server.mcp import prompts as prompts_module
+from src.skillcanon_server.mcp import tools as tools_module
+from src.skillcanon_server.mcp.server import mcp
+from src.skillcanon_server.models import Prompt, PromptVersion, Team, User
+from src.skillcanon_server.schemas import PromptCreate, PromptVersionCreate
+from src.skillcanon_server.services import apikey_service, prompt_service
+
+
+def _mock_ctx():
+    ctx = MagicMock()
+    ctx.session = MagicMock()
+    return ctx
+
+
+@pytest.fixture
+def patched_sessions(db_session: AsyncSession, monkeypatch):
+    factory = async_sessionmaker(db_session.bind, class_=type(db_session), expire_on_commit=False)
+    monkeypatch.setattr(tools_module, "async_session", factory)
+    monkeypatch.setattr(prompts_module, "async_session", factory)
+
+
+async def _create_prompt(db: AsyncSession, name: str, **version) -> None:
+    await prompt_service.create_prompt(
+        db,
+        PromptCreate(
+            name=name,
+            description=f"{name} description",
+            version=PromptVersionCreate(version="1.0.0", **version),
+        ),
+    )
+
+
+def test_capabilities_advertise_list_changed():
+    capabilities = mcp._mcp_server.create_initialization_options().capabilities
+    assert capabilities.prompts.listChanged is True
+    assert capabilities.resources.listChanged is True
+
+
+@pytest.mark.asyncio
+async def test_protocol_handlers_serve_the_registry(monkeypatch):
+    listing = types.ListPromptsResult(prompts=[])
+    list_prompts = AsyncMock(return_value=listing)
+    monkeypatch.setattr(prompts_module, "list_registry_prompts", list_prompts)
+    handler = mcp._mcp_server.request_handlers[types.ListPromptsRequest]
+
+    request = types.ListPromptsRequest(
+        method="prompts/list", params=types.PaginatedRequestParams(cursor="200")
+    )
+    result = await handler(request)
+
+    assert result.root is listing
+    assert list_prompts.await_args.args[1] == "200"
+    templates = await mcp.list_resource_templates()
+    assert [t.uriTemplate for t in templates] == ["skillcanon://prompts/{name}"]
+
+
+@pytest.mark.asyncio
+async def test_list_prompts_paginates_with_arguments(
+    db_session: AsyncSession, patched_sessions, monkeypatch
+):
+    monkeypatch.setattr(prompts_module, "PAGE_SIZE", 2)
+    for name in ("alpha", "beta", "gamma"):
+        await _create_prompt(db_session, name)
+    ctx = _mock_ctx()
+
+    first = await prompts_module.list_registry_prompts(ctx)
+    assert [p.name for p in first.prompts] == ["alpha", "beta"]
+    assert first.prompts[0].arguments[0].name == "input"
+    assert first.prompts[0].arguments[0].required is True
+
+    second = await prompts_module.list_registry_prompts(ctx, first.nextCursor)
+    assert [p.name for p in second.prompts] == ["gamma"]
+    assert second.nextCursor is None
+
+    with pytest.raises(McpError):
+        await prompts_module.list_registry_prompts(ctx, "not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_list_prompts_never_serves_stale_catalog(db_session: AsyncSession, patched_sessions):
+    await _create_prompt(db_session, "before")
+    ctx = _mock_ctx()
+    assert [p.name for p in (await prompts_module.list_registry_prompts(ctx)).prompts] == [
+        "before"
+    ]
+
+    await _create_prompt(db_session, "after")
+    listing = await prompts_module.list_registry_prompts(ctx)
+    assert [p.name for p in listing.prompts] == ["after", "before"]
+
+
+@pytest.mark.asyncio
+async def test_get_prompt_renders_arguments(db_session: AsyncSession, patched_sessions):
+    await _create_prompt(
+        db_session, "greet", system_template="Be brief.", user_template="Hello {{ input }}"
+    )
+
+    result = await prompts_module.get_registry_prompt(_mock_ctx(), "greet", {"input": "world"})
+    assert result.description == "greet description"
+    assert [m.content.text for m in result.messages] == ["Be brief.", "Hello world"]
+
+    with pytest.raises(McpError):
+        await prompts_module.get_registry_prompt(_mock_ctx(), "missing", {})
+
+
+@pytest.mark.asyncio
+async def test_get_prompt_respects_acl_and_keeps_session_context(
+    db_session: AsyncSession, patched_sessions
+):
+    from src.skillcanon_server.mcp.session import _current_api_key
+    from src.skillcanon_server.mcp.tools import sh_list
+
+    team = Team(name="Prompt Team", slug="prompt-team")
+    db_session.add(team)
+    await db_session.flush()
+    owner = User(team_id=team.id, username="p-owner", email="po@test.local")
+    caller = User(team_id=team.id, username="p-caller", email="pc@test.local")
+    db_session.add_all([owner, caller])
+    await db_session.flush()
+    prompt = Prompt(name="private", user_id=owner.id)
+    db_session.add(prompt)
+    await db_session.flush()
+    db_session.add(PromptVersion(prompt_id=prompt.id, version="1.0.0", user_template="secret"))
+    await db_session.commit()
+    _, raw_key = await apikey_service.create_api_key(db_session, caller.id, "mcp")
+
+    ctx = _mock_ctx()
+    token = _current_api_key.set(raw_key)
+    try:
+        assert (await prompts_module.list_registry_prompts(ctx)).prompts == []
+        with pytest.raises(McpError):
+            await prompts_module.get_registry_prompt(ctx, "private", {})
+        # Native requests have nowhere to show the context block; the first tool call does
+        assert "SESSION CONTEXT" in await sh_list(ctx=ctx)
+    finally:
+        _current_api_key.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_resources_list_and_read(db_session: AsyncSession, patched_sessions):
+    await _create_prompt(db_session, "doc", user_template="Body {{ input }}", tags=["x"])
+    ctx = _mock_ctx()
+
+    listing = await prompts_module.list_registry_resources(ctx)
+    assert [str(r.uri) for r in listing.resources] == ["skillcanon://prompts/doc"]
+
+    contents = await prompts_module.read_registry_resource(ctx, "skillcanon://prompts/doc")
+    document = json.loads(contents[0].content)
+    assert contents[0].mime_type == "application/json"
+    assert document["version"] == "1.0.0"
+    assert document["user_template"] == "Body {{ input }}"
+    assert document["tags"] == ["x"]
+
+    with pytest.raises(McpError):
+        await prompts_module.read_registry_resource(ctx, "skillcanon://prompts/nope")
+
+
+@pytest.mark.asyncio
+async def test_notify_list_changed_drops_dead_sessions(monkeypatch):
+    from src.skillcanon_server.mcp.session import SessionManager
+
+    manager = SessionManager()
+    monkeypatch.setattr(prompts_module, "session_manager", manager)
+    live = MagicMock()
+    live.send_prompt_list_changed = AsyncMock()
+    live.send_resource_list_changed = AsyncMock()
+    closed = MagicMock()
+    closed.send_prompt_list_changed = AsyncMock(side_effect=RuntimeError("closed"))
+    manager.get_or_create(1).attach(live)
+    manager.get_or_create(2).attach(closed)
+    manager.get_or_create(3)  # never attached a transport session
+
+    assert await prompts_module.notify_list_changed() == 1
+    live.send_prompt_list_changed.assert_awaited_once()
+    live.send_resource_list_changed.assert_awaited_once()
+    assert [key for key, _ in manager.items()] == [1]
+
+
+@pytest.mark.asyncio
+async def test_watch_registry_notifies_on_revision_change(patched_sessions, monkeypatch):
+    # Scripted revisions: the in-memory test database shares one connection, so a
+    # watcher polling it concurrently with writes would interleave transactions.
+    revisions = iter([3, 3, 4, 4])
+    polled = asyncio.Event()
+    notified: list[int] = []
+
+    async def _current(db) -> int:
+        revision = next(revisions, None)
+        if revision is None:
+            polled.set()
+            await asyncio.Event().wait()
+        return revision
+
+    async def _notify() -> int:
+        notified.append(1)
+        return 0
+
+    monkeypatch.setattr(prompts_module.registry_service, "current", _current)
+    monkeypatch.setattr(prompts_module, "notify_list_changed", _notify)
+    watcher = asyncio.create_task(prompts_module.watch_registry(0))
+    try:
+        await asyncio.wait_for(polled.wait(), timeout=5)
+        assert notified == [1]
+    finally:
+        watcher.cancel()
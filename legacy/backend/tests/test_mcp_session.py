@@ -13,6 +13,21 @@ class TestSessionState:
         assert state.created_at is not None
 
 
+    def test_acl_cache_hit_and_miss(self):
+        state = SessionState()
+        assert state.cached_access("p", revision=0) is None
+        state.remember_access("p", True, revision=0)
+        state.remember_access("q", False, revision=0)
+        assert state.cached_access("p", revision=0) is True
+        assert state.cached_access("q", revision=0) is False
+
+    def test_acl_cache_invalidated_by_revision(self):
+        state = SessionState()
+        state.remember_access("p", False, revision=0)
+        assert state.cached_access("p", revision=1) is None
+        assert state.acl == {}
+
+
 class TestSessionManager:
     def test_get_or_create_new(self):
         mgr = SessionManager()
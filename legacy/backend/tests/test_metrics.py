@@ -1,5 +1,7 @@
 """Tests for the metrics dashboard endpoint and usage tracking."""
 
+import uuid
+
 import pytest
 
 
@@ -66,3 +68,706 @@ async def test_usage_recorded_on_expand_error(client):
     data = stats.json()
     assert data["total_expands"] == 1
     assert data["error_rate_pct"] == 100.0
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _usage_names(db_session) -> list[str]:
+    from sqlalchemy import select
+
+    from src.skillcanon_server.models import PromptUsage
+
+    rows = await db_session.execute(select(PromptUsage.prompt_name))
+    return sorted(rows.scalars())
+
+
+@pytest.mark.asyncio
+async def test_usage_recorder_buffers_expands_until_flushed(client, db_session, session_factory):
+    from src.skillcanon_server.services.usage_service import usage_recorder
+
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "buffered", "version": {"version": "1.0.0", "user_template": "hi"}},
+    )
+    usage_recorder.start(session_factory, flush_rows=100, flush_ms=60_000)
+    try:
+        for _ in range(3):
+            resp = await client.post("/api/v1/expand/buffered", json={"input": {}})
+            assert resp.status_code == 200
+        assert usage_recorder.written == 0
+    finally:
+        await usage_recorder.stop()
+
+    assert usage_recorder.written == 3
+    data = (await client.get("/api/v1/metrics/dashboard")).json()
+    assert data["total_expands"] == 3
+    assert data["expands_24h"] == 3
+
+
+@pytest.mark.asyncio
+async def test_usage_recorder_flushes_in_batches(db_session, session_factory, monkeypatch):
+    import asyncio
+
+    from src.skillcanon_server.services import usage_service
+
+    batches: list[int] = []
+    flushed = asyncio.Event()
+    real_write_rows = usage_service.write_rows
+
+    async def _tracking_write_rows(db, rows):
+        await real_write_rows(db, rows)
+        batches.append(len(rows))
+        if sum(batches) == 5:
+            flushed.set()
+
+    monkeypatch.setattr(usage_service, "write_rows", _tracking_write_rows)
+    recorder = usage_service.UsageRecorder()
+    recorder.start(session_factory, flush_rows=2, flush_ms=60_000)
+    try:
+        for i in range(5):
+            await recorder.record(f"p{i}", "1.0.0", 200, 1.0)
+        # Full batches are written without waiting for the interval
+        await asyncio.wait_for(flushed.wait(), timeout=5)
+    finally:
+        await recorder.stop()
+    assert batches == [2, 2, 1]
+    assert await _usage_names(db_session) == ["p0", "p1", "p2", "p3", "p4"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "overflow, kept",
+    [("drop_newest", ["a", "b"]), ("drop_oldest", ["c", "d"])],
+)
+async def test_usage_recorder_overflow(db_session, session_factory, overflow, kept):
+    from src.skillcanon_server.services.usage_service import UsageRecorder
+
+    recorder = UsageRecorder()
+    recorder.start(
+        session_factory, buffer_size=2, flush_rows=100, flush_ms=60_000, overflow=overflow
+    )
+    for name in ("a", "b", "c", "d"):
+        await recorder.record(name, "1.0.0", 200, 1.0)
+    await recorder.stop()
+
+    assert recorder.dropped == 2
+    assert await _usage_names(db_session) == kept
+
+
+@pytest.mark.asyncio
+async def test_usage_recorder_block_waits_for_room(db_session, session_factory):
+    import asyncio
+
+    from src.skillcanon_server.services.usage_service import UsageRecorder
+
+    recorder = UsageRecorder()
+    recorder.start(session_factory, buffer_size=1, flush_rows=1, flush_ms=60_000, overflow="block")
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(recorder.record(n, "1.0.0", 200, 1.0) for n in "xyz")), timeout=5
+        )
+    finally:
+        await recorder.stop()
+
+    assert recorder.dropped == 0
+    assert await _usage_names(db_session) == ["x", "y", "z"]
+
+
+@pytest.mark.asyncio
+async def test_usage_recorder_retries_a_failed_batch_row_by_row(
+    db_session, session_factory, monkeypatch
+):
+    from src.skillcanon_server.services import usage_service
+
+    real_write_rows = usage_service.write_rows
+
+    async def _failing_write_rows(db, rows):
+        if any(row["prompt_name"] == "bad" for row in rows):
+            raise RuntimeError("violates foreign key constraint")
+        await real_write_rows(db, rows)
+
+    monkeypatch.setattr(usage_service, "write_rows", _failing_write_rows)
+    recorder = usage_service.UsageRecorder()
+    recorder.start(session_factory, flush_rows=100, flush_ms=60_000)
+    for name in ("a", "bad", "b"):
+        await recorder.record(name, "1.0.0", 200, 1.0)
+    await recorder.stop()
+
+    assert recorder.written == 2
+    assert await _usage_names(db_session) == ["a", "b"]
+
+
+def test_usage_recorder_rejects_unknown_overflow(session_factory):
+    from src.skillcanon_server.services.usage_service import UsageRecorder
+
+    with pytest.raises(ValueError, match="overflow policy"):
+        UsageRecorder().start(session_factory, overflow="explode")
+
+
+@pytest.mark.asyncio
+async def test_usage_rollups_merge_across_writes(db_session):
+    from datetime import datetime, timezone
+
+    from sqlalchemy import select
+
+    from src.skillcanon_server.models import UsageRollupDaily, UsageRollupHourly
+    from src.skillcanon_server.services import usage_service
+
+    def row(minute, status, latency, hour=10):
+        r = usage_service.usage_row("rolled", "1.0.0", status, latency)
+        r["created_at"] = datetime(2026, 10, 19, hour, minute, tzinfo=timezone.utc)
+        return r
+
+    await usage_service.write_rows(db_session, [row(1, 200, 5.0), row(2, 404, 1.0)])
+    await usage_service.write_rows(db_session, [row(3, 200, 20.0), row(4, 200, 5.0, hour=11)])
+
+    hourly = {
+        (r.bucket_start.hour, r.status_class): r
+        for r in (await db_session.execute(select(UsageRollupHourly))).scalars()
+    }
+    assert sorted(hourly) == [(10, "2xx"), (10, "4xx"), (11, "2xx")]
+    ten = hourly[(10, "2xx")]
+    assert (ten.count, ten.latency_sum, ten.latency_min, ten.latency_max) == (2, 25.0, 5.0, 20.0)
+    assert ten.histogram == {
+        str(usage_service.latency_bucket(5.0)): 1,
+        str(usage_service.latency_bucket(20.0)): 1,
+    }
+
+    daily = (
+        await db_session.execute(
+            select(UsageRollupDaily).where(UsageRollupDaily.status_class == "2xx")
+        )
+    ).scalar_one()
+    assert (daily.count, daily.latency_min, daily.latency_max) == (3, 5.0, 20.0)
+    assert sum(daily.histogram.values()) == 3
+
+
+@pytest.mark.asyncio
+async def test_rollup_seed_rows_are_inserted_in_key_order(db_engine, db_session):
+    from sqlalchemy import event
+
+    from src.skillcanon_server.services import usage_service
+
+    seeded: list = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO usage_rollups_hourly"):
+            seeded.append([p for p in parameters if isinstance(p, str) and p.startswith("p-")])
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", capture)
+    rows = [usage_service.usage_row(name, "1", 200, 1.0) for name in ("p-c", "p-a", "p-b")]
+    await usage_service.apply_rollups(db_session, rows)
+    event.remove(db_engine.sync_engine, "before_cursor_execute", capture)
+    assert seeded == [["p-a", "p-b", "p-c"]]
+
+
+@pytest.mark.asyncio
+async def test_dashboard_breaks_latency_down_by_stage(client, db_session):
+    from src.skillcanon_server.services import usage_service
+
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "staged", "version": {"version": "1.0.0", "user_template": "s"}},
+    )
+    for _ in range(2):
+        await client.post("/api/v1/expand/staged", json={"input": {}})
+    # Only the lookup ran before the 404
+    await client.post("/api/v1/expand/missing", json={"input": {}})
+
+    data = (await client.get("/api/v1/metrics/dashboard")).json()
+    assert set(data["stages_ms"]) == {"lookup", "governance", "includes", "compile", "render"}
+    by_name = {p["name"]: p for p in data["top_prompts"]}
+    assert list(by_name["missing"]["stages_ms"]) == ["lookup"]
+
+    row = usage_service.usage_row("merged", "1", 200, 9.0, {"render": 2.0})
+    other = usage_service.usage_row("merged", "1", 200, 9.0, {"render": 4.0, "lookup": 1.0})
+    await usage_service.write_rows(db_session, [row])
+    await usage_service.write_rows(db_session, [other])
+    stats = (await client.get("/api/v1/metrics/prompts/merged")).json()
+    assert stats["stages_ms"] == {"render": 3.0, "lookup": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_usage_rows_reference_version_and_caller(client, db_session, user_client_factory):
+    from sqlalchemy import select
+
+    from src.skillcanon_server.models import Project, PromptUsage, PromptVersion, Team, User
+    from src.skillcanon_server.services import apikey_service
+
+    team = Team(name="Usage", slug="usage")
+    elsewhere = Team(name="Elsewhere", slug="elsewhere")
+    db_session.add_all([team, elsewhere])
+    await db_session.flush()
+    caller = User(team_id=team.id, username="caller")
+    other = User(team_id=team.id, username="other")
+    outsider = User(team_id=elsewhere.id, username="outsider")
+    project = Project(team_id=team.id, name="Usage", slug="usage")
+    db_session.add_all([caller, other, outsider, project])
+    await db_session.commit()
+    key, raw_key = await apikey_service.create_api_key(db_session, caller.id, "usage")
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "attributed", "version": {"version": "1.0.0", "user_template": "a"}},
+    )
+    version_id = (await db_session.execute(select(PromptVersion.id))).scalar_one()
+
+    auth = {"Authorization": f"Bearer {raw_key}"}
+    body = {"input": {}, "project_id": str(project.id)}
+    assert (await client.post("/api/v1/expand/attributed", json=body, headers=auth)).is_success
+    resp = await client.post("/api/v1/expand/attributed/versions/9.9.9", json={}, headers=auth)
+    assert resp.status_code == 404
+    assert (await client.post("/api/v1/expand/attributed", json={})).is_success
+
+    rows = (await db_session.execute(select(PromptUsage).order_by(PromptUsage.id))).scalars()
+    assert [
+        (r.id, r.prompt_version_id, r.user_id, r.project_id, r.api_key_id, r.status_code)
+        for r in rows
+    ] == [
+        (1, version_id, caller.id, project.id, key.id, 200),
+        (2, None, caller.id, None, key.id, 404),
+        (3, version_id, None, None, None, 200),
+    ]
+
+    by_user = (await client.get(f"/api/v1/metrics/users/{caller.id}")).json()
+    assert (by_user["user_id"], by_user["count"], by_user["error_rate_pct"]) == (
+        str(caller.id), 2, 50.0
+    )
+    assert sorted((p["version"] or "", p["count"]) for p in by_user["prompts"]) == [
+        ("", 1),
+        ("1.0.0", 1),
+    ]
+    by_project = (await client.get(f"/api/v1/metrics/projects/{project.id}")).json()
+    assert by_project["count"] == 1
+    by_key = (await client.get(f"/api/v1/metrics/api-keys/{key.id}?hours=1")).json()
+    assert (by_key["count"], by_key["window_hours"]) == (2, 1)
+
+    # Callers only see their own usage
+    other_client = await user_client_factory(other)
+    assert (await other_client.get(f"/api/v1/metrics/users/{caller.id}")).status_code == 403
+    assert (await other_client.get(f"/api/v1/metrics/api-keys/{key.id}")).status_code == 403
+    assert (await other_client.get(f"/api/v1/metrics/users/{other.id}")).json()["count"] == 0
+    # Project usage is open to whoever can access the project, teammates included
+    assert (await other_client.get(f"/api/v1/metrics/projects/{project.id}")).status_code == 200
+    outsider_client = await user_client_factory(outsider)
+    resp = await outsider_client.get(f"/api/v1/metrics/projects/{project.id}")
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_usage_rows_only_reference_accessible_projects(client, db_session):
+    import uuid
+
+    from sqlalchemy import select
+
+    from src.skillcanon_server.models import Project, ProjectMember, PromptUsage, Team, User
+    from src.skillcanon_server.services import apikey_service
+
+    mine, theirs = Team(name="Mine", slug="mine"), Team(name="Theirs", slug="theirs")
+    db_session.add_all([mine, theirs])
+    await db_session.flush()
+    caller = User(team_id=mine.id, username="caller")
+    foreign = Project(team_id=theirs.id, name="Foreign", slug="foreign")
+    joined = Project(team_id=theirs.id, name="Joined", slug="joined")
+    db_session.add_all([caller, foreign, joined])
+    await db_session.flush()
+    db_session.add(ProjectMember(project_id=joined.id, user_id=caller.id))
+    await db_session.commit()
+    _, raw_key = await apikey_service.create_api_key(db_session, caller.id, "usage")
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "scoped", "version": {"version": "1.0.0", "user_template": "a"}},
+    )
+
+    auth = {"Authorization": f"Bearer {raw_key}"}
+    for project_id in (foreign.id, uuid.uuid4(), joined.id):
+        body = {"input": {}, "project_id": str(project_id)}
+        assert (await client.post("/api/v1/expand/scoped", json=body, headers=auth)).is_success
+    body = {"input": {}, "project_id": str(joined.id)}
+    assert (await client.post("/api/v1/expand/scoped", json=body)).is_success
+
+    rows = await db_session.execute(select(PromptUsage.project_id).order_by(PromptUsage.id))
+    assert rows.scalars().all() == [None, None, joined.id, None]
+
+
+def test_latency_bucket_bounds():
+    from src.skillcanon_server.services import usage_service
+
+    assert usage_service.latency_bucket(0) == 0
+    assert usage_service.latency_bucket(1e12) == usage_service.HISTOGRAM_MAX_BUCKET
+    for latency in (0.5, 3.0, 42.0, 1234.5):
+        upper = usage_service.HISTOGRAM_MIN_MS * (
+            usage_service.HISTOGRAM_GAMMA ** usage_service.latency_bucket(latency)
+        )
+        assert upper / usage_service.HISTOGRAM_GAMMA < latency <= upper * 1.000001
+
+
+@pytest.mark.asyncio
+async def test_dashboard_reads_rollups_not_raw_usage(client, db_session):
+    from sqlalchemy import delete
+
+    from src.skillcanon_server.models import PromptUsage
+
+    await client.post("/api/v1/expand/nonexistent", json={"input": {}})
+    await client.post("/api/v1/expand/nonexistent", json={"input": {}})
+    # Raw rows can be pruned without changing the dashboard
+    await db_session.execute(delete(PromptUsage))
+    await db_session.commit()
+
+    data = (await client.get("/api/v1/metrics/dashboard")).json()
+    assert data["total_expands"] == 2
+    assert data["expands_24h"] == 2
+    assert data["error_rate_pct"] == 100.0
+    top = data["top_prompts"][0]
+    assert (top["name"], top["count"]) == ("nonexistent", 2)
+    assert top["avg_latency_ms"] == data["avg_latency_ms"]
+    assert top["latency_ms"] == data["latency_ms"]
+    assert sum(day["count"] for day in data["daily_usage"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_dashboard_is_four_statements(db_engine, db_session):
+    from sqlalchemy import event
+
+    from src.skillcanon_server.services import metrics_service
+
+    statements = []
+
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        await metrics_service.get_dashboard_stats(db_session)
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", _count)
+    assert len(statements) == 4
+
+
+@pytest.mark.asyncio
+async def test_dashboard_cache_is_single_flight(client, db_session, monkeypatch):
+    import asyncio
+
+    from src.skillcanon_server.config import settings
+    from src.skillcanon_server.services import metrics_service
+
+    calls = 0
+    real_stats = metrics_service.get_dashboard_stats
+
+    async def _counting_stats(db):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return await real_stats(db)
+
+    monkeypatch.setattr(metrics_service, "get_dashboard_stats", _counting_stats)
+    monkeypatch.setattr(settings, "metrics_dashboard_cache_seconds", 60.0)
+
+    results = await asyncio.gather(
+        *(metrics_service.get_cached_dashboard_stats(db_session) for _ in range(5))
+    )
+    assert calls == 1
+    assert all(r == results[0] for r in results)
+
+    # Within the TTL new usage isn't visible yet; it is once the entry expires
+    await client.post("/api/v1/expand/nonexistent", json={"input": {}})
+    assert (await client.get("/api/v1/metrics/dashboard")).json()["total_expands"] == 0
+    assert calls == 1
+    monkeypatch.setattr(metrics_service, "_dashboard", None)
+    assert (await client.get("/api/v1/metrics/dashboard")).json()["total_expands"] == 1
+    assert calls == 2
+
+
+def test_latency_percentiles_from_merged_histograms():
+    import math
+    import random
+
+    from src.skillcanon_server.services import usage_service
+
+    rng = random.Random(3)
+    samples = [rng.lognormvariate(3, 1) for _ in range(20_000)]
+    # Histograms built separately (say, on two workers) merge into the same result
+    halves = [{}, {}]
+    for i, latency in enumerate(samples):
+        bucket = str(usage_service.latency_bucket(latency))
+        halves[i % 2][bucket] = halves[i % 2].get(bucket, 0) + 1
+    merged = usage_service.merge_histograms(dict(halves[0]), halves[1])
+    assert sum(merged.values()) == len(samples)
+
+    estimates = usage_service.latency_percentiles(merged, min(samples), max(samples))
+    ordered = sorted(samples)
+    for name, q in usage_service.QUANTILES.items():
+        exact = ordered[math.ceil(q * len(samples)) - 1]
+        assert abs(estimates[name] - exact) / exact < 0.06, name
+    assert usage_service.latency_percentiles({}) == {name: None for name in usage_service.QUANTILES}
+
+
+@pytest.mark.asyncio
+async def test_prompt_stats_endpoint(client, db_session):
+    from datetime import datetime, timedelta, timezone
+
+    from src.skillcanon_server.services import usage_service
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for version, status, latency, age in (
+        ("1.0.0", 200, 10.0, 0),
+        ("1.0.0", 200, 30.0, 0),
+        ("2.0.0", 422, 50.0, 0),
+        ("2.0.0", 200, 90.0, 2),
+        ("2.0.0", 200, 70.0, 30),
+    ):
+        row = usage_service.usage_row("tracked", version, status, latency)
+        row["created_at"] = now - timedelta(hours=age)
+        rows.append(row)
+    await usage_service.write_rows(db_session, rows)
+
+    resp = await client.get("/api/v1/metrics/prompts/tracked")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["granularity"] == "hour"
+    assert data["count"] == 4
+    assert data["error_rate_pct"] == 25.0
+    assert data["avg_latency_ms"] == 45.0
+    assert set(data["latency_ms"]) == {"p50", "p90", "p99", "p99.9"}
+    assert data["latency_ms"]["p50"] == pytest.approx(30.0, rel=0.05)
+    assert data["latency_ms"]["p99.9"] == pytest.approx(90.0, rel=0.05)
+    assert [(v["version"], v["count"]) for v in data["versions"]] == [("1.0.0", 2), ("2.0.0", 2)]
+    assert sum(b["count"] for b in data["series"]) == 4
+
+    data = (await client.get("/api/v1/metrics/prompts/tracked?hours=720")).json()
+    assert data["granularity"] == "day"
+    assert data["count"] == 5
+
+    resp = await client.get("/api/v1/metrics/prompts/never-seen")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_usage_retention_deletes_expired_rows(db_session):
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import func, select
+
+    from src.skillcanon_server.models import PromptUsage, UsageRollupDaily
+    from src.skillcanon_server.services import usage_service
+
+    now = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    rows = []
+    for age in (1, 10, 45):
+        row = usage_service.usage_row("aging", "1.0.0", 200, 1.0)
+        row["created_at"] = now - timedelta(days=age)
+        rows.append(row)
+    await usage_service.write_rows(db_session, rows)
+
+    # Retention is opt-in: the default keeps everything
+    report = await usage_service.maintain_partitions(db_session, now=now + timedelta(days=999))
+    assert report["deleted"] == 0
+
+    report = await usage_service.maintain_partitions(db_session, now=now, retention_days=30)
+    assert report == {"created": [], "dropped": [], "deleted": 1}
+    assert (await db_session.execute(select(func.count()).select_from(PromptUsage))).scalar() == 2
+    # Rollups outlive raw rows
+    total = await db_session.execute(select(func.sum(UsageRollupDaily.count)))
+    assert total.scalar() == 3
+
+    report = await usage_service.maintain_partitions(db_session, now=now, retention_days=0)
+    assert report["deleted"] == 0
+
+
+class _PostgresSession:
+    """Just enough of an AsyncSession on Postgres to drive maintain_partitions."""
+
+    def __init__(self, locked: bool):
+        from types import SimpleNamespace
+
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+        self.locked = locked
+        self.statements: list[str] = []
+
+    async def execute(self, statement, params=None):
+        from types import SimpleNamespace
+
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_try_advisory_xact_lock" in sql:
+            return SimpleNamespace(scalar=lambda: self.locked)
+        return SimpleNamespace(scalars=lambda: [], first=lambda: None)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_partition_maintenance_is_serialized_across_workers():
+    from datetime import datetime, timezone
+
+    from src.skillcanon_server.services import usage_service
+
+    now = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    # Another worker holds the lock: nothing is created
+    busy = _PostgresSession(locked=False)
+    report = await usage_service.maintain_partitions(busy, now=now, months_ahead=1)
+    assert report == {"created": [], "dropped": [], "deleted": 0}
+    assert len(busy.statements) == 1
+
+    free = _PostgresSession(locked=True)
+    report = await usage_service.maintain_partitions(free, now=now, months_ahead=1)
+    assert report["created"] == ["prompt_usage_p202610", "prompt_usage_p202611"]
+    creates = [sql for sql in free.statements if sql.startswith("CREATE TABLE")]
+    assert len(creates) == 2
+    assert all(sql.startswith("CREATE TABLE IF NOT EXISTS") for sql in creates)
+
+
+def test_prompt_usage_indexes_match_the_migrations():
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex
+
+    from src.skillcanon_server.models import PromptUsage
+
+    indexes = {index.name: index for index in PromptUsage.__table__.indexes}
+    assert "idx_prompt_usage_prompt_name" in indexes
+    created_at = CreateIndex(indexes["idx_prompt_usage_created_at"])
+    assert "USING brin" in str(created_at.compile(dialect=postgresql.dialect()))
+
+
+def test_month_start():
+    from datetime import datetime, timezone
+
+    from src.skillcanon_server.services.usage_service import month_start
+
+    ts = datetime(2026, 11, 19, 13, 5, tzinfo=timezone.utc)
+    assert month_start(ts) == datetime(2026, 11, 1, tzinfo=timezone.utc)
+    assert month_start(ts, 2) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert month_start(ts, -11) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+
+async def _export_fixture(db_session) -> list[dict]:
+    from datetime import datetime, timezone
+
+    from src.skillcanon_server.services import usage_service
+
+    caller = uuid.uuid4()
+    rows = []
+    for i, (name, status, user_id) in enumerate(
+        [("a", 200, caller), ("b", 404, None), ("a", 500, caller), ("a", 200, None)]
+    ):
+        row = usage_service.usage_row(name, "1.0.0", status, float(i), user_id=user_id)
+        row["created_at"] = datetime(2025, 10, 19, 10, i, tzinfo=timezone.utc)
+        rows.append(row)
+    # Outside the exported range
+    late = usage_service.usage_row("a", "1.0.0", 200, 9.0)
+    late["created_at"] = datetime(2025, 10, 20, tzinfo=timezone.utc)
+    await usage_service.write_rows(db_session, rows + [late])
+    return rows
+
+
+_RANGE = "since=2025-10-19T00:00:00Z&until=2025-10-20T00:00:00Z"
+
+
+@pytest.mark.asyncio
+async def test_usage_export_streams_ndjson_with_filters_and_resume(client, db_session):
+    import json
+
+    rows = await _export_fixture(db_session)
+    plain = {"Accept-Encoding": "identity"}
+
+    resp = await client.get(f"/api/v1/metrics/usage/export?{_RANGE}", headers=plain)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert "content-encoding" not in resp.headers
+    exported = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in exported] == [1, 2, 3, 4]
+    assert exported[0]["created_at"] == rows[0]["created_at"].isoformat()
+    assert (exported[1]["prompt_name"], exported[1]["status_code"]) == ("b", 404)
+
+    async def ids(query: str) -> list[int]:
+        resp = await client.get(f"/api/v1/metrics/usage/export?{_RANGE}&{query}", headers=plain)
+        assert resp.status_code == 200, resp.text
+        return [json.loads(line)["id"] for line in resp.text.splitlines()]
+
+    assert await ids("prompt=a") == [1, 3, 4]
+    assert await ids(f"user_id={rows[0]['user_id']}") == [1, 3]
+    assert await ids("status=2xx") == [1, 4]
+    assert await ids("status=500") == [3]
+    # Resuming after the last row received picks up where the export stopped
+    assert await ids("after=2") == [3, 4]
+
+    resp = await client.get(f"/api/v1/metrics/usage/export?{_RANGE}&status=teapot")
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_usage_export_resumes_in_record_order(client, db_session):
+    import json
+    from datetime import datetime, timedelta, timezone
+
+    from src.skillcanon_server.services import usage_service
+
+    def row(name: str, created_at: datetime) -> dict:
+        r = usage_service.usage_row(name, "1.0.0", 200, 1.0)
+        r["created_at"] = created_at
+        return r
+
+    # A worker flushing later commits higher ids for rows recorded earlier
+    base = datetime(2025, 10, 19, 10, tzinfo=timezone.utc)
+    await usage_service.write_rows(db_session, [row("b", base + timedelta(minutes=2))])
+    await usage_service.write_rows(db_session, [row("a", base + timedelta(minutes=1))])
+    # Recorded moments ago: may still be in another worker's buffer
+    await usage_service.write_rows(db_session, [row("fresh", datetime.now(timezone.utc))])
+
+    async def names(query: str = "") -> list[str]:
+        resp = await client.get(
+            f"/api/v1/metrics/usage/export?since=2025-10-19T00:00:00Z{query}",
+            headers={"Accept-Encoding": "identity"},
+        )
+        assert resp.status_code == 200, resp.text
+        return [json.loads(line)["prompt_name"] for line in resp.text.splitlines()]
+
+    assert await names() == ["a", "b"]
+    assert await names("&after=2") == ["b"]
+    assert await names("&until=2099-01-01T00:00:00Z") == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_usage_export_csv_gzip(client, db_session):
+    import csv
+    import io
+
+    await _export_fixture(db_session)
+    resp = await client.get(
+        f"/api/v1/metrics/usage/export?{_RANGE}&format=csv",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["content-disposition"].endswith('.csv"')
+    table = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["id"] for r in table] == ["1", "2", "3", "4"]
+    assert table[1]["user_id"] == ""
+
+
+@pytest.mark.asyncio
+async def test_stream_usage_fetches_in_batches(db_session):
+    from datetime import datetime, timezone
+
+    from src.skillcanon_server.services import usage_service
+
+    await _export_fixture(db_session)
+    batches = [
+        [row["id"] for row in batch]
+        async for batch in usage_service.stream_usage(
+            db_session,
+            datetime(2025, 10, 19, tzinfo=timezone.utc),
+            datetime(2025, 10, 20, tzinfo=timezone.utc),
+            batch_rows=3,
+        )
+    ]
+    assert batches == [[1, 2, 3], [4]]
@@ -282,6 +282,32 @@ async def test_expand_no_system_template(client):
     assert data["user_message"] == "Just: hi"
 
 
+@pytest.mark.asyncio
+async def test_expand_reports_stage_timings(client):
+    """Expands return Server-Timing per stage, and a timings object on ?debug=timing."""
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "timed", "version": {"version": "1.0.0", "user_template": "t"}},
+    )
+    stages = ["lookup", "governance", "includes", "compile", "render"]
+
+    resp = await client.post("/api/v1/expand/timed", json={"input": {}})
+    assert resp.status_code == 200
+    assert "timings" not in resp.json()
+    entries = [entry.split(";dur=") for entry in resp.headers["server-timing"].split(", ")]
+    assert [name for name, _ in entries] == stages + ["total"]
+    assert all(float(ms) >= 0 for _, ms in entries)
+
+    resp = await client.post(
+        "/api/v1/expand/timed/versions/1.0.0?debug=timing", json={"input": {}}
+    )
+    assert resp.status_code == 200
+    assert list(resp.json()["timings"]) == stages
+
+    resp = await client.post("/api/v1/expand/timed?debug=nope", json={"input": {}})
+    assert resp.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_list_prompts_with_tag_filter(client):
     """Listing prompts with ?tag= filters correctly."""
@@ -544,6 +570,35 @@ async def test_include_prompt_in_system_template(client):
     assert data["user_message"] == "Do: work"
 
 
+@pytest.mark.asyncio
+async def test_prefetch_versions_follows_includes(db_session: AsyncSession):
+    """prefetch_versions resolves prompts and their includes level by level in bulk."""
+    from src.skillcanon_server.schemas import ExpandRequest, PromptCreate, PromptVersionCreate
+    from src.skillcanon_server.services import prompt_service
+
+    for name, template in (
+        ("outer", "OUTER[{{ include_prompt('middle') }}]"),
+        ("middle", "MIDDLE[{{ include_prompt('leaf') }}]"),
+        ("leaf", "LEAF"),
+        ("old", "OLD"),
+    ):
+        await prompt_service.create_prompt(
+            db_session,
+            PromptCreate(
+                name=name, version=PromptVersionCreate(version="1.0.0", user_template=template)
+            ),
+        )
+    await prompt_service.deprecate_prompt(db_session, "old")
+
+    cache = await prompt_service.prefetch_versions(db_session, {"outer", "old", "missing"})
+    assert set(cache) == {"outer", "middle", "leaf"}
+
+    result = await prompt_service.expand_prompt(
+        db_session, "outer", ExpandRequest(), policies=[], prompt_cache=cache
+    )
+    assert result.user_message == "OUTER[MIDDLE[LEAF]]"
+
+
 @pytest.mark.asyncio
 async def test_pin_version(client):
     await client.post(
@@ -0,0 +1,74 @@
+"""Per-endpoint SQL statement budgets.
+
+Each endpoint runs against a registry with several prompts, versions, shares
+and policies, so a query per row (N+1) shows up as a blown budget.
+"""
+
+import pytest
+
+from src.skillcanon_server import telemetry
+
+ROWS = 12
+
+
+@pytest.fixture
+async def seeded(client, db_session):
+    from src.skillcanon_server.models import Team, User
+
+    team = Team(name="Budget", slug="budget")
+    db_session.add(team)
+    await db_session.flush()
+    users = [User(team_id=team.id, username=f"budget{i}") for i in range(ROWS)]
+    db_session.add_all(users)
+    await db_session.commit()
+
+    for i in range(ROWS):
+        await client.post(
+            "/api/v1/prompts",
+            json={
+                "name": f"budget-{i}",
+                "tags": ["budget"],
+                "version": {"version": "1.0.0", "user_template": "{{ input }} " + str(i)},
+            },
+        )
+        await client.post(
+            f"/api/v1/prompts/budget-{i}/versions",
+            json={"version": "1.1.0", "user_template": "v2 {{ input }}"},
+        )
+    for user in users:
+        await client.post("/api/v1/prompts/budget-0/shares", json={"user_id": str(user.id)})
+    return users
+
+
+def test_statement_shapes_ignore_parameters():
+    one = telemetry.statement_shape("SELECT a FROM t WHERE id IN (?)")
+    many = telemetry.statement_shape("SELECT a\n  FROM t WHERE id IN (?, ?, ?)")
+    assert one == many == "SELECT a FROM t WHERE id IN (...)"
+    assert telemetry.statement_shape(
+        "INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)"
+    ) == "INSERT INTO t (a, b) VALUES (...)"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method, path, body, budget",
+    [
+        ("GET", "/api/v1/prompts", None, 3),
+        ("GET", "/api/v1/prompts?tag=budget", None, 2),
+        ("GET", "/api/v1/prompts/search?q=budget", None, 3),
+        ("GET", "/api/v1/prompts/budget-3", None, 2),
+        ("GET", "/api/v1/prompts/budget-3/versions", None, 2),
+        ("GET", "/api/v1/prompts/budget-0/shares", None, 2),
+        # Five to render, four to record usage and roll it up
+        ("POST", "/api/v1/expand/budget-3", {"input": {"input": "x"}}, 9),
+        ("GET", "/api/v1/metrics/dashboard", None, 4),
+        ("GET", "/api/v1/workflows", None, 1),
+        ("GET", "/api/v1/teams", None, 2),
+        ("GET", "/api/v1/users", None, 2),
+        ("GET", "/api/v1/projects", None, 2),
+    ],
+)
+async def test_endpoint_query_budget(client, seeded, query_budget, method, path, body, budget):
+    with query_budget(budget, max_repeats=1):
+        resp = await client.request(method, path, json=body)
+    assert resp.status_code == 200
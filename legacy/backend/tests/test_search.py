@@ -0,0 +1,179 @@
+"""Tests for prompt search (service fallback index and REST route)."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.skillcanon_server.models import Prompt, PromptShare, PromptVersion, Team, User
+from src.skillcanon_server.services import registry_service, search_service
+
+
+async def _add_prompt(
+    db: AsyncSession,
+    name: str,
+    description: str | None = None,
+    tags: list[str] | None = None,
+    user_id: uuid.UUID | None = None,
+) -> Prompt:
+    prompt = Prompt(name=name, description=description, user_id=user_id)
+    db.add(prompt)
+    await db.flush()
+    db.add(
+        PromptVersion(
+            prompt_id=prompt.id, version="1.0.0", user_template="{{ input }}", tags=tags or []
+        )
+    )
+    await registry_service.bump(db)
+    await db.commit()
+    return prompt
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    # The fallback index is process-wide and keyed by registry revision only;
+    # every test starts a new database at revision 0.
+    monkeypatch.setattr(search_service, "_index", None)
+
+
+@pytest_asyncio.fixture
+async def users(db_session: AsyncSession) -> tuple[User, User]:
+    team = Team(name="Search Team", slug="search-team")
+    db_session.add(team)
+    await db_session.flush()
+    owner = User(team_id=team.id, username="search-owner", email="so@test.local")
+    other = User(team_id=team.id, username="search-other", email="sx@test.local")
+    db_session.add_all([owner, other])
+    await db_session.commit()
+    return owner, other
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_name_above_description(db_session: AsyncSession):
+    await _add_prompt(db_session, "misc", description="Helps write a review")
+    await _add_prompt(db_session, "code-review", description="Reviews code")
+    await _add_prompt(db_session, "review-tagged", tags=["review"])
+
+    result = await search_service.search_prompts(db_session, "review")
+    names = [item.name for item in result.items]
+    assert names[0] == "code-review" or names[0] == "review-tagged"
+    assert names[-1] == "misc"
+    assert result.total == 3
+
+
+@pytest.mark.asyncio
+async def test_search_exact_name_wins(db_session: AsyncSession):
+    await _add_prompt(db_session, "plan-review", tags=["plan"])
+    await _add_prompt(db_session, "plan")
+
+    result = await search_service.search_prompts(db_session, "plan")
+    assert result.items[0].name == "plan"
+
+
+@pytest.mark.asyncio
+async def test_search_prefix_and_multi_term(db_session: AsyncSession):
+    await _add_prompt(db_session, "commit-message", description="Write a git commit")
+    await _add_prompt(db_session, "commit-lint")
+
+    assert (await search_service.search_prompts(db_session, "comm")).total == 2
+    result = await search_service.search_prompts(db_session, "commit git")
+    assert [item.name for item in result.items] == ["commit-message"]
+
+
+@pytest.mark.asyncio
+async def test_search_pagination(db_session: AsyncSession):
+    for i in range(7):
+        await _add_prompt(db_session, f"bulk-{i}", tags=["bulk"])
+
+    first = await search_service.search_prompts(db_session, "bulk", page=1, page_size=5)
+    second = await search_service.search_prompts(db_session, "bulk", page=2, page_size=5)
+    assert first.total == second.total == 7
+    assert len(first.items) == 5
+    assert len(second.items) == 2
+    assert not {i.name for i in first.items} & {i.name for i in second.items}
+
+
+@pytest.mark.asyncio
+async def test_search_beyond_first_hundred(db_session: AsyncSession):
+    for i in range(120):
+        await _add_prompt(db_session, f"filler-{i:03d}")
+    await _add_prompt(db_session, "zz-needle", description="haystack")
+
+    result = await search_service.search_prompts(db_session, "haystack")
+    assert [item.name for item in result.items] == ["zz-needle"]
+
+
+@pytest.mark.asyncio
+async def test_search_acl_filter(db_session: AsyncSession, users):
+    owner, other = users
+    mine = await _add_prompt(db_session, "acl-mine", user_id=owner.id)
+    await _add_prompt(db_session, "acl-theirs", user_id=other.id)
+
+    result = await search_service.search_prompts(db_session, "acl", user_id=owner.id)
+    assert [item.name for item in result.items] == ["acl-mine"]
+
+    db_session.add(PromptShare(prompt_id=mine.id, user_id=other.id))
+    await db_session.commit()
+    result = await search_service.search_prompts(db_session, "acl", user_id=other.id)
+    assert {item.name for item in result.items} == {"acl-mine", "acl-theirs"}
+
+
+@pytest.mark.asyncio
+async def test_search_excludes_deprecated(db_session: AsyncSession):
+    prompt = await _add_prompt(db_session, "old-thing")
+    assert (await search_service.search_prompts(db_session, "old")).total == 1
+
+    prompt.is_deprecated = True
+    await registry_service.bump(db_session)
+    await db_session.commit()
+    assert (await search_service.search_prompts(db_session, "old")).total == 0
+
+
+@pytest.mark.asyncio
+async def test_search_uses_latest_version_tags(db_session: AsyncSession):
+    prompt = await _add_prompt(db_session, "retagged", tags=["alpha"])
+    assert (await search_service.search_prompts(db_session, "alpha")).total == 1
+
+    db_session.add(
+        PromptVersion(
+            prompt_id=prompt.id,
+            version="2.0.0",
+            user_template="{{ input }}",
+            tags=["beta"],
+            created_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+    )
+    await registry_service.bump(db_session)
+    await db_session.commit()
+
+    assert (await search_service.search_prompts(db_session, "alpha")).total == 0
+    result = await search_service.search_prompts(db_session, "beta")
+    assert result.total == 1
+    assert result.items[0].tags == ["beta"]
+
+
+@pytest.mark.asyncio
+async def test_search_route(client):
+    await client.post(
+        "/api/v1/prompts",
+        json={
+            "name": "route-target",
+            "description": "Searchable via REST",
+            "version": {"version": "1.0.0", "tags": ["rest"]},
+        },
+    )
+    resp = await client.get("/api/v1/prompts/search", params={"q": "rest", "page_size": 10})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["query"] == "rest"
+    assert data["page_size"] == 10
+    assert data["items"][0]["name"] == "route-target"
+    assert data["items"][0]["score"] > 0
+
+
+@pytest.mark.asyncio
+async def test_search_route_requires_query(client):
+    resp = await client.get("/api/v1/prompts/search")
+    assert resp.status_code == 422
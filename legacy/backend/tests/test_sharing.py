@@ -199,6 +199,103 @@ async def test_list_prompts_user_scoped(
     assert result.total == 1
 
 
+@pytest.mark.asyncio
+async def test_can_access_prompt(
+    db_session: AsyncSession, owned_prompt: Prompt, owner: User, other_user: User
+):
+    from src.skillcanon_server.services import prompt_service
+
+    assert await prompt_service.can_access_prompt(db_session, owner.id, owned_prompt.name)
+    assert not await prompt_service.can_access_prompt(
+        db_session, other_user.id, owned_prompt.name
+    )
+    assert not await prompt_service.can_access_prompt(db_session, owner.id, "nonexistent")
+
+    await prompt_service.share_prompt(db_session, owned_prompt.name, other_user.id)
+    assert await prompt_service.can_access_prompt(db_session, other_user.id, owned_prompt.name)
+
+    await prompt_service.unshare_prompt(db_session, owned_prompt.name, other_user.id)
+    assert not await prompt_service.can_access_prompt(
+        db_session, other_user.id, owned_prompt.name
+    )
+
+
+@pytest.mark.asyncio
+async def test_share_changes_bump_registry_revision(
+    db_session: AsyncSession, owned_prompt: Prompt, other_user: User
+):
+    from src.skillcanon_server.services import prompt_service, registry_service
+
+    before = await registry_service.current(db_session)
+    await prompt_service.share_prompt(db_session, owned_prompt.name, other_user.id)
+    after_share = await registry_service.current(db_session)
+    assert after_share > before
+
+    # Re-sharing is a no-op and leaves the revision alone
+    await prompt_service.share_prompt(db_session, owned_prompt.name, other_user.id)
+    assert await registry_service.current(db_session) == after_share
+
+    await prompt_service.unshare_prompt(db_session, owned_prompt.name, other_user.id)
+    assert await registry_service.current(db_session) > after_share
+
+
+@pytest.mark.asyncio
+async def test_registry_bump_creates_then_increments_row(db_session: AsyncSession):
+    from src.skillcanon_server.services import registry_service
+
+    assert await registry_service.current(db_session) == 0
+    await registry_service.bump(db_session)
+    await registry_service.bump(db_session)
+    await db_session.commit()
+    assert await registry_service.current(db_session) == 2
+
+
+@pytest.mark.asyncio
+async def test_registry_bump_is_the_last_statement_before_commit(
+    db_engine, db_session: AsyncSession, owner: User
+):
+    from sqlalchemy import event
+
+    from src.skillcanon_server.schemas import (
+        PromptCreate,
+        PromptVersionCreate,
+        WorkflowCreate,
+        WorkflowStep,
+    )
+    from src.skillcanon_server.services import prompt_service, workflow_service
+
+    await prompt_service.create_prompt(
+        db_session,
+        PromptCreate(name="step", version=PromptVersionCreate(version="1.0.0", user_template="s")),
+    )
+    log: list[str] = []
+
+    def _statement(conn, cursor, statement, *args):
+        log.append(statement)
+
+    def _commit(conn):
+        log.append("COMMIT")
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", _statement)
+    event.listen(db_engine.sync_engine, "commit", _commit)
+    try:
+        await workflow_service.create_workflow(
+            db_session,
+            WorkflowCreate(
+                name="Locked late",
+                user_id=owner.id,
+                steps=[WorkflowStep(id="a", prompt_name="step")],
+            ),
+        )
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", _statement)
+        event.remove(db_engine.sync_engine, "commit", _commit)
+
+    before_commit = log[: log.index("COMMIT")]
+    assert "registry_state" in before_commit[-1]
+    assert sum("registry_state" in statement for statement in before_commit) == 1
+
+
 # ---------------------------------------------------------------------------
 # Workflow sharing tests
 # ---------------------------------------------------------------------------
@@ -280,6 +377,30 @@ async def test_unshare_workflow_not_found(db_session: AsyncSession, owned_workfl
     assert success is False
 
 
+@pytest.mark.asyncio
+async def test_get_workflow_by_name_respects_shares_and_prefers_owned(
+    db_session: AsyncSession, owned_workflow: Workflow, owner: User, other_user: User
+):
+    from src.skillcanon_server.services import workflow_service
+
+    lookup = workflow_service.get_workflow_by_name
+    assert await lookup(db_session, "SHARE-TEST-WORKFLOW", user_id=owner.id) is not None
+    assert await lookup(db_session, "share-test-workflow", user_id=other_user.id) is None
+
+    await workflow_service.share_workflow(db_session, owned_workflow.id, other_user.id)
+    shared = await lookup(db_session, "Share-Test-Workflow", user_id=other_user.id)
+    assert shared.id == owned_workflow.id
+
+    # A same-named workflow of their own wins over the shared one
+    mine = Workflow(user_id=other_user.id, name="Share-Test-Workflow", steps=[])
+    db_session.add(mine)
+    await db_session.commit()
+    assert (await lookup(db_session, "share-test-workflow", user_id=other_user.id)).id == mine.id
+    # Without a user, an exact-case match wins
+    assert (await lookup(db_session, "share-test-workflow")).id == owned_workflow.id
+    assert (await lookup(db_session, "Share-Test-Workflow")).id == mine.id
+
+
 @pytest.mark.asyncio
 async def test_list_workflows_user_scoped(
     db_session: AsyncSession, owned_workflow: Workflow, owner: User, other_user: User
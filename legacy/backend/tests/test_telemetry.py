@@ -0,0 +1,192 @@
+"""Tests for in-process metrics and the /metrics OpenMetrics endpoint."""
+
+import json
+import logging
+import os
+import time
+
+import pytest
+
+from src.skillcanon_server import telemetry
+from src.skillcanon_server.config import settings
+
+
+def _sample(text: str, line_prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not in metrics output")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_requests_and_renders(client, db_engine):
+    telemetry.instrument_engine(db_engine)
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "scraped", "version": {"version": "1.0.0", "user_template": "hi"}},
+    )
+    before = sum(telemetry.expand_render_duration.samples().get((), [0])[:-1])
+    for _ in range(2):
+        resp = await client.post("/api/v1/expand/scraped", json={"input": {}})
+        assert resp.status_code == 200
+
+    resp = await client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/openmetrics-text")
+    text = resp.text
+    assert text.endswith("# EOF\n")
+    assert "# TYPE skillcanon_http_request_duration_seconds histogram" in text
+
+    route = 'method="POST",route="/api/v1/expand/{name}",status="200"'
+    assert _sample(text, f"skillcanon_http_request_duration_seconds_count{{{route}}}") >= 2
+    assert _sample(
+        text, f'skillcanon_http_request_duration_seconds_bucket{{{route},le="+Inf"}}'
+    ) >= 2
+    # Every expand runs SQL; the per-request histogram saw them
+    assert _sample(
+        text, 'skillcanon_db_queries_per_request_bucket{route="/api/v1/expand/{name}",le="0.0"}'
+    ) < _sample(
+        text, 'skillcanon_db_queries_per_request_count{route="/api/v1/expand/{name}"}'
+    )
+    render_total = telemetry.expand_render_duration.samples()[()]
+    assert sum(render_total[:-1]) - before >= 2
+
+
+def test_histogram_and_counter_rendering():
+    registry = telemetry.Registry()
+    saved = telemetry.registry
+    telemetry.registry = registry
+    try:
+        hist = telemetry.Histogram("demo_seconds", "A demo", ("op",), buckets=(0.1, 1.0))
+        counter = telemetry.Counter("demo_events", 'Quoted "help"', ("kind",))
+        gauge = telemetry.Gauge("demo_live", "Live things", callback=lambda: 3)
+    finally:
+        telemetry.registry = saved
+    hist.observe(0.05, op="read")
+    hist.observe(0.5, op="read")
+    hist.observe(5, op="read")
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{op="read",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{op="read",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{op="read"} 3' in text
+    assert 'demo_seconds_sum{op="read"} 5.55' in text
+    assert 'demo_events_total{kind="a\\"b"} 3' in text
+    assert '# HELP demo_events Quoted \\"help\\"' in text
+    assert "demo_live 3" in text
+    assert gauge.samples() == {(): 3}
+
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+    registry = telemetry.Registry()
+    saved = telemetry.registry
+    telemetry.registry = registry
+    try:
+        hist = telemetry.Histogram("work_seconds", "Work", buckets=(1.0,))
+        counter = telemetry.Counter("jobs", "Jobs", ("queue",))
+        gauge = telemetry.Gauge("busy", "Busy workers")
+    finally:
+        telemetry.registry = saved
+    hist.observe(0.5)
+    counter.inc(queue="a")
+    gauge.set(1)
+
+    def write_other(snapshot_id, age, samples):
+        path = tmp_path / f"metrics-{snapshot_id}.json"
+        path.write_text(json.dumps({"id": snapshot_id, "metrics": samples}))
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    # A worker that exited a minute ago: its counters still count, its gauges don't
+    write_other(
+        "4242-exited",
+        60,
+        {
+            "work_seconds": {"samples": [[[], [1, 1, 3.5]]]},
+            "jobs": {"samples": [[["a"], 4], [["b"], 1]]},
+            "busy": {"samples": [[[], 7]]},
+        },
+    )
+    # One gone for longer than the TTL is deleted
+    expired = write_other(
+        "4242-expired",
+        settings.metrics_snapshot_ttl_seconds + 1,
+        {"jobs": {"samples": [[["a"], 100]]}},
+    )
+
+    merged = registry.collect(str(tmp_path))
+    assert merged["jobs"] == {("a",): 5, ("b",): 1}
+    assert merged["work_seconds"] == {(): [2, 1, 4.0]}
+    assert merged["busy"] == {(): 1}
+    assert not expired.exists()
+    own = list(tmp_path.glob(f"metrics-{os.getpid()}-*.json"))
+    assert len(own) == 1
+
+
+def test_cache_lookups_are_counted():
+    before = dict(telemetry.cache_requests.samples())
+    telemetry.cache_lookup("demo", True)
+    telemetry.cache_lookup("demo", False)
+    telemetry.cache_lookup("demo", True)
+    after = telemetry.cache_requests.samples()
+    assert after[("demo", "hit")] - before.get(("demo", "hit"), 0) == 2
+    assert after[("demo", "miss")] - before.get(("demo", "miss"), 0) == 1
+
+
+@pytest.mark.asyncio
+async def test_mcp_tool_calls_are_timed():
+    from mcp.server.fastmcp.exceptions import ToolError
+
+    from src.skillcanon_server.mcp.server import mcp
+
+    key = ("sh-does-not-exist", "error")
+    before = telemetry.mcp_tool_duration.samples().get(key, [0] * 15)
+    with pytest.raises(ToolError):
+        await mcp.call_tool("sh-does-not-exist", {})
+    after = telemetry.mcp_tool_duration.samples()[key]
+    assert sum(after[:-1]) == sum(before[:-1]) + 1
+
+
+def test_requests_over_budget_and_repeated_statements_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "db_query_budget", 3)
+    monkeypatch.setattr(settings, "db_repeat_threshold", 3)
+    with telemetry.track_queries() as outer:
+        stats = telemetry.RequestStats(parent=outer)
+        for user_id in range(3):
+            stats.record(f"SELECT * FROM users WHERE id = {user_id}", 0.001)
+            stats.record("SELECT * FROM shares WHERE user_id = ?", 0.002)
+        stats.record("SELECT slow()", 0.5)
+    assert (stats.queries, outer.queries) == (7, 7)
+    assert stats.slowest()[0] == (0.5, "SELECT slow()")
+
+    before = telemetry.db_repeated_statements.samples().get(("/demo",), 0)
+    with caplog.at_level(logging.WARNING, logger="skillcanon.telemetry"):
+        telemetry.check_query_budget("GET", "/demo", stats)
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("ran 7 SQL statements (budget 3)" in m and "SELECT slow()" in m for m in messages)
+    # Literal ids make distinct shapes; only the parameterized lookup repeats
+    assert [m for m in messages if "N+1" in m] == [
+        "Possible N+1 in GET /demo: 3 x SELECT * FROM shares WHERE user_id = ?"
+    ]
+    assert telemetry.db_repeated_statements.samples()[("/demo",)] == before + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_do_not_skew_timings(db_engine):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    telemetry.instrument_engine(db_engine)
+    async with db_engine.connect() as conn:
+        with telemetry.track_queries() as stats:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("SELECT * FROM no_such_table"))
+            await conn.execute(text("SELECT 1"))
+    assert stats.queries == 1
+    assert stats.slowest()[0][1] == "SELECT 1"
+    assert stats.slowest()[0][0] < 1.0
@@ -0,0 +1,245 @@
+"""Tests for asynchronous workflow runs: submission, claiming, leases and the worker pool."""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.skillcanon_server.models import WorkflowRun
+from src.skillcanon_server.services import run_service
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _submit(client, steps, **options) -> str:
+    for name, template in (("upper", "UP({{ input }})"), ("wrap", "[{{ input }}]")):
+        await client.post(
+            "/api/v1/prompts",
+            json={"name": name, "version": {"version": "1.0.0", "user_template": template}},
+        )
+    create = await client.post("/api/v1/workflows", json={"name": "Async", "steps": steps})
+    resp = await client.post(
+        f"/api/v1/workflows/{create.json()['id']}/runs",
+        json={"input": {"input": "go"}, **options},
+    )
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "queued"
+    return resp.json()["id"]
+
+
+_CHAIN = [
+    {"id": "a", "prompt_name": "upper"},
+    {"id": "b", "prompt_name": "wrap", "depends_on": ["a"]},
+]
+
+
+@pytest.mark.asyncio
+async def test_submitted_run_is_executed_by_a_worker(client, session_factory):
+    run_id = await _submit(client, _CHAIN)
+
+    assert await run_service.process_next(session_factory, "worker-1") is True
+    assert await run_service.process_next(session_factory, "worker-1") is False
+
+    resp = await client.get(f"/api/v1/workflow-runs/{run_id}")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "succeeded"
+    assert data["attempts"] == 1
+    assert [s["step_id"] for s in data["steps"]] == ["a", "b"]
+    assert data["outputs"] == {"a": "UP(go)", "b": "[UP(go)]"}
+    assert data["finished_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_submit_and_get_not_found(client):
+    missing = "00000000-0000-0000-0000-000000000000"
+    resp = await client.post(f"/api/v1/workflows/{missing}/runs", json={"input": {}})
+    assert resp.status_code == 404
+    resp = await client.get(f"/api/v1/workflow-runs/{missing}")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_run_status_requires_access(client, db_session, user_client_factory):
+    from src.skillcanon_server.models import Team, User
+    from src.skillcanon_server.services import workflow_service
+
+    run_id = await _submit(client, _CHAIN)
+    workflow_id = (await run_service.get_run(db_session, uuid.UUID(run_id))).workflow_id
+    team = Team(name="Runs", slug="runs")
+    db_session.add(team)
+    await db_session.flush()
+    stranger = User(team_id=team.id, username="stranger")
+    sharee = User(team_id=team.id, username="sharee")
+    db_session.add_all([stranger, sharee])
+    await db_session.commit()
+    await workflow_service.share_workflow(db_session, workflow_id, sharee.id)
+
+    stranger_client = await user_client_factory(stranger)
+    assert (await stranger_client.get(f"/api/v1/workflow-runs/{run_id}")).status_code == 404
+    sharee_client = await user_client_factory(sharee)
+    assert (await sharee_client.get(f"/api/v1/workflow-runs/{run_id}")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_failed_step_marks_run_failed(client, session_factory):
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "broken", "version": {"version": "1.0.0", "user_template": "{{ nope }}"}},
+    )
+    run_id = await _submit(
+        client, [{"id": "x", "prompt_name": "broken"}, *_CHAIN], on_error="continue"
+    )
+    await run_service.process_next(session_factory, "worker-1")
+
+    data = (await client.get(f"/api/v1/workflow-runs/{run_id}")).json()
+    assert data["status"] == "failed"
+    assert {s["step_id"]: s["status"] for s in data["steps"]} == {
+        "x": "error",
+        "a": "success",
+        "b": "success",
+    }
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(client, db_session, session_factory):
+    run_id = uuid.UUID(await _submit(client, _CHAIN))
+
+    async with session_factory() as db:
+        assert await run_service.claim_run(db, "crashed-worker") == run_id
+    async with session_factory() as db:
+        assert await run_service.claim_run(db, "worker-2") is None
+
+    # The first worker died without finishing; let its lease lapse
+    await db_session.execute(
+        update(WorkflowRun)
+        .where(WorkflowRun.id == run_id)
+        .values(lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    await db_session.commit()
+
+    assert await run_service.process_next(session_factory, "worker-2") is True
+    run = await run_service.get_run(db_session, run_id)
+    assert run.status == "succeeded"
+    assert run.attempts == 2
+    assert [s.step_id for s in run.steps] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_run_gives_up_after_max_attempts(client, db_session, session_factory):
+    run_id = uuid.UUID(await _submit(client, _CHAIN))
+    await db_session.execute(
+        update(WorkflowRun)
+        .where(WorkflowRun.id == run_id)
+        .values(attempts=run_service.MAX_ATTEMPTS)
+    )
+    await db_session.commit()
+
+    await run_service.process_next(session_factory, "worker-1")
+    run = await run_service.get_run(db_session, run_id)
+    assert run.status == "failed"
+    assert "Gave up" in run.error
+
+
+@pytest.mark.asyncio
+async def test_worker_that_lost_its_lease_stops(client, db_session, session_factory):
+    run_id = uuid.UUID(await _submit(client, _CHAIN))
+    async with session_factory() as db:
+        await run_service.claim_run(db, "slow-worker")
+    # Another worker took the run over while this one was stalled
+    await db_session.execute(
+        update(WorkflowRun).where(WorkflowRun.id == run_id).values(lease_owner="new-owner")
+    )
+    await db_session.commit()
+
+    await run_service.execute_run(session_factory, run_id, "slow-worker")
+    run = await run_service.get_run(db_session, run_id)
+    assert run.status == "running"
+    assert run.steps == []
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_a_step_outlives_it(
+    client, db_session, session_factory, monkeypatch
+):
+    from src.skillcanon_server.services import workflow_service
+
+    run_id = uuid.UUID(await _submit(client, _CHAIN))
+    lease = 0.3
+    real_run_workflow = workflow_service.run_workflow
+    reclaimed: list = []
+
+    async def _slow_run_workflow(*args, **kwargs):
+        # Outlive the lease several times over before any step is recorded
+        for _ in range(4):
+            await asyncio.sleep(lease)
+            async with session_factory() as db:
+                reclaimed.append(await run_service.claim_run(db, "worker-2", lease))
+        return await real_run_workflow(*args, **kwargs)
+
+    monkeypatch.setattr(workflow_service, "run_workflow", _slow_run_workflow)
+    assert await run_service.process_next(session_factory, "worker-1", lease) is True
+
+    assert reclaimed == [None] * 4
+    run = await run_service.get_run(db_session, run_id)
+    assert (run.status, run.attempts) == ("succeeded", 1)
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_when_its_lease_is_taken_mid_step(
+    client, db_session, session_factory, monkeypatch
+):
+    from src.skillcanon_server.services import workflow_service
+
+    run_id = uuid.UUID(await _submit(client, _CHAIN))
+    started = asyncio.Event()
+
+    async def _stuck_run_workflow(*args, **kwargs):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(workflow_service, "run_workflow", _stuck_run_workflow)
+    worker = asyncio.create_task(run_service.process_next(session_factory, "worker-1", 0.3))
+    await asyncio.wait_for(started.wait(), timeout=5)
+    await db_session.execute(
+        update(WorkflowRun).where(WorkflowRun.id == run_id).values(lease_owner="new-owner")
+    )
+    await db_session.commit()
+
+    assert await asyncio.wait_for(worker, timeout=5) is True
+    assert (await run_service.get_run(db_session, run_id)).status == "running"
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_drains_queue(client, db_session, session_factory, monkeypatch):
+    run_ids = [uuid.UUID(await _submit(client, _CHAIN)) for _ in range(3)]
+    claims: list[bool] = []
+    idle = asyncio.Event()
+    real_process_next = run_service.process_next
+
+    async def _tracking_process_next(*args):
+        claimed = await real_process_next(*args)
+        claims.append(claimed)
+        if not claimed:
+            idle.set()
+        return claimed
+
+    monkeypatch.setattr(run_service, "process_next", _tracking_process_next)
+    pool = run_service.RunWorkerPool()
+    # One worker: the in-memory test database is a single shared connection.
+    # Stop only once it is idle so no query is cancelled mid-flight.
+    pool.start(session_factory, size=1, poll_seconds=60)
+    try:
+        await asyncio.wait_for(idle.wait(), timeout=5)
+    finally:
+        await pool.stop()
+
+    assert claims == [True, True, True, False]
+    for run_id in run_ids:
+        assert (await run_service.get_run(db_session, run_id)).status == "succeeded"
@@ -1,6 +1,10 @@
 """Tests for the Workflow CRUD and execution endpoints (user-scoped)."""
 
+import json
+import uuid
+
 import pytest
+from sqlalchemy import select
 
 
 async def _make_user(client, slug="wf-team"):
@@ -45,7 +49,7 @@ async def seeded_prompts(client):
 
 
 @pytest.mark.asyncio
-async def test_create_workflow(client, user_id):
+async def test_create_workflow(client, user_id, seeded_prompts):
     resp = await client.post(
         "/api/v1/workflows",
         json={
@@ -102,6 +106,20 @@ async def test_get_workflow_not_found(client):
     assert resp.status_code == 404
 
 
+@pytest.mark.asyncio
+async def test_get_workflow_by_name(client, user_id):
+    create = await client.post(
+        "/api/v1/workflows",
+        json={"user_id": user_id, "name": "PRD Pipeline", "steps": []},
+    )
+    resp = await client.get("/api/v1/workflows/by-name/prd pipeline")
+    assert resp.status_code == 200
+    assert resp.json()["id"] == create.json()["id"]
+
+    resp = await client.get("/api/v1/workflows/by-name/missing")
+    assert resp.status_code == 404
+
+
 @pytest.mark.asyncio
 async def test_update_workflow(client, user_id):
     create = await client.post(
@@ -208,6 +226,10 @@ async def test_run_workflow_not_found(client):
 
 @pytest.mark.asyncio
 async def test_run_workflow_missing_prompt(client, user_id):
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "doomed", "version": {"version": "1.0.0", "user_template": "x"}},
+    )
     create = await client.post(
         "/api/v1/workflows",
         json={
@@ -216,12 +238,13 @@ async def test_run_workflow_missing_prompt(client, user_id):
             "steps": [
                 {
                     "id": "s1",
-                    "prompt_name": "nonexistent",
+                    "prompt_name": "doomed",
                 }
             ],
         },
     )
     wf_id = create.json()["id"]
+    await client.delete("/api/v1/prompts/doomed")
     resp = await client.post(
         f"/api/v1/workflows/{wf_id}/run",
         json={"input": {}},
@@ -230,3 +253,554 @@ async def test_run_workflow_missing_prompt(client, user_id):
     data = resp.json()
     assert data["steps"][0]["status"] == "error"
     assert "not found" in data["steps"][0]["error"]
+
+
+async def _make_prompt(client, name, template):
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": name, "version": {"version": "1.0.0", "user_template": template}},
+    )
+
+
+async def _run(client, steps, **options):
+    create = await client.post("/api/v1/workflows", json={"name": "DAG", "steps": steps})
+    resp = await client.post(
+        f"/api/v1/workflows/{create.json()['id']}/run", json={"input": {}, **options}
+    )
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_run_fan_out_fan_in(client):
+    await _make_prompt(client, "root", "ROOT")
+    await _make_prompt(client, "left", "L({{ input }})")
+    await _make_prompt(client, "right", "R({{ input }})")
+    await _make_prompt(client, "join", "J({{ b }}+{{ c }}|{{ input }})")
+
+    data = await _run(
+        client,
+        [
+            {"id": "a", "prompt_name": "root"},
+            {"id": "b", "prompt_name": "left", "depends_on": ["a"]},
+            {"id": "c", "prompt_name": "right", "depends_on": ["a"]},
+            {"id": "d", "prompt_name": "join", "depends_on": ["b", "c"]},
+        ],
+        max_parallel=2,
+    )
+    assert [s["step_id"] for s in data["steps"]] == ["a", "b", "c", "d"]
+    assert list(data["outputs"]) == ["a", "b", "c", "d"]
+    assert data["outputs"]["d"] == "J(L(ROOT)+R(ROOT)|R(ROOT))"
+
+
+@pytest.mark.asyncio
+async def test_run_linear_pipeline_without_dependencies(client):
+    await _make_prompt(client, "first", "one")
+    await _make_prompt(client, "second", "two after {{ input }}")
+
+    data = await _run(
+        client, [{"id": "s1", "prompt_name": "first"}, {"id": "s2", "prompt_name": "second"}]
+    )
+    assert data["outputs"]["s2"] == "two after one"
+
+
+@pytest.mark.asyncio
+async def test_run_error_modes(client):
+    await _make_prompt(client, "ok", "fine")
+    await _make_prompt(client, "broken", "{{ undefined_variable }}")
+    steps = [
+        {"id": "bad", "prompt_name": "broken"},
+        {"id": "after-bad", "prompt_name": "ok", "depends_on": ["bad"]},
+        {"id": "good", "prompt_name": "ok", "depends_on": []},
+        {"id": "after-good", "prompt_name": "ok", "depends_on": ["good"]},
+    ]
+
+    data = await _run(client, steps, on_error="continue", max_parallel=1)
+    statuses = {s["step_id"]: s["status"] for s in data["steps"]}
+    assert statuses == {
+        "bad": "error",
+        "after-bad": "skipped",
+        "good": "success",
+        "after-good": "success",
+    }
+
+    data = await _run(client, steps, max_parallel=1)
+    assert [s["step_id"] for s in data["steps"]] == ["bad"]
+    assert data["outputs"] == {}
+
+
+@pytest.mark.asyncio
+async def test_run_respects_max_parallel(client, db_session, monkeypatch):
+    import asyncio
+
+    from src.skillcanon_server.services import workflow_service
+
+    active = 0
+    peak = 0
+    real_run_step = workflow_service._run_step
+
+    async def _slow_step(*args):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return await real_run_step(*args)
+
+    monkeypatch.setattr(workflow_service, "_run_step", _slow_step)
+    await _make_prompt(client, "leaf", "x")
+    steps = [{"id": f"s{i}", "prompt_name": "leaf", "depends_on": []} for i in range(6)]
+    steps.append({"id": "sink", "prompt_name": "leaf", "depends_on": ["s0"]})
+    create = await client.post("/api/v1/workflows", json={"name": "Wide", "steps": steps})
+
+    result = await workflow_service.run_workflow(
+        db_session, uuid.UUID(create.json()["id"]), {}, max_parallel=3
+    )
+    assert peak == 3
+    assert all(s.status == "success" for s in result.steps)
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_render_concurrently(client, db_session, monkeypatch):
+    import threading
+
+    from src.skillcanon_server.services import prompt_service, workflow_service
+
+    # Each render waits for the other: only renders in flight together get past
+    both_rendering = threading.Barrier(2, timeout=5)
+    real_render_prompt = prompt_service.render_prompt
+
+    def _rendezvous(name, *args, **kwargs):
+        if name == "twin":
+            both_rendering.wait()
+        return real_render_prompt(name, *args, **kwargs)
+
+    await _make_prompt(client, "twin", "t")
+    await _make_prompt(client, "join", "j")
+    steps = [
+        {"id": "left", "prompt_name": "twin"},
+        {"id": "right", "prompt_name": "twin"},
+        {"id": "both", "prompt_name": "join", "depends_on": ["left", "right"]},
+    ]
+    create = await client.post("/api/v1/workflows", json={"name": "Twins", "steps": steps})
+    workflow_service._memo_clear()
+    monkeypatch.setattr(prompt_service, "render_prompt", _rendezvous)
+
+    result = await workflow_service.run_workflow(
+        db_session, uuid.UUID(create.json()["id"]), {"input": "x"}, max_parallel=2
+    )
+    assert [s.status for s in result.steps] == ["success"] * 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "steps, message",
+    [
+        ([{"id": "a", "prompt_name": "greet"}, {"id": "a", "prompt_name": "greet"}], "Duplicate"),
+        ([{"id": "a", "prompt_name": "greet", "depends_on": ["zzz"]}], "unknown step"),
+        (
+            [
+                {"id": "a", "prompt_name": "greet", "depends_on": ["b"]},
+                {"id": "b", "prompt_name": "greet", "depends_on": ["a"]},
+            ],
+            "Circular",
+        ),
+        ([{"id": "a", "prompt_name": "nonexistent"}], "unknown or deprecated prompt"),
+        ([{"id": "a", "prompt_name": "greet", "prompt_version": "9.9.9"}], "version '9.9.9'"),
+        ([{"id": "a", "prompt_name": "greet", "type": "map"}], "needs map_over"),
+        ([{"id": "a", "prompt_name": "greet", "map_over": "names"}], "not a map step"),
+        (
+            [
+                {"id": "a", "prompt_name": "greet"},
+                {"id": "b", "prompt_name": "greet", "type": "map", "map_over": "a"},
+            ],
+            "without depending on it",
+        ),
+    ],
+)
+async def test_create_workflow_validates_plan(client, seeded_prompts, steps, message):
+    resp = await client.post("/api/v1/workflows", json={"name": "Invalid", "steps": steps})
+    assert resp.status_code == 422
+    assert message in resp.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_update_workflow_validates_plan(client, seeded_prompts):
+    create = await client.post(
+        "/api/v1/workflows", json={"name": "Valid", "steps": [{"id": "a", "prompt_name": "greet"}]}
+    )
+    wf_id = create.json()["id"]
+    resp = await client.put(
+        f"/api/v1/workflows/{wf_id}", json={"steps": [{"id": "a", "prompt_name": "nope"}]}
+    )
+    assert resp.status_code == 422
+    assert (await client.get(f"/api/v1/workflows/{wf_id}")).json()["steps"][0]["prompt_name"] == (
+        "greet"
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_without_steps_survives_deprecated_prompt(client):
+    await _make_prompt(client, "retired", "r")
+    create = await client.post(
+        "/api/v1/workflows", json={"name": "Old", "steps": [{"id": "a", "prompt_name": "retired"}]}
+    )
+    wf_id = create.json()["id"]
+    assert (await client.delete("/api/v1/prompts/retired")).status_code == 204
+
+    resp = await client.put(
+        f"/api/v1/workflows/{wf_id}", json={"name": "Renamed", "description": "still here"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["name"] == "Renamed"
+    resp = await client.put(
+        f"/api/v1/workflows/{wf_id}", json={"steps": [{"id": "a", "prompt_name": "retired"}]}
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_saved_workflow_stores_compiled_plan(client, db_session):
+    from src.skillcanon_server.models import Workflow
+
+    await _make_prompt(client, "node", "n")
+    create = await client.post(
+        "/api/v1/workflows",
+        json={
+            "name": "Planned",
+            "steps": [
+                {"id": "d", "prompt_name": "node", "depends_on": ["b", "c"]},
+                {"id": "c", "prompt_name": "node", "depends_on": ["a"]},
+                {"id": "b", "prompt_name": "node", "depends_on": ["a"]},
+                {"id": "a", "prompt_name": "node"},
+            ],
+        },
+    )
+    workflow = await db_session.get(Workflow, uuid.UUID(create.json()["id"]))
+    version_id = (await client.get("/api/v1/prompts/node")).json()["latest_version"]["id"]
+    assert workflow.plan["levels"] == [["a"], ["c", "b"], ["d"]]
+    assert workflow.plan["steps"]["a"]["dependents"] == ["c", "b"]
+    assert workflow.plan["steps"]["d"]["input_from"] == "c"
+    assert {node["version_id"] for node in workflow.plan["steps"].values()} == {version_id}
+
+
+@pytest.mark.asyncio
+async def test_run_recompiles_plan_when_prompt_is_repinned(client):
+    await client.post(
+        "/api/v1/prompts",
+        json={"name": "pinned", "version": {"version": "1.0.0", "user_template": "first"}},
+    )
+    await client.put("/api/v1/prompts/pinned", json={"version": "2.0.0", "user_template": "second"})
+    await client.post("/api/v1/prompts/pinned/rollback/2.0.0")
+    create = await client.post(
+        "/api/v1/workflows", json={"name": "Pins", "steps": [{"id": "s", "prompt_name": "pinned"}]}
+    )
+    run_url = f"/api/v1/workflows/{create.json()['id']}/run"
+    assert (await client.post(run_url, json={})).json()["outputs"] == {"s": "second"}
+
+    await client.post("/api/v1/prompts/pinned/rollback/1.0.0")
+    assert (await client.post(run_url, json={})).json()["outputs"] == {"s": "first"}
+
+
+@pytest.mark.asyncio
+async def test_run_reuses_plan_across_unrelated_registry_changes(client, db_session, monkeypatch):
+    from sqlalchemy import event
+
+    from src.skillcanon_server.services import prompt_service, workflow_service
+
+    await _make_prompt(client, "kept", "kept {{ input }}")
+    create = await client.post(
+        "/api/v1/workflows", json={"name": "Stable", "steps": [{"id": "s", "prompt_name": "kept"}]}
+    )
+    # Registry writes that do not touch "kept"
+    await _make_prompt(client, "unrelated", "other")
+    await client.delete("/api/v1/prompts/unrelated")
+
+    async def _no_resolve(*args, **kwargs):
+        raise AssertionError("plan must not be recompiled")
+
+    monkeypatch.setattr(prompt_service, "resolve_versions", _no_resolve)
+    commits: list = []
+    event.listen(db_session.sync_session, "after_commit", commits.append)
+    result = await workflow_service.run_workflow(
+        db_session, uuid.UUID(create.json()["id"]), {"input": "x"}
+    )
+    assert result.outputs == {"s": "kept x"}
+    assert commits == []
+
+
+def test_plan_graph_handles_long_chains():
+    from src.skillcanon_server.schemas import WorkflowStep
+    from src.skillcanon_server.services.workflow_service import _plan_graph
+
+    steps = [WorkflowStep(id="s0", prompt_name="p")] + [
+        WorkflowStep(id=f"s{i}", prompt_name="p", depends_on=[f"s{i - 1}"]) for i in range(1, 5000)
+    ]
+    plan = _plan_graph(steps)
+    assert len(plan["levels"]) == 5000
+    assert plan["order"][-1] == "s4999"
+
+
+@pytest.mark.asyncio
+async def test_run_prefetches_versions_includes_and_governance(
+    client, db_session, monkeypatch
+):
+    from src.skillcanon_server.models import EnforcementType, Policy, Prompt, Team, User
+    from src.skillcanon_server.services import policy_service, prompt_service, workflow_service
+
+    team = Team(name="Gov Team", slug="gov-team")
+    db_session.add(team)
+    await db_session.flush()
+    owner = User(team_id=team.id, username="gov-owner", email="gov@test.local")
+    db_session.add(owner)
+    await db_session.flush()
+    db_session.add(
+        Policy(
+            team_id=team.id,
+            name="footer",
+            enforcement_type=EnforcementType.append,
+            content="{{ include_prompt('footer') }}",
+        )
+    )
+    await db_session.commit()
+    await _make_prompt(client, "footer", "-- footer")
+    await _make_prompt(client, "header", "HEADER")
+    await _make_prompt(client, "body", "{{ include_prompt('header') }} body {{ input }}")
+    for prompt in (await db_session.execute(select(Prompt))).scalars():
+        prompt.user_id = owner.id
+    await db_session.commit()
+
+    steps = [
+        {"id": "a", "prompt_name": "body"},
+        {"id": "b", "prompt_name": "body", "depends_on": ["a"]},
+        {"id": "c", "prompt_name": "body", "depends_on": ["a"]},
+    ]
+    create = await client.post("/api/v1/workflows", json={"name": "Governed", "steps": steps})
+
+    resolved: list[uuid.UUID] = []
+    real_resolve = policy_service.resolve_all_policies
+
+    async def _counting_resolve(db, user_id, project_id=None):
+        resolved.append(user_id)
+        return await real_resolve(db, user_id, project_id)
+
+    async def _no_lookups(*args, **kwargs):
+        raise AssertionError("steps must not query prompts")
+
+    monkeypatch.setattr(policy_service, "resolve_all_policies", _counting_resolve)
+    monkeypatch.setattr(prompt_service, "expand_prompt", _no_lookups)
+    monkeypatch.setattr(prompt_service, "resolve_version", _no_lookups)
+
+    result = await workflow_service.run_workflow(
+        db_session, uuid.UUID(create.json()["id"]), {"input": "x"}
+    )
+    assert resolved == [owner.id]
+    assert [s.status for s in result.steps] == ["success"] * 3
+    assert result.outputs["a"] == "HEADER body x\n\n-- footer"
+
+
+@pytest.mark.asyncio
+async def test_rerun_reuses_memoized_steps(client):
+    await _make_prompt(client, "shared", "base {{ input }}")
+    await _make_prompt(client, "mid", "mid({{ input }})")
+    await _make_prompt(client, "tail", "tail({{ input }})")
+    steps = [
+        {"id": "a", "prompt_name": "shared"},
+        {"id": "b", "prompt_name": "mid", "depends_on": ["a"]},
+        {"id": "c", "prompt_name": "tail", "depends_on": ["b"]},
+    ]
+    create = await client.post("/api/v1/workflows", json={"name": "Memo", "steps": steps})
+    run_url = f"/api/v1/workflows/{create.json()['id']}/run"
+
+    async def _run_cached(body):
+        data = (await client.post(run_url, json=body)).json()
+        return {s["step_id"]: s["cached"] for s in data["steps"]}, data["outputs"]
+
+    first, outputs = await _run_cached({"input": {"input": "x"}})
+    assert first == {"a": False, "b": False, "c": False}
+    again, same_outputs = await _run_cached({"input": {"input": "x"}})
+    assert again == {"a": True, "b": True, "c": True}
+    assert same_outputs == outputs
+
+    # A new version of the middle prompt recomputes it and everything downstream
+    await client.put(
+        "/api/v1/prompts/mid", json={"version": "2.0.0", "user_template": "M[{{ input }}]"}
+    )
+    await client.post("/api/v1/prompts/mid/rollback/2.0.0")
+    changed, outputs = await _run_cached({"input": {"input": "x"}})
+    assert changed == {"a": True, "b": False, "c": False}
+    assert outputs["c"] == "tail(M[base x])"
+
+    # A different input misses the memo from the root down
+    fresh, _ = await _run_cached({"input": {"input": "y"}})
+    assert fresh == {"a": False, "b": False, "c": False}
+
+
+@pytest.mark.asyncio
+async def test_memo_key_covers_included_prompts(client):
+    await _make_prompt(client, "snippet", "v1")
+    await _make_prompt(client, "uses-snippet", "[{{ include_prompt('snippet') }}]")
+    data = await _run(client, [{"id": "s", "prompt_name": "uses-snippet"}])
+    assert data["outputs"]["s"] == "[v1]"
+
+    await client.put("/api/v1/prompts/snippet", json={"version": "2.0.0", "user_template": "v2"})
+    await client.post("/api/v1/prompts/snippet/rollback/2.0.0")
+    data = await _run(client, [{"id": "s", "prompt_name": "uses-snippet"}])
+    assert data["steps"][0]["cached"] is False
+    assert data["outputs"]["s"] == "[v2]"
+
+
+def test_memo_key_separates_step_types_and_map_sources():
+    from src.skillcanon_server.schemas import WorkflowStep
+    from src.skillcanon_server.services.workflow_service import _memo_key, _StepRender
+
+    render = _StepRender(None, None, None, "fingerprint")
+    step_input = {"input": "x", "a": "[1, 2]", "b": "[1, 2]"}
+    keys = {
+        _memo_key(step, render, step_input)
+        for step in (
+            WorkflowStep(id="s", prompt_name="p"),
+            WorkflowStep(id="s", prompt_name="p", type="map", map_over="a"),
+            WorkflowStep(id="s", prompt_name="p", type="map", map_over="b"),
+        )
+    }
+    assert len(keys) == 3
+
+
+def test_memo_is_bounded_by_rendered_size(monkeypatch):
+    from src.skillcanon_server.config import settings
+    from src.skillcanon_server.schemas import WorkflowStepResult
+    from src.skillcanon_server.services import workflow_service
+
+    monkeypatch.setattr(settings, "workflow_step_cache_chars", 25)
+    workflow_service._memo_clear()
+
+    def result(text):
+        return WorkflowStepResult(
+            step_id="s", prompt_name="p", prompt_version="1", system_message=None,
+            user_message=text,
+        )
+
+    workflow_service._memo_put("a", result("x" * 10))
+    workflow_service._memo_put("b", result("y" * 10))
+    workflow_service._memo_put("too-big", result("z" * 26))
+    assert workflow_service._memo_get("too-big") is None
+    workflow_service._memo_get("a")  # now most recently used
+    workflow_service._memo_put("c", result("w" * 10))
+    assert workflow_service._memo_get("b") is None
+    assert workflow_service._memo_get("a") is not None
+    assert workflow_service._memo_get("c") is not None
+    assert workflow_service._step_memo_chars == 20
+    workflow_service._memo_clear()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("accept", ["text/event-stream", "application/x-ndjson"])
+async def test_stream_workflow_events(client, accept):
+    import json
+
+    await _make_prompt(client, "one", "1")
+    await _make_prompt(client, "two", "2+{{ input }}")
+    create = await client.post(
+        "/api/v1/workflows",
+        json={
+            "name": "Streamed",
+            "steps": [
+                {"id": "a", "prompt_name": "one"},
+                {"id": "b", "prompt_name": "two", "depends_on": ["a"]},
+            ],
+        },
+    )
+    url = f"/api/v1/workflows/{create.json()['id']}/run/stream"
+    async with client.stream("POST", url, json={"input": {}}, headers={"accept": accept}) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith(accept)
+        body = "".join([chunk async for chunk in resp.aiter_text()])
+
+    if accept == "application/x-ndjson":
+        events = [json.loads(line) for line in body.splitlines()]
+    else:
+        events = [
+            json.loads(line[len("data: "):])
+            for line in body.splitlines()
+            if line.startswith("data: ")
+        ]
+    assert [(e["event"], e.get("step_id")) for e in events] == [
+        ("step_started", "a"),
+        ("step_finished", "a"),
+        ("step_started", "b"),
+        ("step_finished", "b"),
+        ("done", None),
+    ]
+    assert events[3]["result"]["user_message"] == "2+1"
+    assert events[-1]["outputs"] == {"a": "1", "b": "2+1"}
+
+
+@pytest.mark.asyncio
+async def test_stream_workflow_not_found(client):
+    resp = await client.post(
+        "/api/v1/workflows/00000000-0000-0000-0000-000000000000/run/stream", json={"input": {}}
+    )
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_run_map_step_over_input_list(client):
+    await _make_prompt(client, "review", "{{ item_index }}:{{ item.path }}@{{ branch }}")
+    await _make_prompt(client, "report", "Report {{ files }}")
+    steps = [
+        {"id": "files", "prompt_name": "review", "type": "map", "map_over": "paths"},
+        {"id": "report", "prompt_name": "report", "depends_on": ["files"]},
+    ]
+    paths = [{"path": "a.py"}, {"path": "b.py"}, {"path": "c.py"}]
+
+    data = await _run(client, steps, input={"paths": paths, "branch": "main"})
+    mapped = data["steps"][0]
+    assert mapped["status"] == "success"
+    rendered = ["0:a.py@main", "1:b.py@main", "2:c.py@main"]
+    assert [i["user_message"] for i in mapped["items"]] == rendered
+    assert data["outputs"]["files"] == json.dumps(rendered)
+    assert data["outputs"]["report"].startswith("Report [")
+
+
+@pytest.mark.asyncio
+async def test_run_map_step_over_upstream_lines(client, monkeypatch):
+    from src.skillcanon_server.config import settings
+
+    monkeypatch.setattr(settings, "workflow_map_batch_size", 2)
+    await _make_prompt(client, "list", "x\ny\n\nz")
+    await _make_prompt(client, "shout", "{{ input | upper }}!")
+    steps = [
+        {"id": "names", "prompt_name": "list"},
+        {
+            "id": "each",
+            "prompt_name": "shout",
+            "depends_on": ["names"],
+            "type": "map",
+            "map_over": "names",
+        },
+    ]
+
+    data = await _run(client, steps)
+    assert [i["user_message"] for i in data["steps"][1]["items"]] == ["X!", "Y!", "Z!"]
+
+
+@pytest.mark.asyncio
+async def test_run_map_step_reports_item_failures(client, monkeypatch):
+    from src.skillcanon_server.config import settings
+
+    await _make_prompt(client, "strict", "{{ item.name }}{{ item.missing }}")
+    steps = [{"id": "m", "prompt_name": "strict", "type": "map", "map_over": "rows"}]
+
+    data = await _run(client, steps, input={"rows": [{"name": "a", "missing": "!"}, {"name": "b"}]})
+    mapped = data["steps"][0]
+    assert mapped["status"] == "error"
+    assert mapped["error"] == "1 of 2 items failed"
+    assert [i["status"] for i in mapped["items"]] == ["success", "error"]
+    assert mapped["items"][0]["user_message"] == "a!"
+
+    monkeypatch.setattr(settings, "workflow_map_max_items", 1)
+    data = await _run(client, steps, input={"rows": [{"name": "a"}, {"name": "b"}]})
+    assert "the limit is 1" in data["steps"][0]["error"]
+    data = await _run(client, steps, input={"rows": 5})
+    assert "map_over must name a list" in data["steps"][0]["error"]